@@ -0,0 +1,98 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Command for benchmarking ravenml's dataset pipeline.
+"""
+
+import click
+import json
+import tempfile
+from pathlib import Path
+from colorama import Fore
+import ravenml.utils.question as question
+from ravenml.utils.progress import progress
+
+### OPTIONS ###
+num_images_opt = click.option(
+    '-n', '--num-images', type=int, default=2000, show_default=True,
+    help='Number of images in each synthetic imageset.'
+)
+
+num_tags_opt = click.option(
+    '-t', '--num-tags', type=int, default=50, show_default=True,
+    help='Number of distinct tags in the synthetic imagesets.'
+)
+
+num_imagesets_opt = click.option(
+    '-i', '--num-imagesets', type=int, default=2, show_default=True,
+    help='Number of synthetic imagesets.'
+)
+
+repeat_opt = click.option(
+    '-r', '--repeat', type=int, default=3, show_default=True,
+    help='Number of repetitions of each benchmark.'
+)
+
+no_s3_opt = click.option(
+    '--no-s3', 'no_s3', is_flag=True,
+    help='Skip the S3 transfer benchmarks (which require moto[server]>=3 and boto3 from late 2023 or later).'
+)
+
+output_opt = click.option(
+    '-o', '--output', type=click.Path(dir_okay=False),
+    help='Path to write the JSON report to. Printed to the console if not provided.'
+)
+
+baseline_opt = click.option(
+    '-b', '--baseline', type=click.Path(exists=True, dir_okay=False),
+    help='Path to a previous JSON report to compare against. The comparison is printed to stderr.'
+)
+
+
+### COMMANDS ###
+@click.command(help='Benchmark the dataset pipeline on synthetic imagesets.')
+@num_images_opt
+@num_tags_opt
+@num_imagesets_opt
+@repeat_opt
+@no_s3_opt
+@output_opt
+@baseline_opt
+def bench(num_images: int, num_tags: int, num_imagesets: int, repeat: int, no_s3: bool, output: str, baseline: str):
+    """Runs the benchmark suite and reports the results.
+
+    Args:
+        num_images (int): images per synthetic imageset
+        num_tags (int): tag cardinality of the synthetic imagesets
+        num_imagesets (int): number of synthetic imagesets
+        repeat (int): repetitions of each benchmark
+        no_s3 (bool): T/F skip the S3 benchmarks
+        output (str): path to write JSON report to, None to print it
+        baseline (str): path to a previous report to compare against, None if not comparing
+    """
+    # imported here to keep CLI startup fast
+    from ravenml.bench.suite import run_suite, compare_reports
+    # spinners and progress of the benchmarked stages would otherwise be printed among the report
+    spinners_enabled, progress_enabled = question.spinners_enabled, progress.enabled
+    question.spinners_enabled = progress.enabled = False
+    try:
+        with tempfile.TemporaryDirectory(prefix='ravenml_bench_') as work_dir:
+            report = run_suite(Path(work_dir), num_images=num_images, num_tags=num_tags,
+                                num_imagesets=num_imagesets, repeat=repeat, s3=not no_s3)
+    finally:
+        question.spinners_enabled, progress.enabled = spinners_enabled, progress_enabled
+    for reason in sorted({result['skipped'] for result in report['results'].values() if 'skipped' in result}):
+        click.echo(Fore.YELLOW + f'WARNING: {reason}, skipped', err=True)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+
+    if baseline:
+        with open(baseline, 'r') as f:
+            ratios = compare_reports(report, json.load(f))
+        for name, ratio in ratios.items():
+            color = Fore.RED if ratio > 1.1 else Fore.GREEN if ratio < 0.9 else Fore.WHITE
+            click.echo(color + f'{name}: {ratio:.2f}x baseline', err=True)
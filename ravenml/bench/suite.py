@@ -0,0 +1,304 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Performance suite for the dataset creation pipeline and S3 helpers.
+
+Runs the DefaultDatasetWriter stages and transfer helpers against synthetic
+imagesets and an in-process moto S3 server, and produces a JSON report
+which can be compared across ravenml versions.
+"""
+
+import os
+import sys
+import logging
+import itertools
+import yaml
+import shutil
+import socket
+import platform
+import statistics
+from time import perf_counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import ravenml.utils.git as git
+from ravenml.bench.synthetic import generate_imageset, synthetic_create_input, ASSOCIATED_FILES, METADATA_FORMAT
+from ravenml.utils.config import config_cache, CONFIG_FIELDS
+from ravenml.utils.checksum import MANIFEST_FILENAME
+from ravenml.utils.local_cache import RMLCache
+
+# version of the report format, bump when its structure changes
+REPORT_VERSION = 1
+# bucket created on the local S3 server
+BENCH_BUCKET = 'ravenml-bench'
+# number of single objects moved by the per-object S3 benchmarks
+NUM_S3_OBJECTS = 100
+# first botocore version honoring AWS_ENDPOINT_URL, which points ravenml's clients at the server
+MIN_BOTOCORE_VERSION = '1.31.58'
+S3_REQUIREMENTS = f'moto[server]>=3 and boto3/botocore>={MIN_BOTOCORE_VERSION}'
+S3_BENCHMARKS = ['s3_upload_directory', 's3_download_prefix', 's3_upload_file', 's3_download_object']
+# loggers of the moto server
+SERVER_LOGGERS = ['werkzeug', 'moto']
+
+### PUBLIC METHODS ###
+def run_suite(work_dir: Path, num_images: int = 2000, num_tags: int = 50, num_imagesets: int = 2,
+                repeat: int = 3, s3: bool = True, seed: int = 0) -> dict:
+    """Runs the benchmark suite.
+
+    Args:
+        work_dir (Path): scratch directory for synthetic imagesets and outputs,
+            removed when the suite finishes
+        num_images (int, optional): images per imageset, default 2000
+        num_tags (int, optional): tag cardinality of the imagesets, default 50
+        num_imagesets (int, optional): number of imagesets, default 2
+        repeat (int, optional): repetitions of each benchmark, default 3
+        s3 (bool, optional): whether to run the S3 benchmarks, default True
+        seed (int, optional): seed for imageset generation, default 0
+
+    Returns:
+        dict: report containing environment information, parameters and per
+            benchmark timings/throughput
+    """
+    # imported here so `ravenml bench --help` does not pay for pandas
+    from ravenml.data.write_dataset import DefaultDatasetWriter
+    from ravenml.data.helpers import and_filter, or_filter, join_sets, copy_associated_files, split_data
+
+    work_dir = Path(work_dir)
+    imageset_paths = [generate_imageset(work_dir / 'imagesets' / f'bench_imageset_{i}', num_images, num_tags, seed=seed + i)
+                        for i in range(num_imagesets)]
+    total_images = num_images * num_imagesets
+    total_bytes = sum(f.stat().st_size for path in imageset_paths for f in path.iterdir())
+
+    def writer():
+        return DefaultDatasetWriter(synthetic_create_input(imageset_paths, work_dir / 'datasets'))
+
+    loaded = writer()
+    loaded.load_image_ids(METADATA_FORMAT)
+    results = {}
+
+    results['load_image_ids'] = _measure(lambda w: w.load_image_ids(METADATA_FORMAT), repeat,
+                                            setup=lambda: (writer(),), items=total_images)
+    results['load_tags'] = _measure(lambda w: w.load_tags(), repeat,
+                                    setup=lambda: (_with_ids(writer(), loaded),), items=total_images)
+    loaded.load_tags()
+    tags = list(loaded.tags_df)
+
+    def filters():
+        intersection = and_filter(loaded.tags_df, tags[:2])
+        union = or_filter(loaded.tags_df, tags[:3])
+        return join_sets([intersection, union])
+    results['tag_filters'] = _measure(filters, repeat, items=total_images)
+
+    def copy_setup():
+        destination = work_dir / 'copy'
+        shutil.rmtree(destination, ignore_errors=True)
+        os.makedirs(destination)
+        return (destination,)
+    results['copy_associated_files'] = _measure(
+        lambda destination: copy_associated_files(loaded.image_ids, destination, ASSOCIATED_FILES),
+        repeat, setup=copy_setup, items=total_images, nbytes=total_bytes)
+    results['split_data'] = _measure(lambda ids: split_data(ids), repeat,
+                                    setup=lambda: (list(loaded.image_ids),), items=total_images)
+
+    if s3:
+        results.update(_run_s3_benchmarks(work_dir, imageset_paths[0], repeat))
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'report_version': REPORT_VERSION,
+        'date': datetime.utcnow().isoformat() + 'Z',
+        'environment': _environment(),
+        'parameters': {
+            'num_images': num_images,
+            'num_tags': num_tags,
+            'num_imagesets': num_imagesets,
+            'repeat': repeat,
+            'seed': seed
+        },
+        'results': results
+    }
+
+def compare_reports(report: dict, baseline: dict) -> dict:
+    """Compares the median timings of two reports.
+
+    Args:
+        report (dict): report to compare
+        baseline (dict): report to compare against
+
+    Returns:
+        dict: maps each benchmark present and not skipped in both reports to the
+            ratio of its median time to the baseline median (> 1 means slower)
+    """
+    ratios = {}
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base and 'median_seconds' in result and base.get('median_seconds'):
+            ratios[name] = result['median_seconds'] / base['median_seconds']
+    return ratios
+
+@contextmanager
+def local_s3(work_dir: Path):
+    """Runs a moto S3 server for the duration of the context and points boto3,
+    and the ravenml configuration at it.
+
+    NOTE: requires moto[server] 3 or later, and a botocore version that honors
+    AWS_ENDPOINT_URL (see S3_REQUIREMENTS).
+
+    Args:
+        work_dir (Path): directory to hold the temporary ravenml configuration
+
+    Yields:
+        str: name of the bucket created on the server
+    """
+    from moto.server import ThreadedMotoServer
+    import boto3
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    # the server logs every request, which would interleave with the report
+    loggers = {name: logging.getLogger(name) for name in SERVER_LOGGERS}
+    old_levels = {name: logger.level for name, logger in loggers.items()}
+    for logger in loggers.values():
+        logger.setLevel(logging.ERROR)
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+    server.start()
+    env = {
+        'AWS_ENDPOINT_URL': f'http://127.0.0.1:{port}',
+        'AWS_ACCESS_KEY_ID': 'bench',
+        'AWS_SECRET_ACCESS_KEY': 'bench',
+        'AWS_DEFAULT_REGION': 'us-east-1',
+        # moto mis-decodes chunked uploads with trailing checksums (recent botocore)
+        'AWS_REQUEST_CHECKSUM_CALCULATION': 'when_required'
+    }
+    old_env = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    old_config_path = config_cache.path
+    config_cache.path = Path(work_dir) / 'config'
+    config_cache.ensure_exists()
+    with open(config_cache.path / 'config.yml', 'w') as f:
+        yaml.dump({field: BENCH_BUCKET for field in CONFIG_FIELDS}, f, default_flow_style=False)
+    try:
+        boto3.session.Session().client('s3').create_bucket(Bucket=BENCH_BUCKET)
+        yield BENCH_BUCKET
+    finally:
+        config_cache.path = old_config_path
+        for key, value in old_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        server.stop()
+        for name, logger in loggers.items():
+            logger.setLevel(old_levels[name])
+
+def s3_unavailable() -> str:
+    """Checks whether the S3 benchmarks can run, see local_s3.
+
+    Returns:
+        str: why the S3 benchmarks cannot run, None if they can
+    """
+    import botocore
+    from pkg_resources import parse_version
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError as e:
+        return f'S3 benchmarks require {S3_REQUIREMENTS} ({e})'
+    if parse_version(botocore.__version__) < parse_version(MIN_BOTOCORE_VERSION):
+        return f'S3 benchmarks require {S3_REQUIREMENTS}, botocore {botocore.__version__} is installed'
+    return None
+
+
+### HELPERS ###
+def _run_s3_benchmarks(work_dir: Path, imageset_path: Path, repeat: int) -> dict:
+    """Runs the benchmarks of the S3 transfer helpers against a local moto server.
+    """
+    from ravenml.utils.aws import (upload_directory, download_prefix, upload_file_to_s3,
+                                    download_object_if_modified)
+    unavailable = s3_unavailable()
+    if unavailable:
+        return {name: {'skipped': unavailable} for name in S3_BENCHMARKS}
+    results = {}
+    files = sorted(imageset_path.iterdir())
+    nbytes = sum(f.stat().st_size for f in files)
+    single_files = files[:NUM_S3_OBJECTS]
+    single_bytes = sum(f.stat().st_size for f in single_files)
+    with local_s3(work_dir) as bucket:
+        prefixes = (f'bench_dataset_{i}' for i in itertools.count())
+        def upload_setup():
+            # files identical to those under the prefix are skipped, and recorded ones verified
+            # rather than hashed, so each repetition uploads unrecorded files to a new prefix
+            manifest_path = imageset_path / MANIFEST_FILENAME
+            if manifest_path.exists():
+                os.remove(manifest_path)
+            return (next(prefixes),)
+        results['s3_upload_directory'] = _measure(lambda prefix: upload_directory(bucket, prefix, str(imageset_path)),
+                                                    repeat, setup=upload_setup, items=len(files), nbytes=nbytes)
+        def download_setup():
+            cache = RMLCache()
+            cache.path = work_dir / 'download'
+            cache.clean()
+            return (cache,)
+        results['s3_download_prefix'] = _measure(lambda cache: download_prefix(bucket, 'bench_dataset_0', cache),
+                                                    repeat, setup=download_setup, items=len(files), nbytes=nbytes)
+
+        def upload_files():
+            for f in single_files:
+                upload_file_to_s3('bench_objects', f)
+        results['s3_upload_file'] = _measure(upload_files, repeat, items=len(single_files), nbytes=single_bytes)
+
+        def download_objects(destination):
+            for f in single_files:
+                download_object_if_modified(bucket, f'bench_objects/{f.name}', destination / f.name)
+        def objects_setup():
+            destination = work_dir / 'objects'
+            shutil.rmtree(destination, ignore_errors=True)
+            os.makedirs(destination)
+            return (destination,)
+        results['s3_download_object'] = _measure(download_objects, repeat, setup=objects_setup,
+                                                    items=len(single_files), nbytes=single_bytes)
+    return results
+
+def _measure(func, repeat: int, setup=None, items: int = None, nbytes: int = None) -> dict:
+    """Times repeated calls of func. setup, if given, is called untimed before each
+    repetition and must return the tuple of arguments passed to func.
+    """
+    seconds = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = perf_counter()
+        func(*args)
+        seconds.append(perf_counter() - start)
+    median = statistics.median(seconds)
+    result = {'seconds': seconds, 'median_seconds': median, 'min_seconds': min(seconds)}
+    if items is not None:
+        result['items'] = items
+        result['items_per_second'] = items / median if median else None
+    if nbytes is not None:
+        result['bytes'] = nbytes
+        result['bytes_per_second'] = nbytes / median if median else None
+    return result
+
+def _with_ids(writer, loaded):
+    writer.image_ids = list(loaded.image_ids)
+    writer.metadata_format = loaded.metadata_format
+    return writer
+
+def _environment() -> dict:
+    """Describes the environment the suite ran in so reports can be told apart.
+    """
+    rml_dir = Path(__file__).resolve().parent.parent
+    repo_root = git.is_repo(rml_dir)
+    git_sha = git.git_sha(repo_root) if repo_root else git.retrieve_from_pkg(rml_dir).get('ravenml_git_sha')
+    try:
+        from pkg_resources import get_distribution
+        version = get_distribution('ravenml').version
+    except Exception:
+        version = None
+    return {
+        'ravenml_version': version,
+        'ravenml_git_sha': git_sha,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
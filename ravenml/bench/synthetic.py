@@ -0,0 +1,88 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Generates synthetic Jigsaw-style imagesets for benchmarking.
+"""
+
+import os
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+from ravenml.data.layout import FLAT
+
+# prefix-suffix pairs of the files generated for every image, in the
+# format expected by copy_associated_files
+ASSOCIATED_FILES = [('image_', '.png'), ('mask_', '.png'), ('meta_', '.json')]
+METADATA_FORMAT = ('meta_', '.json')
+
+def generate_imageset(path: Path, num_images: int, num_tags: int, tags_per_image: int = 3,
+                        image_bytes: int = 4096, seed: int = 0) -> Path:
+    """Writes a synthetic imageset to disk.
+
+    Every image gets an image file, a mask file and a JSON metadata file with a
+    random selection of tags, mirroring the layout of Jigsaw imagesets.
+
+    Args:
+        path (Path): directory to write the imageset to, created if needed
+        num_images (int): number of images in the imageset
+        num_tags (int): number of distinct tags (tag cardinality)
+        tags_per_image (int, optional): tags assigned to each image, default 3
+        image_bytes (int, optional): size of each image/mask file, default 4096
+        seed (int, optional): random seed, default 0
+
+    Returns:
+        Path: path to the generated imageset
+    """
+    rng = random.Random(seed)
+    path = Path(path)
+    os.makedirs(path, exist_ok=True)
+    tags = [f'tag_{i}' for i in range(num_tags)]
+    payload = os.urandom(image_bytes)
+    for i in range(num_images):
+        image_id = f'{seed}_{i}'
+        for prefix, suffix in ASSOCIATED_FILES[:2]:
+            with open(path / f'{prefix}{image_id}{suffix}', 'wb') as f:
+                f.write(payload)
+        metadata = {'tags': rng.sample(tags, min(tags_per_image, num_tags))}
+        with open(path / f'{METADATA_FORMAT[0]}{image_id}{METADATA_FORMAT[1]}', 'w') as f:
+            json.dump(metadata, f)
+    return path
+
+def synthetic_create_input(imageset_paths: list, dataset_path: Path, **overrides) -> SimpleNamespace:
+    """Creates a stand-in for a CreateInput, carrying the attributes DatasetWriter
+    reads, without prompting or touching S3.
+
+    Args:
+        imageset_paths (list): paths to the imagesets to build from
+        dataset_path (Path): directory datasets are written to
+        **overrides: CreateInput attributes to override (i.e, memory_budget, shards)
+
+    Returns:
+        SimpleNamespace: object with the attributes of a CreateInput
+    """
+    create = SimpleNamespace(
+        config={},
+        metadata={'dataset_name': 'bench_dataset', 'created_by': 'ravenml bench', 'comments': ''},
+        plugin_metadata={'architecture': 'bench'},
+        imageset_paths=list(imageset_paths),
+        dataset_path=Path(dataset_path),
+        kfolds=0,
+        test_percent=.2,
+        shards=1,
+        shard_workers=1,
+        shard_index=None,
+        shard_timeout=None,
+        memory_budget=None,
+        transforms=[],
+        parent=None,
+        remove_image_ids=[],
+        seed=None,
+        sampling=None,
+        near_duplicate_distance=None,
+        layout=FLAT
+    )
+    for attribute, value in overrides.items():
+        setattr(create, attribute, value)
+    return create
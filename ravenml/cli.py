@@ -10,8 +10,11 @@ from colorama import init, Fore
 from ravenml.train.commands import train
 from ravenml.data.commands import data
 from ravenml.config.commands import config
+from ravenml.bench.commands import bench
+from ravenml.models.commands import models
 from ravenml.utils.config import get_config, update_config
 from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.metrics import start_metrics
 
 init()
 cache = RMLCache()
@@ -25,10 +28,15 @@ clean_all_opt = click.option(
 
 ### COMMANDS ###
 @click.group(help='Welcome to ravenML!')
-def cli():
+@click.pass_context
+def cli(ctx: click.Context):
     """ Top level command group for ravenml.
+
+    Args:
+        ctx (Context): click context object
     """
-    pass
+    # no-op unless a metrics directory is configured
+    start_metrics(ctx.invoked_subcommand)
     
 @cli.command(help='Cleans locally saved ravenML cache files.')
 @clean_all_opt
@@ -57,3 +65,5 @@ def clean(all: bool):
 cli.add_command(train)
 cli.add_command(data)
 cli.add_command(config)
+cli.add_command(bench)
+cli.add_command(models)
@@ -49,7 +49,7 @@ def show(ctx: click.Context):
         # try and load the configuration
         config = get_config()
         for key, value in config.items():
-            print(Fore.GREEN + key + ': ' + Fore.WHITE + value)
+            print(Fore.GREEN + key + ': ' + Fore.WHITE + str(value))
     except FileNotFoundError:
         # thrown when no configuration file is found
         click.echo(Fore.RED + 'No configuration found.')
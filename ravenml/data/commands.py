@@ -13,19 +13,23 @@ from pkg_resources import iter_entry_points
 from click_plugins import with_plugins
 from colorama import Fore
 from pathlib import Path
-from ravenml.utils.imageset import get_imageset_names, get_imageset_metadata
-from ravenml.utils.dataset import get_dataset_names, get_dataset_metadata
+from ravenml.utils.imageset import get_imageset_names, get_imageset_metadata, refresh_imageset_metadata, verify_imageset_cache
+from ravenml.utils.dataset import (get_dataset_names, get_dataset_metadata, refresh_dataset_metadata, verify_dataset_cache,
+                                    get_dataset_index, dataset_cache)
+from ravenml.utils.checksum import read_manifest, update_manifest, hash_file
 from ravenml.utils.plugins import LazyPluginGroup
 from ravenml.utils.question import cli_spinner, user_confirms
 from ravenml.data.interfaces import CreateInput
 from ravenml.data.options import pass_create
+from ravenml.data.diff import diff_datasets
 from ravenml.data.interfaces import CreateInput, CreateOutput
 from ravenml.utils.config import get_config, load_yaml_config
 from ravenml.utils.aws import upload_directory
+from ravenml.utils.profile import profiler, PROFILE_MODES
 
 # metedata fields to exclude when printing metadata to the user 
 # these are specific to datasets at the moment
-EXCLUDED_METADATA = ['filters', 'transforms', 'image_ids']
+EXCLUDED_METADATA = ['filters', 'transforms', 'image_ids', 'test_image_ids', 'added_image_ids', 'removed_image_ids']
 
 ### OPTIONS ###
 explore_details_opt = click.option(
@@ -48,6 +52,20 @@ config_opt = click.option(
     '-c', '--config', type=str, help='Path to config file. Defaults to ~/ravenML_configs/config.yaml'
 )
 
+profile_opt = click.option(
+    '--profile', type=click.Choice(PROFILE_MODES),
+    help=('Profile dataset creation and write a per-stage timing report next to the dataset metadata, '
+            'or into the current directory if the local dataset is deleted. The copy uploaded with the '
+            'dataset does not cover the upload. '
+            '"memory" additionally traces Python allocations per stage, "cprofile" and "sampling" '
+            'attach cProfile stats or sampled stacks.')
+)
+
+show_leaks_opt = click.option(
+    '-s', '--show-leaks', 'show_leaks', is_flag=True,
+    help='List the test images of each dataset the other trains on, rather than only counting them.'
+)
+
 
 ### COMMANDS ###
 @click.group(help='Data exploration and dataset creation commands.')
@@ -64,13 +82,17 @@ def data(ctx):
 @data.group(cls=LazyPluginGroup, entry_point_name='ravenml.plugins.data', help='Create a new dataset.')
 @click.pass_context
 @config_opt
-def create(ctx: click.Context, config: str):
+@profile_opt
+def create(ctx: click.Context, config: str, profile: str):
     """Creates CreateInput from config and sends to plugin
     
     Args:
         ctx (Context): click context object
         config (str): user config
+        profile (str): profiling mode, None if not profiling
     """
+    if profile:
+        profiler.start(profile, name='data create')
     if config:
         # load config
         # NOTE: this function will raise a click error if there is an issue loading config
@@ -81,13 +103,14 @@ def create(ctx: click.Context, config: str):
 # dataset given by a plugin when create is called, see train.commands.process_result for example
 @create.resultcallback()
 @click.pass_context
-def process_result(ctx: click.Context, result: CreateOutput, config: str):
+def process_result(ctx: click.Context, result: CreateOutput, config: str, profile: str):
     """Processes output of dataset creation
     
     Args:
         ctx (Context): click context object
         result (CreateOutput): result of dataset creation plugin
         config (str): original config provided by user
+        profile (str): profiling mode, None if not profiling
     Returns:
         result (CreateOutput): result of dataset creation plugin
     """
@@ -99,9 +122,26 @@ def process_result(ctx: click.Context, result: CreateOutput, config: str):
 
         # Uploads dataset to S3
         if (ci.upload):
+            # write profiling report before upload so it travels with the dataset
+            if profile:
+                profiler.write_report(dataset_path, stop=False)
             bucketConfig = get_config()
             bucket = bucketConfig["dataset_bucket_name"]
-            cli_spinner("Uploading dataset to S3...", upload_directory, bucket_name=bucket, prefix=dataset_name, local_path=dataset_path)
+            # versions only upload files which differ from their parent
+            parent_manifest = read_manifest(dataset_cache.path / ci.parent) if ci.parent else None
+            cli_spinner("Uploading dataset to S3...", upload_directory, bucket_name=bucket, prefix=dataset_name, 
+                        local_path=dataset_path, parent_manifest=parent_manifest, parent_prefix=ci.parent)
+
+        # write the complete profiling report, covering the upload, where it outlives the local dataset
+        if profile:
+            report_path = Path.cwd() if ci.delete_local else dataset_path
+            report_files = profiler.write_report(report_path)
+            # the manifest the upload wrote recorded the report before it was rewritten
+            manifest = read_manifest(report_path) if not ci.delete_local else None
+            if manifest:
+                update_manifest(report_path, {path.name: hash_file(path, manifest['algorithm']) for path in report_files},
+                                manifest['algorithm'])
+            click.echo(f'Profiling report written to {report_path}')
         
         # Deletes local dataset
         if (ci.delete_local):
@@ -158,6 +198,21 @@ def inspect_imageset(imageset_name: str):
     except KeyError as e:
         raise click.exceptions.ClickException(f'Given imageset "{imageset_name}" does not contain any metadata files.')
 
+@data.command(help='Verify a locally cached image set against its checksum manifest, re-downloading bad files.')
+@click.argument('imageset_name')
+def verify_imageset(imageset_name: str):
+    """Verify a locally cached imageset.
+
+    Args:
+        imageset_name (str): string name of the imageset to verify
+    """
+    try:
+        summary = cli_spinner("Verifying imageset...", verify_imageset_cache, imageset_name)
+    except ValueError as e:
+        raise click.exceptions.BadParameter(imageset_name, param=imageset_name, 
+                                            param_hint=f'imageset name, not cached locally or no checksum manifest ({e})')
+    _echo_verification(imageset_name, summary)
+
 
 ## Dataset commands ##
 @data.command(help='List available datasets.')
@@ -202,9 +257,95 @@ def inspect_dataset(dataset_name: str):
     # get_dataset_metadata function
     except ValueError as e:
         raise click.exceptions.BadParameter(dataset_name, param=dataset_name, param_hint='dataset name')
+
+@data.command(help='Verify a locally cached dataset against its checksum manifest, re-downloading bad files.')
+@click.argument('dataset_name')
+def verify_dataset(dataset_name: str):
+    """Verify a locally cached dataset.
+
+    Args:
+        dataset_name (str): string name of the dataset to verify
+    """
+    try:
+        summary = cli_spinner("Verifying dataset...", verify_dataset_cache, dataset_name)
+    except ValueError as e:
+        raise click.exceptions.BadParameter(dataset_name, param=dataset_name, 
+                                            param_hint=f'dataset name, not cached locally or no checksum manifest ({e})')
+    _echo_verification(dataset_name, summary)
+
+@data.command(help=('Compare the images of two datasets: images shared and unique to each, imagesets added and removed, '
+                    'and test images of one dataset the other trains on.'))
+@click.argument('first_dataset')
+@click.argument('second_dataset')
+@show_leaks_opt
+def diff(first_dataset: str, second_dataset: str, show_leaks: bool):
+    """Compare the images of two datasets.
+
+    Args:
+        first_dataset (str): name of the dataset compared against, i.e the older one
+        second_dataset (str): name of the dataset compared
+        show_leaks (bool): T/F list the leaked images
+    """
+    datasets = []
+    for name in (first_dataset, second_dataset):
+        try:
+            datasets.append(cli_spinner(f"Downloading {name} image ids...", get_dataset_index, name))
+        except ValueError:
+            raise click.exceptions.BadParameter(name, param=name, param_hint='dataset name')
+    click.echo(_format_diff(first_dataset, second_dataset, diff_datasets(*datasets), show_leaks))
         
 
 ### HELPERS ###
+def _echo_verification(name: str, summary: dict):
+    """Reports the result of verifying a local copy against its manifest.
+
+    Args:
+        name (str): name of the imageset/dataset verified
+        summary (dict): summary returned by ravenml.utils.aws.verify_prefix
+
+    Raises:
+        ClickException: if files could not be repaired
+    """
+    click.echo(f'Checked {summary["checked"]} files of {name}.')
+    if summary['repaired']:
+        click.echo(Fore.YELLOW + f'Re-downloaded {len(summary["repaired"])} missing or corrupted files:\n  ' 
+                    + '\n  '.join(summary['repaired']))
+    if summary['failed']:
+        raise click.exceptions.ClickException(f'{len(summary["failed"])} files do not match the manifest:\n  ' 
+                                                + '\n  '.join(summary['failed']))
+    click.echo(Fore.GREEN + 'All files match the manifest.')
+
+def _format_diff(first: str, second: str, result: dict, show_leaks: bool) -> str:
+    """Turn the comparison of two datasets into a string for displaying.
+
+    Args:
+        first (str): name of the dataset compared against
+        second (str): name of the dataset compared
+        result (dict): comparison returned by ravenml.data.diff.diff_datasets
+        show_leaks (bool): whether to list leaked images
+
+    Returns:
+        str: formatted comparison string
+    """
+    images, imagesets = result['images'], result['imagesets']
+    lines = [
+        Fore.GREEN + 'IMAGES ' + Fore.WHITE + f'{images["first"]:,} in {first}, {images["second"]:,} in {second}, '
+            f'{images["shared"]:,} shared, {images["only_first"]:,} only in {first}, {images["only_second"]:,} only in {second}',
+        Fore.GREEN + 'IMAGESETS ' + Fore.WHITE + f'{len(imagesets["shared"])} shared, '
+            f'added {", ".join(imagesets["added"]) or "none"}, removed {", ".join(imagesets["removed"]) or "none"}'
+    ]
+    if result['shared_test'] is None:
+        lines.append(Fore.YELLOW + 'LEAKAGE unknown, a dataset does not record its test set')
+        return '\n'.join(lines)
+    lines.append(Fore.GREEN + 'SHARED TEST ' + Fore.WHITE + f'{result["shared_test"]:,}')
+    for test, dev, field in ((first, second, 'first_test_in_second_dev'), (second, first, 'second_test_in_first_dev')):
+        leaked = result[field]
+        color = Fore.RED if leaked else Fore.WHITE
+        lines.append(Fore.GREEN + 'LEAKAGE ' + color + f'{len(leaked):,} test images of {test} in the dev set of {dev}')
+        if show_leaks:
+            lines += [f'  {imageset}/{image_id}' for imageset, image_id in leaked]
+    return '\n'.join(lines)
+
 def _stringify_metadata(metadata: dict, colored=False) -> str:
     """Turn metadata into a nicely formatted string for displaying.
 
@@ -235,9 +376,13 @@ def _get_detailed_dataset_info(datasets: list, filter_str:str=None) -> str:
         str: concatenated and delimited metadata string for each dataset.
     """
     result = ''
+    # revalidate all cached metadata concurrently up front
+    errors = refresh_dataset_metadata(datasets)
     for dataset in datasets:
         try:
-            metadata = get_dataset_metadata(dataset)
+            if errors[dataset]:
+                raise errors[dataset]
+            metadata = get_dataset_metadata(dataset, no_check=True)
             str_metadata = _stringify_metadata(metadata)
             if filter_str:
                 if filter_str in str_metadata:
@@ -263,9 +408,13 @@ def _get_detailed_imageset_info(imagesets: list, filter_str:str=None) -> str:
         str: concatenated and delimited metadata string for each imageset.
     """
     result = ''
+    # revalidate all cached metadata concurrently up front
+    errors = refresh_imageset_metadata(imagesets)
     for imageset in imagesets:
         try:
-            metadata = get_imageset_metadata(imageset)
+            if errors[imageset]:
+                raise errors[imageset]
+            metadata = get_imageset_metadata(imageset, no_check=True)
             str_metadata = _stringify_metadata(metadata)
             if filter_str:
                 # case sensitive and case insensitive checks
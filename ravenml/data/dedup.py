@@ -0,0 +1,153 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Near-duplicate detection with perceptual hashes.
+
+Every image is reduced to a 64 bit difference hash (dHash), which changes in few bits
+between near-identical images such as consecutive frames of a rendered sequence.
+Pairs within a Hamming distance are found with multi-index hashing: the hashes are
+cut into max_distance + 1 chunks, and by the pigeonhole principle any two hashes
+within max_distance of each other agree exactly on at least one chunk, so only
+hashes sharing a chunk value are compared. Connected components of the matching
+pairs form the groups kept on one side of every split. Requires Pillow.
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:     # Pillow is only needed when near duplicates are grouped
+    Image = None
+
+# side length of the hash grid, hashes have HASH_SIZE * HASH_SIZE bits
+HASH_SIZE = 8
+# images hashed per task sent to a worker process
+HASH_BATCH_SIZE = 256
+# number of set bits in every byte, for numpy versions without bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+### PUBLIC METHODS ###
+def compute_hashes(paths: list, num_workers: int = None) -> np.ndarray:
+    """Computes the difference hash of images in a process pool.
+
+    Args:
+        paths (list): paths to the images
+        num_workers (int, optional): number of worker processes, defaults to the CPU count
+
+    Returns:
+        ndarray: uint64 hash of every image, in the order of paths
+
+    Raises:
+        ImportError: if Pillow is not installed
+    """
+    if Image is None:
+        raise ImportError('Near-duplicate detection requires Pillow, install it with "pip install Pillow"')
+    if not paths:
+        return np.zeros(0, dtype=np.uint64)
+    batches = [paths[i:i + HASH_BATCH_SIZE] for i in range(0, len(paths), HASH_BATCH_SIZE)]
+    with ProcessPoolExecutor(max_workers=num_workers or os.cpu_count()) as executor:
+        return np.concatenate(list(executor.map(_hash_batch, batches)))
+
+def dhash(path) -> int:
+    """Computes the difference hash of an image: the sign of the horizontal gradient
+    of a HASH_SIZE x HASH_SIZE grayscale thumbnail.
+
+    Args:
+        path (Path): path to the image
+
+    Returns:
+        int: 64 bit hash
+    """
+    with Image.open(path) as image:
+        # lets JPEG decoding skip most of the full resolution work
+        image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+        pixels = np.asarray(image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR), dtype=np.int16)
+    bits = np.packbits(pixels[:, 1:] > pixels[:, :-1])
+    return int.from_bytes(bits.tobytes(), 'big')
+
+def hamming_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Computes the element-wise Hamming distance between arrays of hashes.
+
+    Args:
+        a (ndarray): uint64 hashes
+        b (ndarray): uint64 hashes
+
+    Returns:
+        ndarray: number of differing bits of every pair
+    """
+    xor = np.bitwise_xor(a, b)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor)
+    return _POPCOUNT_TABLE[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+def group_hashes(hashes: np.ndarray, max_distance: int) -> np.ndarray:
+    """Groups hashes into connected components of pairs within max_distance bits.
+
+    Args:
+        hashes (ndarray): uint64 hashes
+        max_distance (int): largest Hamming distance of near duplicates, in [0, 63]
+
+    Returns:
+        ndarray: group label of every hash, equal for hashes in the same group. Labels
+            only depend on the set of hashes, not their order.
+    """
+    # identical hashes are grouped by np.unique, only distinct hashes are searched
+    unique, inverse = np.unique(hashes, return_inverse=True)
+    pairs_a, pairs_b = [], []
+    for chunk in _chunks(unique, max_distance + 1):
+        for a, b in _equal_value_pairs(chunk):
+            close = hamming_distance(unique[a], unique[b]) <= max_distance
+            pairs_a.append(a[close])
+            pairs_b.append(b[close])
+    if pairs_a:
+        labels = _connected_components(len(unique), np.concatenate(pairs_a), np.concatenate(pairs_b))
+    else:
+        labels = np.arange(len(unique))
+    return labels[inverse.reshape(-1)]
+
+
+### HELPERS ###
+def _hash_batch(paths: list) -> np.ndarray:
+    return np.array([dhash(path) for path in paths], dtype=np.uint64)
+
+def _chunks(hashes: np.ndarray, num_chunks: int):
+    # splits the 64 bits into num_chunks contiguous, roughly equal chunks
+    bits = HASH_SIZE * HASH_SIZE
+    edges = np.linspace(0, bits, min(num_chunks, bits) + 1).astype(np.uint64)
+    for low, high in zip(edges[:-1], edges[1:]):
+        mask = np.uint64((1 << int(high - low)) - 1)
+        yield (hashes >> low) & mask
+
+def _equal_value_pairs(values: np.ndarray):
+    # yields index arrays (a, b) covering every pair with values[a] == values[b] exactly once,
+    # one distance k within the sorted runs at a time, so memory stays linear
+    n = len(values)
+    order = np.argsort(values, kind='stable')
+    starts = np.flatnonzero(np.concatenate(([True], values[order][1:] != values[order][:-1])))
+    run_lengths = np.diff(np.append(starts, n))
+    run_end = np.repeat(starts + run_lengths, run_lengths)
+    positions = np.flatnonzero(run_end - np.arange(n) > 1)
+    k = 1
+    while positions.size:
+        yield order[positions], order[positions + k]
+        k += 1
+        positions = positions[run_end[positions] - positions > k]
+
+def _connected_components(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # vectorized union-find: hook the larger root onto the smaller, then compress paths
+    labels = np.arange(n)
+    while True:
+        label_a, label_b = labels[a], labels[b]
+        differ = label_a != label_b
+        if not differ.any():
+            return labels
+        np.minimum.at(labels, np.maximum(label_a, label_b)[differ], np.minimum(label_a, label_b)[differ])
+        while True:
+            compressed = labels[labels]
+            if np.array_equal(compressed, labels):
+                break
+            labels = compressed
@@ -0,0 +1,92 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Comparison of the images of two datasets.
+
+Images are compared by the hashed keys of ravenml.data.image_index.load_image_arrays,
+so differences, intersections and overlap between splits are binary searches into
+sorted integer arrays rather than comparisons of (imageset, image id) tuples, which
+keeps diffs of million image datasets under a second.
+"""
+
+import numpy as np
+from ravenml.data.interfaces import Dataset
+from ravenml.data.image_index import SPLIT_DEV, SPLIT_TEST, SPLIT_UNKNOWN
+
+
+### PUBLIC METHODS ###
+def diff_datasets(first: Dataset, second: Dataset) -> dict:
+    """Compares the images of two datasets.
+
+    Args:
+        first (Dataset): dataset compared against, i.e the older one
+        second (Dataset): dataset compared
+
+    Returns:
+        dict: with
+            "images": number of images in "first", "second", both ("shared"), and in
+                only one of them ("only_first", "only_second")
+            "imagesets": names of imagesets "added" in second, "removed" from first, and
+                used by both ("shared")
+            "shared_test": number of images in both test sets
+            "first_test_in_second_dev": (imageset name, image id) pairs in the test set
+                of first which second trains on
+            "second_test_in_first_dev": the same the other way around
+        Split overlaps are None when either dataset did not record its test set.
+    """
+    first_arrays, second_arrays = first.image_arrays(), second.image_arrays()
+    first_keys, second_keys = _sorted_unique(first_arrays['keys']), _sorted_unique(second_arrays['keys'])
+    shared = int(_member(first_keys, second_keys).sum())
+    first_imagesets, second_imagesets = _used_imagesets(first_arrays), _used_imagesets(second_arrays)
+
+    known = not ((first_arrays['split'] == SPLIT_UNKNOWN).any() or (second_arrays['split'] == SPLIT_UNKNOWN).any())
+    shared_test = None
+    if known:
+        shared_test = int(_member(_split_keys(first_arrays, SPLIT_TEST), _split_keys(second_arrays, SPLIT_TEST)).sum())
+    return {
+        'images': {
+            'first': len(first_keys),
+            'second': len(second_keys),
+            'shared': shared,
+            'only_first': len(first_keys) - shared,
+            'only_second': len(second_keys) - shared
+        },
+        'imagesets': {
+            'added': sorted(second_imagesets - first_imagesets),
+            'removed': sorted(first_imagesets - second_imagesets),
+            'shared': sorted(first_imagesets & second_imagesets)
+        },
+        'shared_test': shared_test,
+        'first_test_in_second_dev': _leaked(first_arrays, second_arrays) if known else None,
+        'second_test_in_first_dev': _leaked(second_arrays, first_arrays) if known else None
+    }
+
+
+### HELPERS ###
+def _sorted_unique(keys: np.ndarray) -> np.ndarray:
+    # np.unique hashes integer arrays in numpy 2, which is several times slower than sorting
+    keys = np.sort(keys)
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+def _member(keys: np.ndarray, sorted_keys: np.ndarray) -> np.ndarray:
+    # boolean mask of which keys are among sorted_keys, by binary search
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.searchsorted(sorted_keys, keys).clip(max=len(sorted_keys) - 1)
+    return sorted_keys[positions] == keys
+
+def _used_imagesets(arrays: dict) -> set:
+    # names of the imagesets images are taken from, very old datasets do not record them
+    used = np.bincount(arrays['imageset_codes'], minlength=len(arrays['imagesets'])) > 0
+    return set(arrays['imagesets'][used].tolist()) - {''}
+
+def _split_keys(arrays: dict, split: int) -> np.ndarray:
+    return _sorted_unique(arrays['keys'][arrays['split'] == split])
+
+def _leaked(test_arrays: dict, dev_arrays: dict) -> list:
+    # pairs of the test set of one dataset in the dev set of the other
+    test_indices = np.flatnonzero(test_arrays['split'] == SPLIT_TEST)
+    leaked = test_indices[_member(test_arrays['keys'][test_indices], _split_keys(dev_arrays, SPLIT_DEV))]
+    names = test_arrays['imagesets'][test_arrays['imageset_codes'][leaked]]
+    return list(zip(names.tolist(), test_arrays['image_ids'][leaked].tolist()))
@@ -3,15 +3,23 @@ import shutil
 import pandas as pd
 import json
 import sys
-from random import shuffle
-from queue import Queue
-from threading import Thread
+import zlib
+import numpy as np
+from random import Random
 from pathlib import Path
 from colorama import Fore
 from ravenml.utils.question import cli_spinner, user_selects, user_confirms, user_input
 from ravenml.utils.config import get_config
+from ravenml.utils.checksum import copy_with_checksum, default_algorithm
+from ravenml.utils.executor import parallel_imap
+from ravenml.utils.progress import progress
+from ravenml.data.sampling import new_seed, select
+from ravenml.data.layout import FLAT
 
-def default_filter(tags_df, filter_metadata):
+# files copied per task by copy_associated_files
+COPY_CHUNK_SIZE = 16
+
+def default_filter(tags_df, filter_metadata, seed=None):
     """Method leads user through interactive filtering through image_ids based on 
         image tags
 
@@ -24,7 +32,10 @@ def default_filter(tags_df, filter_metadata):
                     in that column header
         filter_metadata (dict): dict which will hold the sets that is created
             through the filtering process
+        seed (int, optional): seed the sets are sampled with, recorded in each group
+            of filter_metadata. Generated when not given.
     """
+    seed = new_seed() if seed is None else seed
     sets = {}
     # outer loop to determine how many sets the user will create
     try:
@@ -107,14 +118,17 @@ def default_filter(tags_df, filter_metadata):
                 # validator=IntegerValidator,
                 default=str(len(set_data)))
             n = int(how_many)
-            sets_to_join.append(
-                set_data.sample(n, replace=False, random_state=42))
+            if n < 0 or n > len(set_data):
+                raise ValueError(f'Invalid number ({n}) of images to use from set "{set_name}"')
+            rows = select(np.zeros(len(set_data), dtype=np.int64), np.array([n]), np.random.default_rng(seed))
+            sets_to_join.append(set_data.iloc[rows])
 
             # find the right group within the metadata dict and add the number
             # included to it
             for group in filter_metadata["groups"]:
                 if group["name"] == set_name:
                     group["number_included"] = n
+                    group["seed"] = seed
 
         return join_sets(sets_to_join).index.tolist()
 
@@ -206,7 +220,8 @@ def join_sets(sets):
         subset='index', keep='first').set_index('index')
     return result
 
-def copy_associated_files(images: list, destination_dir: Path, associated_files: list, num_threads=20):
+def copy_associated_files(images: list, destination_dir: Path, associated_files: list, num_threads=20,
+                            manifest: dict=None, algorithm: str=None, layout=None):
     """Copies files associated with provided image list into a destination 
         directory locally
     
@@ -220,54 +235,69 @@ def copy_associated_files(images: list, destination_dir: Path, associated_files:
             be present, including metadata files
         num_threads (int, optional): Defaults to 20. Number of threads
             performing concurrent copies.
+        manifest (dict, optional): if given, files are hashed as they are copied and
+            their checksum records (see ravenml.utils.checksum) are added to it,
+            keyed by path relative to destination_dir
+        algorithm (str, optional): hash algorithm used for manifest records,
+            defaults to the preferred available algorithm
+        layout (FileLayout, optional): layout files are placed in destination_dir
+            with (see ravenml.data.layout), defaults to flat
+
+    Raises:
+        ParallelMapError: if any file could not be copied, once all others are
     """
+    algorithm = algorithm or default_algorithm()
+    layout = layout or FLAT
+    destination_dir = destination_dir.absolute()
+    # subdirectories of the layout already created, so each is only created once
+    created = set()
 
     # function used to copy
-    def copy_object(queue):
-        while True:
-            filepath = queue.get()
-            if filepath is None:
-                break
-            shutil.copy(filepath, destination_dir.absolute())
-            queue.task_done()
-
-    # create a queue for objects that need to be copied
-    # and spawn threads to copy them concurrently
-    copy_queue = Queue(maxsize=0)
-    workers = []
-    for worker in range(num_threads):
-        worker = Thread(target=copy_object, args=(copy_queue, ))
-        worker.setDaemon(True)
-        worker.start()
-        workers.append(worker)
+    def copy_object(filepath):
+        relative_path = layout.relative_path(filepath.name)
+        destination = destination_dir / relative_path
+        if not layout.flat and destination.parent not in created:
+            os.makedirs(destination.parent, exist_ok=True)
+            created.add(destination.parent)
+        if manifest is None:
+            shutil.copy(filepath, destination)
+            return None, None, os.path.getsize(filepath)
+        record = copy_with_checksum(filepath, destination, algorithm)
+        return relative_path, record, record['size']
 
     # gets all associated prefix-suffix pairs from 
     # associated_files list 
     file_types = set(associated_files)
 
     # iterates through each image path, and copies each associated file
-    for image in images:
-        for file_type in file_types:
-            filepath = image[0] / str(file_type[0] + image[1] + file_type[1])
-            if os.path.isfile(filepath):
-                copy_queue.put(filepath.absolute())
-
-    # joins all threads
-    copy_queue.join()
-    for _ in range(num_threads):
-        copy_queue.put(None)
-    for worker in workers:
-        worker.join()
-
-def split_data(obj_list, test_percent=.2):
+    filepaths = (image[0] / str(file_type[0] + image[1] + file_type[1]) 
+                    for image in images for file_type in file_types)
+    filepaths = (filepath.absolute() for filepath in filepaths if os.path.isfile(filepath))
+    # manifest records are added here rather than from the copying threads
+    with progress.task('Copying files') as task:
+        for name, record, size in parallel_imap(copy_object, filepaths, num_workers=num_threads, 
+                                                    chunk_size=COPY_CHUNK_SIZE, ordered=False):
+            task.advance(nbytes=size)
+            if record is not None:
+                manifest[name] = record
+
+def split_data(obj_list, test_percent=.2, groups=None, seed=None):
     """Splits obj_list into test/dev sets
     
     Args:
         obj_list (list): list of objects to divide into test/dev
         test_percent (int): percentage of objects in the test set
+        groups (list, optional): group label of each object, in the order of obj_list.
+            Objects with the same label (i.e, near duplicates) end up in the same set,
+            so the test set holds approximately test_percent of the objects.
+        seed (int, optional): seed of the random split, None for a different split every call
     
     Returns:
         tuple of two lists. The first list is test, second dev
+
+    Raises:
+        ValueError: if all objects are in one group, which cannot be split without
+            putting part of it in each set
     """
     if len(obj_list) == 0:
         raise Exception("Empty object list passed.")
@@ -276,30 +306,102 @@ def split_data(obj_list, test_percent=.2):
             "Object list of length 1 passed. Can't build test and dev set with this."
         )
 
-    shuffle(obj_list)
-    index_to_split_on = max(1, int(len(obj_list) * test_percent))
+    if groups is not None:
+        order, boundaries = _group_order(groups, seed)
+        # lazily loaded sequences (i.e, SpillView) are reordered without loading their contents
+        if hasattr(obj_list, 'keys') and not isinstance(obj_list, dict):
+            obj_list.keys = [obj_list.keys[i] for i in order]
+        else:
+            obj_list[:] = [obj_list[i] for i in order]
+        # split on the group boundary closest to the requested size, keeping both sets non-empty
+        target = len(obj_list) * test_percent
+        inner = boundaries[(boundaries > 0) & (boundaries < len(obj_list))]
+        if not inner.size:
+            raise ValueError(f'All {len(obj_list)} objects are in one group, it cannot be split into test and dev')
+        index_to_split_on = int(inner[np.abs(inner - target).argmin()])
+    else:
+        if hasattr(obj_list, 'shuffle'):
+            # lazily loaded sequences (i.e, SpillView) shuffle without loading their contents
+            obj_list.shuffle(Random(seed))
+        else:
+            Random(seed).shuffle(obj_list)
+        index_to_split_on = max(1, int(len(obj_list) * test_percent))
 
     test = obj_list[:index_to_split_on]
     dev = obj_list[index_to_split_on:]
 
     return (test, dev)
 
-def read_json_metadata(dir_entry, image_id):
-    """Reads a json metadata file and creates a dataframe
-        with the tags found in the metadata
+def shard_of(image_id, num_shards):
+    """Determines which shard an image belongs to. The assignment only depends on
+        the imageset name and image id, so every process and host agrees on it
+        regardless of where imagesets are cached.
+    
+    Args:
+        image_id (tuple): path to an imageset paired with an image id in that imageset
+        num_shards (int): total number of shards
+    
+    Returns:
+        int: shard index in [0, num_shards)
+    """
+    key = f'{Path(image_id[0]).name}/{image_id[1]}'.encode('utf-8')
+    return zlib.crc32(key) % num_shards
+
+def partition_image_ids(image_ids, num_shards, groups=None):
+    """Deterministically partitions image ids into shards (see shard_of)
+    
+    Args:
+        image_ids (list): list of tuples with paths to a local directory paired 
+            with an image id located in that directory
+        num_shards (int): number of shards
+        groups (dict, optional): image id keys and the image id representing their group
+            as values, images of a group are put in the shard of its representative
+    
+    Returns:
+        list of num_shards lists of image ids, preserving the input order within each shard
+    """
+    groups = groups or {}
+    shards = [[] for _ in range(num_shards)]
+    for image_id in image_ids:
+        shards[shard_of(groups.get(image_id, image_id), num_shards)].append(image_id)
+    return shards
+
+def _group_order(groups, seed=None):
+    # random order of the objects with every group contiguous, and the indices where groups start
+    rng = np.random.default_rng(seed)
+    codes = pd.factorize(pd.Series(list(groups), dtype=object))[0]
+    group_rank = rng.permutation(codes.max() + 1)[codes]
+    order = np.lexsort((rng.random(len(codes)), group_rank))
+    boundaries = np.flatnonzero(np.diff(group_rank[order])) + 1
+    return order, boundaries
+
+def read_json_tags(dir_entry):
+    """Reads the tags from a json metadata file
     
     Args:
         dir_entry (Path): path to metadata file
-        image_id (String): image_id of metadata file
     
     Returns:
-        dataframe with image_id key and True/False values
-        for each tag.
+        list of tags found in the metadata, ['untagged'] if there are none
     """
     with open(dir_entry, "r") as read_file:
         data = json.load(read_file)
     tag_list = data.get("tags", ['untagged'])
     if len(tag_list) == 0:
         tag_list = ['untagged']
+    return tag_list
+
+def read_json_metadata(dir_entry, image_id):
+    """Reads a json metadata file and creates a dataframe
+        with the tags found in the metadata
+    
+    Args:
+        dir_entry (Path): path to metadata file
+        image_id (String): image_id of metadata file
     
+    Returns:
+        dataframe with image_id key and True/False values
+        for each tag.
+    """
+    tag_list = read_json_tags(dir_entry)
     return pd.DataFrame(dict(zip(tag_list, [True] * len(tag_list))), index=[(Path(os.path.dirname(dir_entry)), image_id)])
@@ -0,0 +1,163 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Compact storage of the image ids of a dataset and their split.
+
+Listing every (imageset, image id) pair in metadata.json makes it tens of MB for big
+datasets, which every reader of dataset metadata downloads and parses. Instead, the
+pairs are stored in a compressed, columnar sidecar (IMAGE_INDEX_FILENAME) next to the
+dataset's files, and metadata.json only records their counts:
+    imagesets               names of the imagesets used
+    imageset_codes          index into imagesets of each image
+    image_ids               id of each image
+    split                   SPLIT_DEV or SPLIT_TEST for each image, SPLIT_UNKNOWN if not recorded
+    added                   for versions, whether each image is new in the version
+    removed_imageset_codes,
+    removed_image_ids       for versions, images of the parent left out of the version
+Datasets created before the sidecar keep the lists in metadata.json, which
+load_image_index and load_image_arrays read transparently.
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+IMAGE_INDEX_FILENAME = 'image_ids.npz'
+# metadata fields which list image ids in datasets created before the sidecar
+LEGACY_FIELDS = ['image_ids', 'test_image_ids', 'added_image_ids', 'removed_image_ids']
+SPLIT_UNKNOWN, SPLIT_DEV, SPLIT_TEST = -1, 0, 1
+# 64 bit FNV-1a parameters, and an odd constant mixing imageset hashes into image keys
+FNV_OFFSET, FNV_PRIME = np.uint64(0xcbf29ce484222325), np.uint64(0x100000001b3)
+IMAGESET_MULTIPLIER = np.uint64(0x9e3779b97f4a7c15)
+
+
+### PUBLIC METHODS ###
+def write_image_index(directory: Path, image_ids: list, test_image_ids: list = None, added_image_ids: list = None,
+                        removed_image_ids: list = None) -> dict:
+    """Writes the image index of a dataset.
+
+    Args:
+        directory (Path): dataset directory
+        image_ids (list): (imageset name, image id) pairs of the dataset
+        test_image_ids (list, optional): pairs in the test set, None if not known
+        added_image_ids (list, optional): pairs new in a version of a parent dataset
+        removed_image_ids (list, optional): pairs of the parent left out of a version
+
+    Returns:
+        dict: fields describing the index for metadata.json
+    """
+    removed_image_ids = list(removed_image_ids or [])
+    imagesets, codes, ids = _pair_arrays(list(image_ids) + removed_image_ids)
+    count = len(image_ids)
+    arrays = {
+        'imagesets': imagesets,
+        'imageset_codes': codes[:count].astype(np.int32),
+        'image_ids': ids[:count]
+    }
+    if test_image_ids is None:
+        arrays['split'] = np.full(count, SPLIT_UNKNOWN, dtype=np.int8)
+    else:
+        arrays['split'] = _member_of(image_ids, test_image_ids).astype(np.int8) * SPLIT_TEST
+    if added_image_ids is not None:
+        arrays['added'] = _member_of(image_ids, added_image_ids)
+        arrays['removed_imageset_codes'] = codes[count:].astype(np.int32)
+        arrays['removed_image_ids'] = ids[count:]
+    np.savez_compressed(Path(directory) / IMAGE_INDEX_FILENAME, **arrays)
+
+    fields = {'image_index': IMAGE_INDEX_FILENAME, 'image_count': count}
+    if test_image_ids is not None:
+        fields['test_image_count'] = int((arrays['split'] == SPLIT_TEST).sum())
+    if added_image_ids is not None:
+        fields['added_image_count'] = int(arrays['added'].sum())
+        fields['removed_image_count'] = len(removed_image_ids)
+    return fields
+
+def load_image_index(metadata: dict, directory: Path) -> dict:
+    """Loads the image ids of a dataset, from its sidecar or, for datasets created
+    before it, from its metadata.
+
+    Args:
+        metadata (dict): dataset metadata
+        directory (Path): dataset directory
+
+    Returns:
+        dict: (imageset name, image id) pairs of the dataset under "image_ids", and
+            "test_image_ids", "added_image_ids" and "removed_image_ids" which are None
+            if not recorded
+    """
+    if 'image_index' not in metadata:
+        return {field: [tuple(pair) for pair in metadata[field]] if field in metadata else None
+                for field in LEGACY_FIELDS}
+    with np.load(Path(directory) / metadata['image_index'], allow_pickle=False) as index:
+        arrays = {name: index[name] for name in index.files}
+    names = arrays['imagesets']
+    pairs = list(zip(names[arrays['imageset_codes']].tolist(), arrays['image_ids'].tolist()))
+    split = arrays['split']
+    loaded = {
+        'image_ids': pairs,
+        'test_image_ids': None if (split == SPLIT_UNKNOWN).any() else [pairs[i] for i in np.flatnonzero(split == SPLIT_TEST)],
+        'added_image_ids': None,
+        'removed_image_ids': None
+    }
+    if 'added' in arrays:
+        loaded['added_image_ids'] = [pairs[i] for i in np.flatnonzero(arrays['added'])]
+        loaded['removed_image_ids'] = list(zip(names[arrays['removed_imageset_codes']].tolist(),
+                                                arrays['removed_image_ids'].tolist()))
+    return loaded
+
+def load_image_arrays(metadata: dict, directory: Path) -> dict:
+    """Loads the image ids of a dataset as arrays, keyed by a hash of each image for fast
+    set operations between datasets.
+
+    Args:
+        metadata (dict): dataset metadata
+        directory (Path): dataset directory
+
+    Returns:
+        dict: "imagesets" (names), "imageset_codes" (index into imagesets of each image),
+            "image_ids", "split" (SPLIT_DEV, SPLIT_TEST or SPLIT_UNKNOWN of each image) and
+            "keys" (np.uint64 hash of each (imageset name, image id) pair, equal for equal
+            pairs of any dataset)
+    """
+    if 'image_index' in metadata:
+        with np.load(Path(directory) / metadata['image_index'], allow_pickle=False) as index:
+            arrays = {name: index[name] for name in ('imagesets', 'imageset_codes', 'image_ids', 'split')}
+    else:
+        # very old datasets list bare image ids, without their imageset
+        pairs = [tuple(pair) if isinstance(pair, list) else ('', pair) for pair in metadata.get('image_ids', [])]
+        imagesets, codes, ids = _pair_arrays(pairs)
+        arrays = {'imagesets': imagesets, 'imageset_codes': codes, 'image_ids': ids}
+        test_image_ids = metadata.get('test_image_ids')
+        if test_image_ids is None:
+            arrays['split'] = np.full(len(pairs), SPLIT_UNKNOWN, dtype=np.int8)
+        else:
+            test_pairs = [tuple(pair) if isinstance(pair, list) else ('', pair) for pair in test_image_ids]
+            arrays['split'] = _member_of(pairs, test_pairs).astype(np.int8) * SPLIT_TEST
+    imageset_keys = _hash_strings(arrays['imagesets']) * IMAGESET_MULTIPLIER
+    arrays['keys'] = _hash_strings(arrays['image_ids']) ^ imageset_keys[arrays['imageset_codes']]
+    return arrays
+
+
+### HELPERS ###
+def _pair_arrays(pairs: list) -> tuple:
+    # sorted imageset names, int32 index into them and image id of each pair
+    codes, imagesets = pd.factorize(pd.Series([name for name, _ in pairs], dtype=object), sort=True)
+    ids = np.array([image_id for _, image_id in pairs], dtype=str)
+    return np.array(imagesets, dtype=str), codes.astype(np.int32), ids
+
+def _hash_strings(strings: np.ndarray) -> np.ndarray:
+    # FNV-1a over the code points of fixed width unicode strings, one vectorized step per
+    # character; the NUL padding is skipped so hashes do not depend on the array's width
+    strings = np.ascontiguousarray(strings, dtype=str)
+    width = strings.dtype.itemsize // 4
+    characters = strings.view(np.uint32).reshape(len(strings), width) if width else np.zeros((len(strings), 0), np.uint32)
+    hashes = np.full(len(strings), FNV_OFFSET, dtype=np.uint64)
+    for column in characters.T:
+        hashes = np.where(column != 0, (hashes ^ column) * FNV_PRIME, hashes)
+    return hashes
+
+def _member_of(pairs: list, members: list) -> np.ndarray:
+    # boolean mask of which pairs are among members
+    members = set(map(tuple, members))
+    return np.fromiter((tuple(pair) in members for pair in pairs), dtype=bool, count=len(pairs))
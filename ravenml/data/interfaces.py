@@ -17,12 +17,19 @@ from ravenml.utils.question import cli_spinner, cli_spinner_wrapper, user_input,
 from ravenml.utils.imageset import get_imageset_names
 from ravenml.utils.config import get_config
 from ravenml.utils.aws import download_prefix
+from ravenml.utils.memory import MemoryBudget
+from ravenml.data.transforms import validate_transforms
+from ravenml.data.sampling import validate_plan
+from ravenml.data.image_index import load_image_index, load_image_arrays
+from ravenml.data.layout import FileLayout
 from colorama import Fore
 
 ### CONSTANTS ###
 # these should be used in all possible situations to protect us
 # in case they change in the future
 FOLD_DIR_PREFIX = 'fold_'
+# seconds the merging host of a multi-host build waits without any shard completing
+DEFAULT_SHARD_TIMEOUT = 6 * 60 * 60
 
 class CreateInput(object):
     """Represents a dataset creation input. Contains all plugin-independent
@@ -44,6 +51,28 @@ class CreateInput(object):
         upload (bool): whether the user wants to upload to s3 or not
         delete_local (bool): whether the user wants to delete the local dataset
             or not
+        memory_budget (MemoryBudget): memory budget for the dataset build, None if
+            the config sets no "memory_budget" (i.e, "8GB")
+        shards (int): number of shards the dataset is built in, 1 if not sharded
+        shard_workers (int): number of local worker processes building shards, 0
+            to only merge shards built by other hosts
+        shard_index (int): shard this host builds, None to build (or wait for) all
+            shards and merge them
+        shard_timeout (float): seconds the merging host waits for shards built by other
+            hosts without any of them completing, None to wait indefinitely
+        transforms (list): image transform steps from the config (see ravenml.data.transforms)
+        parent (str): name of the dataset this dataset is a new version of, None if
+            it is not a version
+        remove_image_ids (list): (imageset name, image id) pairs of the parent dataset
+            to leave out of the version
+        seed (int): seed for all random sampling of image ids, None to generate (and
+            record) a fresh seed for each sampling step
+        sampling (dict): sampling plan from the config (see ravenml.data.sampling), None
+            if the config sets no "sampling"
+        near_duplicate_distance (int): Hamming distance within which images are grouped
+            as near duplicates (see ravenml.data.dedup), None to not group them
+        layout (FileLayout): layout of the files in the test set (see ravenml.data.layout),
+            flat if the config sets no "layout" (i.e, {levels: 1, width: 2})
     """
     def __init__(self, config:dict=None, plugin_name:str=None):
 
@@ -57,6 +86,10 @@ class CreateInput(object):
         # currently the cache_name subdir is only created IF the plugin places files there
         self.imageset_cache = RMLCache()
         
+        # hosts taking part in a multi-host sharded build share the dataset directory,
+        # so existing data in it belongs to the build and is kept
+        shared_build = config.get('shard_index') is not None or config.get('shard_workers') == 0
+
         ## Set up Artifact Path
         dp = config.get('dataset_path')
         if dp is None:
@@ -65,7 +98,7 @@ class CreateInput(object):
         else:
             dp = Path(os.path.expanduser(dp))
             # check if local path contains data
-            if os.path.exists(dp) and os.path.isdir(dp) and len(os.listdir(dp)) > 0:
+            if os.path.exists(dp) and os.path.isdir(dp) and len(os.listdir(dp)) > 0 and not shared_build:
                 if config.get('overwrite_local') or user_confirms('Local artifact storage location contains old data. Overwrite?'):
                     shutil.rmtree(dp)
                 else:
@@ -123,11 +156,46 @@ class CreateInput(object):
         # handle non-metadata user defined fields
         self.kfolds = config['kfolds'] if config.get('kfolds') else 0
         self.test_percent = config['test_percent'] if config.get('test_percent') else .2
+        self.shards = config.get('shards', 1)
+        self.shard_workers = config.get('shard_workers', os.cpu_count())
+        self.shard_index = config.get('shard_index')
+        self.shard_timeout = config.get('shard_timeout', DEFAULT_SHARD_TIMEOUT)
+        if self.shard_index is not None and not 0 <= self.shard_index < self.shards:
+            raise click.exceptions.BadParameter(config, param=config, param_hint='config, "shard_index" outside of "shards". Config was')
+        try:
+            self.transforms = validate_transforms(config.get('transforms', []))
+        except ValueError as e:
+            raise click.exceptions.BadParameter(config, param=config, param_hint=f'config, {e}. Config was')
+        self.parent = config.get('parent')
+        self.remove_image_ids = [tuple(image_id) for image_id in config.get('remove_image_ids', [])]
+        self.seed = config.get('seed')
+        self.near_duplicate_distance = config.get('near_duplicate_distance')
+        if self.near_duplicate_distance is not None and not 0 <= self.near_duplicate_distance < 64:
+            raise click.exceptions.BadParameter(config, param=config, param_hint='config, "near_duplicate_distance" outside of [0, 63]. Config was')
+        self.sampling = config.get('sampling')
+        if self.sampling is not None:
+            try:
+                validate_plan(self.sampling)
+            except ValueError as e:
+                raise click.exceptions.BadParameter(config, param=config, param_hint=f'config, {e}. Config was')
+        try:
+            self.layout = FileLayout(**config.get('layout', {}))
+        except (TypeError, ValueError) as e:
+            raise click.exceptions.BadParameter(config, param=config, param_hint=f'config, invalid "layout" ({e}). Config was')
+        self.memory_budget = None
+        if config.get('memory_budget'):
+            try:
+                # writers spill to disk inside the local cache when over budget
+                self.memory_budget = MemoryBudget(config['memory_budget'], spill_dir=self.imageset_cache.path / 'spill')
+            except ValueError:
+                raise click.exceptions.BadParameter(config, param=config, param_hint='config, invalid "memory_budget". Config was')
 
         # Initialize Directory for Dataset    
         self.metadata['dataset_name'] = config['dataset_name'] if config.get('dataset_name') else user_input(message="What would you like to name this dataset?")
         dir_name = self.dataset_path / self.metadata['dataset_name']
-        if os.path.isdir(dir_name):
+        if not os.path.isdir(dir_name):
+            os.mkdir(dir_name)
+        elif not shared_build:
             if config.get('overwrite_local') or user_confirms('Local artifact storage location contains old data. Overwrite?'):
                 print("WARNING: Deleting existing dataset in cache")
                 shutil.rmtree(dir_name)
@@ -135,8 +203,6 @@ class CreateInput(object):
             else:
                 click.echo(Fore.RED + 'Dataset creation cancelled.')
                 click.get_current_context().exit() 
-        else:
-            os.mkdir(dir_name)
         
         ## Set up fields for plugin use
         # NOTE: plugins should overwrite the architecture field to something
@@ -168,7 +234,9 @@ class CreateInput(object):
         for imageset in imageset_list:
             imageset_path = 'imagesets/'
             self.imageset_cache.ensure_subpath_exists(imageset_path)
-            download_prefix(image_bucket_name, imageset, self.imageset_cache, imageset_path)
+            # concurrent runs on this machine needing the imageset wait for one to sync it
+            with self.imageset_cache.lock(imageset_path + imageset):
+                download_prefix(image_bucket_name, imageset, self.imageset_cache, imageset_path)
             self.imageset_paths.append(self.imageset_cache.path / 'imagesets' / imageset)
 
 class CreateOutput(object): pass
@@ -189,11 +257,75 @@ class Dataset(object):
         name (str): name of the dataset 
         metadata (dict): metadata of dataset
         path (Path): filepath to dataset
+        image_ids (list): (imageset name, image id) pairs of the dataset, loaded on first access
+        test_image_ids (list): pairs in the test set, None if not recorded
+        layout (FileLayout): layout of the files in the test set, see ravenml.data.layout.
+            Plugins find files with file_path and list_files rather than assuming it.
     """
     def __init__(self, name: str, metadata: dict, path: Path):
         self.name = name
         self.metadata = metadata
         self.path = path
+
+    @property
+    def image_ids(self) -> list:
+        return self.image_index()['image_ids']
+
+    @property
+    def test_image_ids(self) -> list:
+        return self.image_index()['test_image_ids']
+
+    @property
+    def layout(self) -> FileLayout:
+        return FileLayout.from_metadata(self.metadata)
+
+    def file_path(self, name: str, directory: str = 'test') -> Path:
+        """Finds a file of the dataset, wherever the dataset's layout places it.
+
+        Args:
+            name (str): filename, i.e "image_1.png"
+            directory (str, optional): Defaults to 'test'. Directory of the dataset
+                holding the file, laid out like the test set.
+
+        Returns:
+            Path: path of the file
+        """
+        return self.layout.path(self.path / directory, name)
+
+    def list_files(self, directory: str = 'test'):
+        """Iterates over the filenames in a directory of the dataset, wherever the
+        dataset's layout places them.
+
+        Args:
+            directory (str, optional): Defaults to 'test'. Directory of the dataset,
+                laid out like the test set.
+
+        Yields:
+            str: filenames, resolved to paths with file_path
+        """
+        yield from self.layout.iter_files(self.path / directory)
+
+    def image_index(self) -> dict:
+        """Loads the image ids of the dataset once, see ravenml.data.image_index.load_image_index.
+
+        Returns:
+            dict: pairs of the dataset under "image_ids", and of its test set, and for
+                versions added to and removed from its parent, under "test_image_ids",
+                "added_image_ids" and "removed_image_ids"
+        """
+        if getattr(self, '_image_index', None) is None:
+            self._image_index = load_image_index(self.metadata, self.path)
+        return self._image_index
+
+    def image_arrays(self) -> dict:
+        """Loads the image ids of the dataset once as arrays, see ravenml.data.image_index.load_image_arrays.
+
+        Returns:
+            dict: imagesets, imageset codes, image ids, split and hashed key of each image
+        """
+        if getattr(self, '_image_arrays', None) is None:
+            self._image_arrays = load_image_arrays(self.metadata, self.path)
+        return self._image_arrays
         
     def get_num_folds(self) -> int:
         """Gets the number of folds this dataset supports for 
@@ -205,3 +337,40 @@ class Dataset(object):
         path = self.path / Path('dev')
         return len(glob.glob(str(path) + FOLD_DIR_PREFIX + '*'))
     
+
+
+class PrefetchedDataset(Dataset):
+    """Represents a training dataset which is still being downloaded in the background.
+
+    Metadata is available immediately, while accessing the path blocks until the
+    download completes, so plugins only wait at their first file access.
+
+    Args:
+        name (str): name of dataset 
+        metadata (dict): metadata of dataset
+        future (Future): future resolving to the filepath of the dataset once it is downloaded
+
+    Attributes:
+        name (str): name of the dataset 
+        metadata (dict): metadata of dataset
+        path (Path): filepath to dataset, blocks until the download completes and re-raises
+            any error raised while downloading
+    """
+    def __init__(self, name: str, metadata: dict, future):
+        self.name = name
+        self.metadata = metadata
+        self._future = future
+
+    @property
+    def path(self) -> Path:
+        if not self._future.done():
+            return cli_spinner(f'Waiting for {self.name} to download...', self._future.result)
+        return self._future.result()
+
+    def done(self) -> bool:
+        """Checks if the download finished, successfully or not.
+
+        Returns:
+            bool: T if the download finished
+        """
+        return self._future.done()
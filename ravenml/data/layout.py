@@ -0,0 +1,129 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Directory layouts of the files in a dataset's test set.
+
+By default files are placed flat in their directory, which slows directory operations
+(listing, creating and looking up files) sharply on ext4 and NFS once a directory holds
+millions of entries. A layout with levels fans files out into subdirectories named after
+the hash of their filename, i.e with 1 level of width 2, "image_1.png" is placed at
+"3f/image_1.png", so no directory holds more than 1/256th of the files. The layout of a
+dataset is recorded in its metadata, and plugins resolve paths through
+ravenml.data.interfaces.Dataset (file_path, list_files) rather than assuming one.
+"""
+
+import os
+from hashlib import blake2b
+from pathlib import Path
+
+# bytes of the filename hash, bounding levels * width to twice this
+HASH_SIZE = 8
+
+
+class FileLayout(object):
+    """Places files in a directory, flat or in hash-prefixed subdirectories.
+
+    Args:
+        levels (int, optional): Defaults to 0 (flat). Levels of subdirectories.
+        width (int, optional): Defaults to 2. Hex characters of the filename hash naming
+            the subdirectory at each level, so each level has 16**width subdirectories.
+
+    Raises:
+        ValueError: if levels or width are invalid
+    """
+    def __init__(self, levels: int = 0, width: int = 2):
+        if not isinstance(levels, int) or not isinstance(width, int) or levels < 0 or width < 1:
+            raise ValueError('layout "levels" must be at least 0 and "width" at least 1')
+        if levels * width > 2 * HASH_SIZE:
+            raise ValueError(f'layout "levels" times "width" must be at most {2 * HASH_SIZE}')
+        self.levels = levels
+        self.width = width
+
+    @property
+    def flat(self) -> bool:
+        return self.levels == 0
+
+    def relative_path(self, name: str) -> str:
+        """Finds where a file is placed relative to its directory.
+
+        Args:
+            name (str): filename
+
+        Returns:
+            str: "/" separated path of the file, the filename itself if the layout is flat
+        """
+        if self.flat:
+            return name
+        digest = blake2b(name.encode(), digest_size=HASH_SIZE).hexdigest()
+        parts = [digest[level * self.width:(level + 1) * self.width] for level in range(self.levels)]
+        return '/'.join(parts + [name])
+
+    def path(self, directory: Path, name: str) -> Path:
+        """Finds where a file is placed in a directory.
+
+        Args:
+            directory (Path): directory laid out
+            name (str): filename
+
+        Returns:
+            Path: path of the file
+        """
+        return Path(directory) / self.relative_path(name)
+
+    def iter_files(self, directory: Path):
+        """Iterates over the files placed in a directory, without listing it in one go.
+
+        Args:
+            directory (Path): directory laid out
+
+        Yields:
+            str: filenames
+        """
+        yield from _iter_files(directory, self.levels)
+
+    def to_metadata(self) -> dict:
+        """Describes the layout for dataset metadata.
+
+        Returns:
+            dict: "levels" and "width" of the layout
+        """
+        return {'levels': self.levels, 'width': self.width}
+
+    @classmethod
+    def from_metadata(cls, metadata: dict):
+        """Reads the layout recorded in dataset metadata.
+
+        Args:
+            metadata (dict): dataset metadata
+
+        Returns:
+            FileLayout: the recorded layout, flat for datasets which did not record one
+        """
+        layout = metadata.get('layout')
+        if not layout:
+            return FLAT
+        return cls(layout.get('levels', 0), layout.get('width', 2))
+
+    def __eq__(self, other):
+        return isinstance(other, FileLayout) and (self.levels, self.width) == (other.levels, other.width)
+
+    def __repr__(self):
+        return f'FileLayout(levels={self.levels}, width={self.width})'
+
+# layout of datasets which do not record one
+FLAT = FileLayout()
+
+
+### HELPERS ###
+def _iter_files(directory, levels):
+    try:
+        entries = os.scandir(directory)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    with entries:
+        for entry in entries:
+            if levels and entry.is_dir():
+                yield from _iter_files(entry.path, levels - 1)
+            elif not levels and entry.is_file():
+                yield entry.name
@@ -0,0 +1,236 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Seeded, vectorized sampling of image ids.
+
+A sampling plan is a dict, as given under "sampling" in the dataset config:
+    sampling:
+      size: 10000                   # images to keep, defaults to all
+      by: imageset                  # strata: "imageset", a list of tags, or omitted for none
+      mode: balanced                # proportional (default), balanced or quota
+      quotas: {imageset_a: 500}     # images per stratum, for mode quota
+      weights: {night: 3.0}         # relative weight of images with a tag
+      seed: 1234                    # generated and recorded when omitted
+The plan actually applied, including the seed and the number of images taken from
+every stratum, is returned so it can be recorded in the dataset's filter metadata
+and replayed to reproduce the sample.
+"""
+
+import secrets
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+SAMPLING_MODES = ['proportional', 'balanced', 'quota']
+PLAN_FIELDS = {'size', 'by', 'mode', 'quotas', 'weights', 'seed', 'strata'}
+# stratum label of images without any of the stratifying tags
+NO_TAGS_LABEL = '(none)'
+
+
+### PUBLIC METHODS ###
+def new_seed() -> int:
+    """Generates a fresh seed for a sampling plan.
+
+    Returns:
+        int: 32 bit seed
+    """
+    return secrets.randbits(32)
+
+def validate_plan(plan: dict) -> dict:
+    """Checks a sampling plan from a dataset config.
+
+    Args:
+        plan (dict): sampling plan
+
+    Returns:
+        dict: the plan
+
+    Raises:
+        ValueError: if the plan is malformed
+    """
+    if not isinstance(plan, dict):
+        raise ValueError('sampling must be a mapping')
+    unknown = set(plan) - PLAN_FIELDS
+    if unknown:
+        raise ValueError(f'Unknown sampling fields {sorted(unknown)}')
+    mode = plan.get('mode', 'proportional')
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f'sampling "mode" must be one of {SAMPLING_MODES}')
+    if mode == 'quota' and not isinstance(plan.get('quotas'), dict):
+        raise ValueError('sampling "mode" quota requires "quotas"')
+    by = plan.get('by')
+    if not (by is None or by == 'imageset' or isinstance(by, list)):
+        raise ValueError('sampling "by" must be "imageset" or a list of tags')
+    if any(weight < 0 for weight in plan.get('weights', {}).values()):
+        raise ValueError('sampling "weights" must not be negative')
+    if plan.get('size') is not None and plan['size'] < 0:
+        raise ValueError('sampling "size" must not be negative')
+    return plan
+
+def sample_image_ids(image_ids: list, plan: dict, tags_df: pd.DataFrame = None) -> tuple:
+    """Samples image ids according to a sampling plan.
+
+    Runs in a constant number of vectorized passes over the ids: strata are encoded
+    as integer codes, every image gets a random key (Efraimidis-Spirakis keys when
+    weighted), and the images with the highest keys are taken from each stratum.
+
+    Args:
+        image_ids (list): tuples of imageset path and image id
+        plan (dict): sampling plan (see validate_plan)
+        tags_df (DataFrame, optional): tag table indexed by image id, required when
+            stratifying or weighting by tags
+
+    Returns:
+        tuple: list of sampled image ids in their input order, and the applied plan
+            with its "seed" and the realized number of images per stratum ("strata")
+
+    Raises:
+        ValueError: if the plan cannot be satisfied (i.e, a quota exceeds its stratum)
+    """
+    plan = dict(validate_plan(plan))
+    plan.setdefault('mode', 'proportional')
+    if plan.get('seed') is None:
+        plan['seed'] = new_seed()
+    image_ids = list(image_ids)
+    rng = np.random.default_rng(plan['seed'])
+
+    codes, labels = strata_codes(image_ids, plan.get('by'), tags_df)
+    counts = np.bincount(codes, minlength=len(labels))
+    size = len(image_ids) if plan.get('size') is None else plan['size']
+    quotas = allocate(counts, labels, size, plan['mode'], plan.get('quotas'))
+    weights = image_weights(image_ids, plan['weights'], tags_df) if plan.get('weights') else None
+    selected = select(codes, quotas, rng, weights)
+
+    plan['strata'] = {str(label): int(quota) for label, quota in zip(labels, quotas)}
+    return [image_ids[i] for i in selected], plan
+
+def strata_codes(image_ids: list, by, tags_df: pd.DataFrame = None) -> tuple:
+    """Encodes the stratum of every image as an integer code.
+
+    Args:
+        image_ids (list): tuples of imageset path and image id
+        by (str or list): "imageset", a list of tags, or None for a single stratum
+        tags_df (DataFrame, optional): tag table, required when by is a list of tags
+
+    Returns:
+        tuple: array of codes in [0, len(labels)), and the list of stratum labels
+    """
+    if by is None:
+        return np.zeros(len(image_ids), dtype=np.int64), ['all']
+    if by == 'imageset':
+        names = np.array([Path(image_id[0]).name for image_id in image_ids], dtype=object)
+        codes, labels = pd.factorize(names)
+        return codes, list(labels)
+    # pack the stratifying tags of each image into the bits of an integer
+    columns = _tag_columns(image_ids, by, tags_df)
+    bits = np.zeros(len(image_ids), dtype=np.int64)
+    for i, column in enumerate(columns):
+        bits |= column.astype(np.int64) << i
+    codes, uniques = pd.factorize(bits)
+    labels = ['+'.join(tag for i, tag in enumerate(by) if value >> i & 1) or NO_TAGS_LABEL for value in uniques]
+    return codes, labels
+
+def allocate(counts: np.ndarray, labels: list, size: int, mode: str, quotas: dict = None) -> np.ndarray:
+    """Decides how many images to take from each stratum.
+
+    Args:
+        counts (ndarray): number of images in each stratum
+        labels (list): stratum labels
+        size (int): total number of images to take, ignored for mode quota
+        mode (str): "proportional" to keep stratum proportions (largest remainder),
+            "balanced" to take equally from every stratum (as far as they are large
+            enough), or "quota" to take quotas[label] images from each stratum
+        quotas (dict, optional): images per stratum label for mode quota, strata
+            without a quota contribute no images
+
+    Returns:
+        ndarray: number of images to take from each stratum
+
+    Raises:
+        ValueError: if more images are requested than are available
+    """
+    total = int(counts.sum())
+    if mode == 'quota':
+        allocation = np.array([quotas.get(str(label), 0) for label in labels], dtype=np.int64)
+        over = [str(label) for label, want, have in zip(labels, allocation, counts) if want > have or want < 0]
+        if over:
+            raise ValueError(f'Sampling quotas out of range for {over}')
+        return allocation
+    if size > total:
+        raise ValueError(f'Cannot sample {size} of {total} images')
+    if mode == 'proportional':
+        exact = counts * (size / total) if total else counts.astype(float)
+        allocation = np.floor(exact).astype(np.int64)
+        # hand out the remaining images to the largest fractional parts
+        remainder = size - int(allocation.sum())
+        allocation[np.argsort(-(exact - allocation), kind='stable')[:remainder]] += 1
+        return allocation
+    # balanced: fill the smallest strata completely while an equal share does not fit them
+    allocation = np.zeros(len(counts), dtype=np.int64)
+    remaining, open_strata = size, len(counts)
+    for i in np.argsort(counts, kind='stable'):
+        share = remaining // open_strata
+        allocation[i] = min(counts[i], share)
+        remaining -= allocation[i]
+        open_strata -= 1
+    # distribute what integer division left over to strata with images to spare
+    spare = np.flatnonzero(allocation < counts)
+    extra = min(remaining, len(spare))
+    allocation[spare[:extra]] += 1
+    return allocation
+
+def image_weights(image_ids: list, weights: dict, tags_df: pd.DataFrame) -> np.ndarray:
+    """Computes the sampling weight of every image, the product of the weights
+    of its tags (1 for tags without a weight).
+
+    Args:
+        image_ids (list): tuples of imageset path and image id
+        weights (dict): weight per tag
+        tags_df (DataFrame): tag table
+
+    Returns:
+        ndarray: weight of every image
+    """
+    result = np.ones(len(image_ids))
+    for column, weight in zip(_tag_columns(image_ids, list(weights), tags_df), weights.values()):
+        result[column] *= weight
+    return result
+
+def select(codes: np.ndarray, quotas: np.ndarray, rng: np.random.Generator, weights: np.ndarray = None) -> np.ndarray:
+    """Takes quotas[c] random images from every stratum c, without replacement.
+
+    Args:
+        codes (ndarray): stratum code of every image
+        quotas (ndarray): number of images to take from each stratum
+        rng (Generator): random generator
+        weights (ndarray, optional): sampling weight of every image
+
+    Returns:
+        ndarray: sorted indices of the selected images
+    """
+    keys = rng.random(len(codes))
+    if weights is not None:
+        # Efraimidis-Spirakis: the top keys u^(1/w) are a weighted sample without replacement
+        with np.errstate(divide='ignore'):
+            keys = np.log(keys) / weights
+    order = np.lexsort((-keys, codes))
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, np.arange(len(quotas)))
+    ranks = np.arange(len(codes)) - starts[sorted_codes]
+    return np.sort(order[ranks < quotas[sorted_codes]])
+
+
+### HELPERS ###
+def _tag_columns(image_ids: list, tags: list, tags_df: pd.DataFrame) -> list:
+    if tags_df is None:
+        raise ValueError('Sampling by tags requires the tags to be loaded')
+    positions = tags_df.index.get_indexer(pd.Index(image_ids, tupleize_cols=False))
+    columns = []
+    for tag in tags:
+        if tag not in tags_df:
+            columns.append(np.zeros(len(image_ids), dtype=bool))
+            continue
+        values = np.asarray(tags_df[tag].to_numpy(), dtype=bool)
+        columns.append(np.where(positions >= 0, values[positions], False))
+    return columns
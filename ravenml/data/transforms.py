@@ -0,0 +1,172 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Declarative image transform stage for dataset creation.
+
+Transforms are given in the dataset config as a list of steps applied in order, i.e:
+    transforms:
+      - op: resize
+        size: [512, 512]
+      - op: crop
+        size: [448, 448]
+      - op: encode
+        format: jpeg
+        quality: 90
+Transformed images are cached in the local cache keyed by a hash of the source image
+and the steps, so rebuilding a dataset with the same transforms reuses prior outputs.
+Requires Pillow.
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+
+try:
+    from PIL import Image
+except ImportError:     # Pillow is only needed when transforms are configured
+    Image = None
+
+# bump when the output of existing steps changes, invalidating cached outputs
+TRANSFORMS_VERSION = 1
+# supported steps and their allowed parameters
+TRANSFORM_OPS = {
+    'resize': {'size', 'max_size', 'resample'},
+    'crop': {'box', 'size'},
+    'encode': {'format', 'quality'}
+}
+RESAMPLE_FILTERS = ['nearest', 'bilinear', 'bicubic', 'lanczos']
+# file extension of each output format
+FORMAT_SUFFIXES = {'jpeg': '.jpg', 'png': '.png', 'webp': '.webp', 'tiff': '.tif', 'bmp': '.bmp'}
+
+transform_cache = RMLCache('transforms')
+
+
+### PUBLIC METHODS ###
+def validate_transforms(steps: list) -> list:
+    """Checks transform steps from a dataset config.
+
+    Args:
+        steps (list): transform steps, dicts with an "op" key naming one of
+            TRANSFORM_OPS and that op's parameters
+
+    Returns:
+        list: the steps
+
+    Raises:
+        ValueError: if a step is malformed
+    """
+    if not isinstance(steps, list):
+        raise ValueError('transforms must be a list of steps')
+    for step in steps:
+        if not isinstance(step, dict) or step.get('op') not in TRANSFORM_OPS:
+            raise ValueError(f'Invalid transform step {step}, "op" must be one of {sorted(TRANSFORM_OPS)}')
+        unknown = set(step) - TRANSFORM_OPS[step['op']] - {'op'}
+        if unknown:
+            raise ValueError(f'Unknown parameters {sorted(unknown)} for transform "{step["op"]}"')
+        if step['op'] == 'resize' and ('size' in step) == ('max_size' in step):
+            raise ValueError('resize transform needs exactly one of "size" or "max_size"')
+        if step['op'] == 'resize' and step.get('resample', 'bilinear') not in RESAMPLE_FILTERS:
+            raise ValueError(f'resize "resample" must be one of {RESAMPLE_FILTERS}')
+        if step['op'] == 'crop' and ('box' in step) == ('size' in step):
+            raise ValueError('crop transform needs exactly one of "box" or "size"')
+        if step['op'] == 'encode' and str(step.get('format', '')).lower() not in FORMAT_SUFFIXES:
+            raise ValueError(f'encode "format" must be one of {sorted(FORMAT_SUFFIXES)}')
+    return steps
+
+def transform_images(paths: list, steps: list, num_workers: int = None) -> list:
+    """Applies transform steps to images in a process pool, reusing cached outputs.
+
+    Args:
+        paths (list): paths to the source images
+        steps (list): transform steps (see validate_transforms)
+        num_workers (int, optional): number of worker processes, defaults to the CPU count
+
+    Returns:
+        list: paths to the transformed images in the transform cache, in the order of paths.
+            Outputs are shared between builds and must not be modified, copy them instead.
+
+    Raises:
+        ImportError: if Pillow is not installed
+    """
+    if Image is None:
+        raise ImportError('Image transforms require Pillow, install it with "pip install Pillow"')
+    if not paths:
+        return []
+    transform_cache.ensure_exists()
+    params = _steps_digest(steps)
+    num_workers = num_workers or os.cpu_count()
+    # chunks amortize inter-process overhead over many small images
+    chunksize = max(1, len(paths) // (num_workers * 4))
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(_transform_image, paths, [steps] * len(paths), [params] * len(paths),
+                                    [transform_cache.path] * len(paths), chunksize=chunksize))
+
+def file_digest(path: Path) -> str:
+    """Hashes the contents of a file.
+
+    Args:
+        path (Path): path to the file
+
+    Returns:
+        str: hex digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+### HELPERS ###
+def _steps_digest(steps: list) -> str:
+    description = json.dumps({'version': TRANSFORMS_VERSION, 'pillow': Image.__version__, 'steps': steps},
+                                sort_keys=True)
+    return hashlib.blake2b(description.encode('utf-8'), digest_size=16).hexdigest()
+
+def _transform_image(path, steps: list, params: str, cache_dir: Path) -> Path:
+    path = Path(path)
+    suffix = path.suffix
+    for step in steps:
+        if step['op'] == 'encode':
+            suffix = FORMAT_SUFFIXES[step['format'].lower()]
+    key = hashlib.blake2b(f'{file_digest(path)}-{params}'.encode('utf-8'), digest_size=16).hexdigest()
+    # entries are split into subdirectories to keep directories small
+    output_path = Path(cache_dir) / key[:2] / f'{key}{suffix}'
+    if output_path.exists():
+        return output_path
+
+    save_kwargs = {}
+    with Image.open(path) as image:
+        image_format = image.format
+        for step in steps:
+            if step['op'] == 'resize':
+                resample = getattr(Image, step.get('resample', 'bilinear').upper())
+                if 'size' in step:
+                    image = image.resize(tuple(step['size']), resample=resample)
+                else:
+                    image = image.copy()
+                    image.thumbnail((step['max_size'], step['max_size']), resample=resample)
+            elif step['op'] == 'crop':
+                if 'box' in step:
+                    box = tuple(step['box'])
+                else:
+                    width, height = step['size']
+                    left, top = (image.width - width) // 2, (image.height - height) // 2
+                    box = (left, top, left + width, top + height)
+                image = image.crop(box)
+            elif step['op'] == 'encode':
+                image_format = step['format'].upper()
+                if 'quality' in step:
+                    save_kwargs['quality'] = step['quality']
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        os.makedirs(output_path.parent, exist_ok=True)
+        # written under a temporary name and renamed, so concurrent builds never see partial outputs
+        temp_path = output_path.with_name(f'{output_path.name}.{os.getpid()}.part')
+        image.save(temp_path, format=image_format, **save_kwargs)
+    os.replace(temp_path, output_path)
+    return output_path
@@ -1,13 +1,32 @@
-import os, inspect, shutil, time, json
+import os, inspect, shutil, time, json, copy, click
+import numpy as np
 import pandas as pd
 import ravenml.utils.git as git
-from random import sample
+import ravenml.utils.question as question
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from ravenml.data.interfaces import CreateInput
 from ravenml.utils.question import cli_spinner, cli_spinner_wrapper, DecoratorSuperClass, user_input
 from ravenml.utils.config import get_config
-from ravenml.data.helpers import default_filter, copy_associated_files, split_data, read_json_metadata
+from ravenml.utils.memory import SpillList, SpillDict, SpillView
+from ravenml.data.transforms import transform_images
+from ravenml.utils.checksum import MANIFEST_FILENAME, default_algorithm, new_hasher, read_manifest, update_manifest
+from ravenml.utils.local_cache import link_or_copy
+from ravenml.utils.executor import parallel_map
+from ravenml.utils.progress import progress
+from ravenml.utils.metrics import metrics
+from ravenml.utils.dataset import get_dataset
+from ravenml.data.sampling import sample_image_ids
+from ravenml.data.dedup import compute_hashes, group_hashes
+from ravenml.data.image_index import write_image_index
+from ravenml.data.helpers import default_filter, copy_associated_files, split_data, read_json_tags, partition_image_ids
+
+# directory inside the dataset holding shard outputs until they are merged
+SHARDS_DIRNAME = '_shards'
+# manifest written by each shard once it is complete
+SHARD_MANIFEST = 'shard.json'
 
 class DatasetWriter(DecoratorSuperClass):
     """Interface for creating datasets, methods are in order of what is expected to be 
@@ -24,7 +43,11 @@ class DatasetWriter(DecoratorSuperClass):
             sets through interactive filtering using the image_id tags
         construct_all (): plugin specific method to generate objects which will be used
             in writing the dataset
+        map_image_ids (fn (callable)): applies fn to every image id in parallel, for use
+            by plugins in construct_all and when writing
         write_dataset (): main driver for writing the dataset locally
+        build_dataset (associated_files (list)): constructs and writes the dataset,
+            in shards when configured to
         write_metadata (): writes dataset metadata file(s)
         write_additional_files (): writes any plugin_specific files not covered in
             write_dataset, write_metadata
@@ -58,6 +81,37 @@ class DatasetWriter(DecoratorSuperClass):
                 be used to write the dataset
             metadata_foramt (tuple): holds a prefix-suffix pair for the format
                 of metadata files
+            memory_budget (MemoryBudget): memory budget of the build, None if unlimited.
+                When set, image_ids and obj_dict start out as SpillList/SpillDict which
+                move to disk once the process exceeds the budget, and tags_df is built
+                with sparse columns when a dense table would not fit. Plugins should add
+                to image_ids/obj_dict rather than reassign them to benefit from this.
+                Only obj_dict is bounded throughout: tags_df is indexed by every image_id,
+                and sampling and tag filters hold all image_ids in memory while they run
+                (their results are moved back into a SpillList).
+            shards (int): number of shards the dataset is built in (see build_dataset)
+            shard_workers (int): number of local processes building shards
+            shard_index (int): only shard built by this host, None to build all shards
+            shard_timeout (float): seconds to wait for shards built by other hosts without
+                any of them completing, None to wait indefinitely
+            transforms (list): image transform steps applied by 'transform_images', recorded
+                in the dataset metadata
+            parent (str): name of the dataset this dataset is a version of, None if it is not a version
+            remove_image_ids (list): (imageset name, image id) pairs of the parent to leave out of a version
+            parent_dataset (Dataset): the parent dataset, once loaded by 'load_parent'
+            added_image_ids (list): image_ids of a version which are not in its parent
+            removed_image_ids (list): image_ids of the parent left out of a version
+            test_image_ids (list): image_ids in the test set, None if the test set was not
+                written by the default 'write_dataset'
+            seed (int): seed for sampling image_ids, None to generate one per sampling step
+            sampling (dict): sampling plan applied by 'sample_image_ids', None if not configured
+            near_duplicate_distance (int): Hamming distance within which 'group_near_duplicates'
+                groups images, None if not configured
+            duplicate_groups (dict): image_ids of near duplicates mapped to the image_id representing
+                their group, filled by 'group_near_duplicates'. Images of a group are kept in the
+                same shard and on the same side of every split.
+            layout (FileLayout): layout of the files 'write_out_test_set' copies (see
+                ravenml.data.layout), a version's is its parent's (set by 'load_parent')
         """
 
         metadata = create.metadata
@@ -69,10 +123,28 @@ class DatasetWriter(DecoratorSuperClass):
         self.comments = metadata['comments']
         self.plugin_name = create.plugin_metadata['architecture']
         self.imageset_paths = create.imageset_paths
+        self.memory_budget = create.memory_budget
+        self.shards = create.shards
+        self.shard_workers = create.shard_workers
+        self.shard_index = create.shard_index
+        self.shard_timeout = create.shard_timeout
+        self.transforms = create.transforms
+        self.parent = create.parent
+        self.remove_image_ids = create.remove_image_ids
+        self.parent_dataset = None
+        self.added_image_ids = []
+        self.removed_image_ids = []
+        self.test_image_ids = None
+        self.seed = create.seed
+        self.sampling = create.sampling
+        self.near_duplicate_distance = create.near_duplicate_distance
+        self.layout = create.layout
+        self.duplicate_groups = {}
+        self._dev_groups = None
         self.tags_df = pd.DataFrame()
-        self.image_ids = []
+        self.image_ids = SpillList(self.memory_budget) if self.memory_budget else []
         self.filter_metadata = {"groups": []}
-        self.obj_dict = {}
+        self.obj_dict = SpillDict(self.memory_budget) if self.memory_budget else {}
         self.metadata_format = None
     
     @cli_spinner_wrapper("Loading Image Ids...")
@@ -115,6 +187,23 @@ class DatasetWriter(DecoratorSuperClass):
         """
         raise NotImplementedError
 
+    def map_image_ids(self, fn, **kwargs) -> list:
+        """Applies a function to every image id in parallel, i.e to construct the
+            objects of construct_all.
+
+        Args:
+            fn (callable): function of an (imageset path, image id) tuple
+            **kwargs: backend, num_workers, chunk_size, ordered and progress, see
+                ravenml.utils.executor.parallel_imap
+
+        Returns:
+            list: results of fn for each image id
+
+        Raises:
+            ParallelMapError: if fn failed for any image id, once all others are done
+        """
+        return parallel_map(fn, self.image_ids, **kwargs)
+
     @cli_spinner_wrapper("Writing out dataset locally...")
     def write_dataset(self):
         """Main driver, writes dataset based on objects passed from construct_all
@@ -123,6 +212,15 @@ class DatasetWriter(DecoratorSuperClass):
         """
         raise NotImplementedError
 
+    def build_dataset(self, associated_files):
+        """Method constructs and writes the dataset, replacing calls to 'construct_all'
+            followed by 'write_dataset'.
+
+        Args:
+            associated_files (list): passed to 'write_dataset'
+        """
+        raise NotImplementedError
+
     @cli_spinner_wrapper("Writing out metadata locally...")
     def write_metadata(self):
         """Writes out a metadata file
@@ -152,6 +250,10 @@ class DefaultDatasetWriter(DatasetWriter):
             'write_dataset', writes out test set   
         write_out_complete_set (path (Path), data (list)): helper method for this implementation of
             'write_dataset', creates test and train groups and corresponding paths for plugin to write to        
+        transform_images (image_format (tuple)): applies the configured transforms to images
+        load_parent (): makes the dataset a version of the parent dataset from the config
+        build_shard (index (int), associated_files (list)): constructs and writes a single shard
+        merge_shards (): merges complete shards into the dataset
     """
 
     def __init__(self, create: CreateInput):
@@ -200,12 +302,14 @@ class DefaultDatasetWriter(DatasetWriter):
         
         # Goes through each file in each imageset to search for metadata files
         # metadata files are parsed for tags and filename is parsed for image_id 
-        for data_dir in self.imageset_paths:
-            for dir_entry in os.scandir(data_dir):
-                if not (dir_entry.name.startswith(metadata_prefix) and dir_entry.name.endswith(metadata_suffix)):
-                    continue
-                image_id = dir_entry.name.replace(metadata_prefix, '').replace(metadata_suffix, '')
-                self.image_ids.append((data_dir, image_id))
+        with progress.task('Finding image ids', total=len(self.imageset_paths)) as task:
+            for data_dir in self.imageset_paths:
+                for dir_entry in os.scandir(data_dir):
+                    if not (dir_entry.name.startswith(metadata_prefix) and dir_entry.name.endswith(metadata_suffix)):
+                        continue
+                    image_id = dir_entry.name.replace(metadata_prefix, '').replace(metadata_suffix, '')
+                    self.image_ids.append((data_dir, image_id))
+                task.advance()
 
     def set_size_filter(self, set_sizes: dict=None):
         """Method is expected to only be called after 'load_image_ids' is called, as it relies on 
@@ -222,25 +326,41 @@ class DefaultDatasetWriter(DatasetWriter):
         Variables Needed:
             image_ids (list): needed for filtering
         """
-        # Gets dict of image_ids associated with each imageset
-        imageset_names = [os.path.basename(path) for path in self.imageset_paths ]
-        imageset_to_image_ids_dict = { name: [] for name in imageset_names}
-        for image_id in self.image_ids:
-            if os.path.basename(image_id[0]) in imageset_names:
-                imageset_to_image_ids_dict[os.path.basename(image_id[0])].append(image_id)
-             
+        set_sizes = set_sizes or {}
+        imageset_names = [os.path.basename(path) for path in self.imageset_paths]
+        counts = Counter(Path(image_id[0]).name for image_id in self.image_ids)
+
         # Goes through specified filtering amounts for each imageset and prompts for missing values
-        filtered_image_ids = []
+        quotas = {}
         for imageset in imageset_names:
             subset_size = set_sizes[imageset] if set_sizes.get(imageset) else int(user_input(
                 message=f'How many images from {imageset} would you like to use?'))
-            if subset_size < 0 or subset_size > len(imageset_to_image_ids_dict[imageset]):
+            if subset_size < 0 or subset_size > counts[imageset]:
                 raise Exception(f'Invalid number ({subset_size}) of images to use from {imageset}')
-            filtered_image_ids += sample(imageset_to_image_ids_dict[imageset],subset_size)
+            quotas[imageset] = subset_size
             self.filter_metadata[imageset] = subset_size
 
-        # Updates image_ids with the new information
-        self.image_ids = filtered_image_ids
+        self.sample_image_ids({'by': 'imageset', 'mode': 'quota', 'quotas': quotas})
+
+    def sample_image_ids(self, plan: dict=None):
+        """Method is expected to only be called after 'load_image_ids' is called. Method samples
+            'self.image_ids' according to a sampling plan (see ravenml.data.sampling), loading
+            tags first if the plan stratifies or weights by them. The applied plan, including its
+            seed, is appended to 'self.filter_metadata["sampling"]' so the sample can be reproduced.
+
+        Args:
+            plan (dict, optional): sampling plan, defaults to 'self.sampling'. Plans without a
+                seed use 'self.seed'.
+        """
+        plan = dict(plan if plan is not None else self.sampling or {})
+        if plan.get('seed') is None:
+            plan['seed'] = self.seed
+        uses_tags = isinstance(plan.get('by'), list) or plan.get('weights')
+        if uses_tags and self.tags_df.empty:
+            self.load_tags()
+        image_ids, applied = sample_image_ids(self.image_ids, plan, self.tags_df if uses_tags else None)
+        self.image_ids = self._budgeted(image_ids)
+        self.filter_metadata.setdefault('sampling', []).append(applied)
 
     def interactive_tag_filter(self):
         """Method is expected to only be called after 'load_image_ids' is called, as it relies on 
@@ -262,11 +382,138 @@ class DefaultDatasetWriter(DatasetWriter):
             if os.path.basename(image_id[0]) in imageset_names:
                 imageset_to_image_ids_dict[os.path.basename(image_id[0])].append(image_id)
 
-        for image_id in self.image_ids:
-            temp = read_json_metadata(image_id[0] / f'meta_{image_id[1]}{self.metadata_format[1]}', image_id[1])
-            self.tags_df = pd.concat((self.tags_df, temp), sort=False)
-        self.tags_df = self.tags_df.fillna(False)
-        self.image_ids = default_filter(self.tags_df, self.filter_metadata)
+        self.load_tags()
+        self.image_ids = self._budgeted(default_filter(self.tags_df, self.filter_metadata, seed=self.seed))
+
+    def load_tags(self):
+        """Method is expected to only be called after 'load_image_ids' is called. Method reads the
+            metadata file of every image_id and populates 'self.tags_df' with the tags of each image.
+
+        Variables Needed:
+            image_ids (list): image_ids whose tags should be loaded
+            metadata_format (tuple): needed to read the metadata files and get the associated tags for each image_id
+        """
+        # collect the rows holding each tag, then build each column once
+        tag_rows = {}
+        for row, image_id in enumerate(self.image_ids):
+            metadata_path = image_id[0] / f'{self.metadata_format[0]}{image_id[1]}{self.metadata_format[1]}'
+            for tag in read_json_tags(metadata_path):
+                tag_rows.setdefault(tag, []).append(row)
+
+        num_rows = len(self.image_ids)
+        # sparse columns store only the True entries, use them if a dense table would not fit
+        sparse = self.memory_budget is not None and not self.memory_budget.allows(num_rows * len(tag_rows))
+        columns = {}
+        for tag, rows in tag_rows.items():
+            column = np.zeros(num_rows, dtype=bool)
+            column[rows] = True
+            columns[tag] = pd.arrays.SparseArray(column, fill_value=False) if sparse else column
+        self.tags_df = pd.DataFrame(columns, index=pd.Index(list(self.image_ids), tupleize_cols=False))
+
+    @cli_spinner_wrapper("Transforming images...")
+    def transform_images(self, image_format=('image_', '.png'), num_workers=None):
+        """Method applies the transforms from the dataset config (resize, crop, re-encode) to the
+            image of every image_id, in a process pool. Outputs are cached in the local cache keyed
+            by source image and transforms, so rebuilding with the same transforms reuses them.
+            Meant to be called from 'construct_all', with plugins using the returned paths in
+            place of the source images.
+
+            If overridden, a dict of image_id keys and image path values is expected to be returned.
+
+        Args:
+            image_format (tuple, optional): prefix-suffix pair of image files, default ('image_', '.png')
+            num_workers (int, optional): number of worker processes, defaults to the CPU count
+
+        Variables Needed:
+            image_ids (list): image_ids whose images are transformed
+            transforms (list): transform steps (provided by 'create' input)
+
+        Returns:
+            dict: image_id keys and paths to transformed images as values, the source image
+                paths if no transforms are configured. Transformed images are shared with other
+                builds through the cache and must be copied rather than modified.
+        """
+        sources = [image_id[0] / f'{image_format[0]}{image_id[1]}{image_format[1]}' for image_id in self.image_ids]
+        if self.transforms:
+            outputs = transform_images(sources, self.transforms, num_workers=num_workers)
+        else:
+            outputs = sources
+        return dict(zip(self.image_ids, outputs))
+
+    @cli_spinner_wrapper("Grouping near duplicates...")
+    def group_near_duplicates(self, image_format=('image_', '.png'), max_distance=None, num_workers=None):
+        """Method groups near-identical images (i.e, consecutive frames of a rendered sequence) by
+            the perceptual hashes of their images, computed in a process pool, so that groups are
+            never split between test and dev. Meant to be called after filtering and before
+            'build_dataset'. Sets 'self.duplicate_groups' and records a summary in
+            'self.filter_metadata["near_duplicates"]'.
+
+            If overridden, method is expected to set 'self.duplicate_groups'.
+
+        Args:
+            image_format (tuple, optional): prefix-suffix pair of image files, default ('image_', '.png')
+            max_distance (int, optional): largest Hamming distance (of 64 bits) between near duplicates,
+                defaults to 'near_duplicate_distance' from the dataset config. Nothing is grouped if neither is set.
+            num_workers (int, optional): number of worker processes, defaults to the CPU count
+
+        Variables Needed:
+            image_ids (list): image_ids whose images are grouped
+        """
+        max_distance = self.near_duplicate_distance if max_distance is None else max_distance
+        if max_distance is None:
+            return
+        image_ids = list(self.image_ids)
+        paths = [image_id[0] / f'{image_format[0]}{image_id[1]}{image_format[1]}' for image_id in image_ids]
+        labels = group_hashes(compute_hashes(paths, num_workers=num_workers), max_distance)
+
+        # the smallest member represents a group, so every host agrees on it
+        members = {}
+        for image_id, label in zip(image_ids, labels):
+            members.setdefault(label, []).append(image_id)
+        self.duplicate_groups = {}
+        for group in members.values():
+            if len(group) > 1:
+                representative = min(group, key=lambda image_id: (image_id[0].name, image_id[1]))
+                self.duplicate_groups.update((image_id, representative) for image_id in group)
+        self.filter_metadata["near_duplicates"] = {
+            "max_distance": max_distance,
+            "groups": sum(1 for group in members.values() if len(group) > 1),
+            "grouped_images": len(self.duplicate_groups)
+        }
+
+    @cli_spinner_wrapper("Loading parent dataset...")
+    def load_parent(self):
+        """Method is expected to be called after 'load_image_ids' and filtering when the dataset config
+            names a "parent" dataset, turning the dataset into a new version of the parent. 'image_ids'
+            becomes the parent's image_ids, leaving out those listed in the "remove_image_ids" config
+            field, followed by the image_ids loaded and filtered so far which are not in the parent.
+            The imagesets of the parent must be among the imagesets in the config.
+
+            Images from the parent keep their split, and 'write_out_test_set' links their files from
+            the parent, in the parent's layout which the version keeps. When uploaded, only files which differ from the parent are stored, and
+            'get_dataset' reconstructs the version from the parent's files.
+
+        Variables Needed:
+            parent (str): name of the parent dataset (provided by 'create' input)
+            remove_image_ids (list): parent image_ids to leave out (provided by 'create' input)
+            image_ids (list): image_ids to add (provided by 'load_image_ids'/filtering)
+        """
+        self.parent_dataset = get_dataset(self.parent)
+        # inherited files are shared with the parent at the same paths
+        self.layout = self.parent_dataset.layout
+        imageset_paths = {Path(path).name: path for path in self.imageset_paths}
+        removed = {tuple(image_id) for image_id in self.remove_image_ids}
+        parent_ids = []
+        for name, image_id in self.parent_dataset.image_ids:
+            if name not in imageset_paths:
+                raise Exception(f'Parent dataset {self.parent} uses imageset {name}, which must be included in "imageset"')
+            parent_ids.append((imageset_paths[name], image_id))
+        parent_set = set(parent_ids)
+        self.removed_image_ids = [image_id for image_id in parent_ids if (image_id[0].name, image_id[1]) in removed]
+        self.added_image_ids = [image_id for image_id in self.image_ids 
+                                if image_id not in parent_set and (image_id[0].name, image_id[1]) not in removed]
+        removed_set = set(self.removed_image_ids)
+        self.image_ids = [image_id for image_id in parent_ids if image_id not in removed_set] + self.added_image_ids
 
     def load_data(self):
         """Method is expected to be called after 'load_image_ids' and filtering methods if filtering is
@@ -297,7 +544,15 @@ class DefaultDatasetWriter(DatasetWriter):
             image_ids (list): a list of image IDs that ended up in the final
                 dataset (either dev or test) (provided by 'create' input)
             filters (dict): a dictionary representing filter metadata (provided by filtering methods)
+            transforms (list): image transform steps (provided by 'create' input)
+            test_image_ids (list): image_ids in the test set (provided by 'write_dataset')
+            parent (str): name of the parent dataset of a version (provided by 'create' input)
+            added_image_ids, removed_image_ids (list): changes of a version to its parent (provided by 'load_parent')
             dataset_path (Path): where metadata will be written (provided by 'create' input)
+            layout (FileLayout): layout of the test set, recorded unless flat (provided by 'create' input)
+
+            Image ids are written to the image index next to metadata.json (see
+            ravenml.data.image_index) rather than listed in it.
         """
         dataset_path = self.dataset_path / self.dataset_name
         metadata_filepath = dataset_path / 'metadata.json'
@@ -308,8 +563,22 @@ class DefaultDatasetWriter(DatasetWriter):
         metadata["created_by"] = self.created_by
         metadata["comments"] = self.comments
         metadata["training_type"] = self.plugin_name
-        metadata["image_ids"] = [(image_id[0].name, image_id[1]) for image_id in self.image_ids]
         metadata["filters"] = self.filter_metadata
+        metadata["transforms"] = self.transforms
+        # image ids and their split are stored in a compact sidecar, see ravenml.data.image_index
+        metadata.update(write_image_index(
+            dataset_path, _named_pairs(self.image_ids), 
+            test_image_ids=_named_pairs(self.test_image_ids) if self.test_image_ids is not None else None,
+            added_image_ids=_named_pairs(self.added_image_ids) if self.parent else None,
+            removed_image_ids=_named_pairs(self.removed_image_ids) if self.parent else None))
+        if self.parent:
+            metadata["parent"] = self.parent
+        if self.shards > 1:
+            metadata["shards"] = self.shards
+        if not self.layout.flat:
+            metadata["layout"] = self.layout.to_metadata()
+        metadata["throughput"] = progress.summary()
+        metrics.event('dataset', dataset=self.dataset_name, image_count=len(self.image_ids), shards=self.shards)
         
         # find ravenml directory
         rml_dir = Path(__file__).resolve().parent
@@ -346,6 +615,9 @@ class DefaultDatasetWriter(DatasetWriter):
             in the 'splits/complete' directory. Note that prior to this method, obj_dict
             should be set to a list of objects that are meant to be written.
 
+            For a version of a parent dataset (see 'load_parent'), images from the parent keep
+            the split they had in the parent, and only added images are split.
+
             If overridden, there are no expectations, but note that the variables 'kfolds'
             and 'test_percent' are provided for use.
         
@@ -360,7 +632,16 @@ class DefaultDatasetWriter(DatasetWriter):
         dataset_path = self.dataset_path / self.dataset_name
         print(dataset_path)
 
-        test_subset, dev_subset = split_data(list(self.obj_dict.items()), test_percent=self.test_percent)
+        # spilled objects are only loaded from disk as they are written
+        if self.parent_dataset is None:
+            items = self.obj_dict.items_view() if isinstance(self.obj_dict, SpillDict) else list(self.obj_dict.items())
+            test_subset, dev_subset = split_data(items, test_percent=self.test_percent, seed=self.seed, groups=self._groups_of(
+                                                    items.keys if isinstance(items, SpillView) else [data[0] for data in items]))
+        else:
+            test_subset, dev_subset = self._split_version(associated_files)
+        self.test_image_ids = list(test_subset.keys) if isinstance(test_subset, SpillView) else [data[0] for data in test_subset]
+        # the train/validation split of the dev set keeps groups together as well
+        self._dev_groups = self._groups_of(dev_subset.keys if isinstance(dev_subset, SpillView) else [data[0] for data in dev_subset])
         
         # Test subset
         test_path = dataset_path / 'test'
@@ -372,13 +653,15 @@ class DefaultDatasetWriter(DatasetWriter):
         # write_out_fold(standard_path, fold, is_standard=True)
 
         complete_path = dev_path / 'complete'
-        self.write_out_complete_set(complete_path, [data[1] for data in dev_subset])
+        dev_objects = dev_subset.values() if isinstance(dev_subset, SpillView) else [data[1] for data in dev_subset]
+        self.write_out_complete_set(complete_path, dev_objects)
 
     def write_out_test_set(self, path, data, associated_files):
         """Method is helper function for writing out dataset. Writes
             out test set by copying over associated files to the
-            specified test path. Assumes objlist has 'image_filepath'
-            and 'image_id' as keys.
+            specified test path, placed with 'layout'. Assumes objlist has 'image_filepath'
+            and 'image_id' as keys. The files of a version's images which are in the
+            test set of its parent are hardlinked from the parent rather than copied.
 
             If overridden, there are no expectations.
 
@@ -388,8 +671,20 @@ class DefaultDatasetWriter(DatasetWriter):
             associated_files (list): decides what files are to be copied for the test set
         """
         os.mkdir(path)
-        test_image_ids = [id[0] for id in data]
-        copy_associated_files(test_image_ids, path, associated_files)
+        test_image_ids = data.keys if isinstance(data, SpillView) else [id[0] for id in data]
+        # checksums taken while copying are checked again when the dataset is uploaded
+        records = {}
+        parent_manifest = read_manifest(self.parent_dataset.path) if self.parent_dataset else None
+        try:
+            algorithm = parent_manifest['algorithm'] if parent_manifest else default_algorithm()
+            new_hasher(algorithm)
+        except ValueError:
+            parent_manifest, algorithm = None, default_algorithm()
+        if parent_manifest:
+            test_image_ids = self._link_parent_files(test_image_ids, path, associated_files, parent_manifest, records)
+        copy_associated_files(test_image_ids, path, associated_files, manifest=records, algorithm=algorithm,
+                                layout=self.layout)
+        update_manifest(path.parent, {f'{path.name}/{name}': record for name, record in records.items()}, algorithm)
 
     def write_out_complete_set(self, path, data):
         """Method is helper function for writing out dataset. Creates a 
@@ -407,7 +702,272 @@ class DefaultDatasetWriter(DatasetWriter):
         if not os.path.exists(data_path):
             os.makedirs(data_path)
 
-        test_data, train_data = split_data(data, test_percent=self.test_percent)
+        groups = self._dev_groups if self._dev_groups is not None and len(self._dev_groups) == len(data) else None
+        test_data, train_data = split_data(data, test_percent=self.test_percent, groups=groups, seed=self.seed)
 
         self.write_out_train_split(train_data, data_path, split_type='train')
         self.write_out_train_split(test_data, data_path, split_type='test')
+
+    def build_dataset(self, associated_files):
+        """Method constructs and writes the dataset, and is expected to be called in place of
+            'construct_all' followed by 'write_dataset'. Without sharding it does exactly that.
+
+            With "shards" set above 1 in the dataset config, image_ids are partitioned
+            deterministically into shards (see 'partition_image_ids') and each shard is
+            constructed and written independently by 'build_shard'. How shards are built
+            depends on the config:
+                - by default, missing shards are built by a pool of "shard_workers" local
+                  processes and then merged into the dataset by 'merge_shards'
+                - with "shard_index" set, only that shard is built and the command exits;
+                  this is meant for hosts sharing a "dataset_path" on a common filesystem
+                - with "shard_workers" set to 0, no shards are built locally; the method
+                  waits for all shards to be built by other hosts and merges them
+            Shards already complete (i.e, from an interrupted build) are not rebuilt. As every
+            host filters image_ids itself, filtering must be deterministic (i.e, tag filters
+            from a config rather than random size filters) for hosts to agree on the shards.
+
+            If overridden, 'obj_dict' is expected to be constructed and the dataset written.
+
+        Args:
+            associated_files (list): decides what files are to be copied for the test set
+
+        Variables Needed:
+            image_ids (list): image_ids to build the dataset from (provided by 'load_image_ids'/filtering)
+            shards (int): number of shards (provided by 'create' input)
+            shard_workers (int): number of local worker processes (provided by 'create' input)
+            shard_index (int): shard to build on this host, if any (provided by 'create' input)
+        """
+        if self.shards <= 1:
+            self.construct_all()
+            self.write_dataset(associated_files)
+            return
+        if self.shard_index is not None:
+            self.build_shard(self.shard_index, associated_files)
+            click.echo(f'Built shard {self.shard_index} of {self.shards}, the dataset is merged by the coordinating host.')
+            ctx = click.get_current_context(silent=True)
+            if ctx is not None:
+                ctx.exit()
+            return
+        shards_path = self.dataset_path / self.dataset_name / SHARDS_DIRNAME
+        missing = [index for index in range(self.shards) if _read_shard_manifest(shards_path, index) is None]
+        if missing and self.shard_workers:
+            cli_spinner(f'Building {len(missing)} of {self.shards} shards...', self._build_shards, missing, associated_files)
+        elif missing:
+            cli_spinner(f'Waiting for {len(missing)} of {self.shards} shards...', _wait_for_shards, shards_path, 
+                        self.shards, self.shard_timeout)
+        cli_spinner('Merging shards...', self.merge_shards)
+
+    def build_shard(self, index, associated_files):
+        """Method constructs and writes a single shard of the dataset into the '_shards'
+            directory of the dataset, by calling 'construct_all' and 'write_dataset' on a copy
+            of this writer holding only the shard's image_ids. Once written, a manifest of
+            the image_ids in the shard is added, marking the shard complete.
+
+            If overridden, the manifest is expected to be written (see '_write_shard_manifest').
+
+        Args:
+            index (int): index of the shard to build
+            associated_files (list): decides what files are to be copied for the test set
+        """
+        _build_shard(self._shard_writer(index), index, associated_files)
+
+    def merge_shards(self):
+        """Method merges complete shards into the dataset. Files are moved to the same path
+            relative to the dataset root as they had in their shard. Files found at the same
+            relative path in more than one shard (i.e, a record file written by
+            'write_out_train_split') are suffixed with their shard number, so
+            'train.record' becomes 'train-00003-of-00008.record'. Checksum manifests of the
+            shards are combined into the dataset manifest. 'image_ids' is set to the image_ids
+            of all shards.
+
+            If overridden, 'image_ids' is expected to be set to the image_ids in the dataset.
+
+        Variables Needed:
+            shards (int): number of shards (provided by 'create' input)
+            dataset_path (Path): where dataset will be written (provided by 'create' input)
+            dataset_name (str): the name of the dataset (provided by 'create' input)
+        """
+        dataset_path = self.dataset_path / self.dataset_name
+        shards_path = dataset_path / SHARDS_DIRNAME
+        manifests = [_read_shard_manifest(shards_path, index) for index in range(self.shards)]
+        if None in manifests:
+            raise Exception(f'Cannot merge shards, shard {manifests.index(None)} is not complete')
+
+        # find relative paths present in more than one shard
+        shard_files = []
+        counts = {}
+        for index in range(self.shards):
+            shard_root = shards_path / _shard_name(index)
+            files = [Path(root, name).relative_to(shard_root) for root, _, names in os.walk(shard_root) 
+                        for name in names]
+            files = [path for path in files if str(path) not in (SHARD_MANIFEST, MANIFEST_FILENAME)]
+            shard_files.append(files)
+            for relative_path in files:
+                counts[relative_path] = counts.get(relative_path, 0) + 1
+
+        for index, files in enumerate(shard_files):
+            shard_root = shards_path / _shard_name(index)
+            moved = {}
+            for relative_path in files:
+                destination = dataset_path / relative_path
+                if counts[relative_path] > 1:
+                    destination = destination.with_name(
+                        f'{destination.stem}-{index:05d}-of-{self.shards:05d}{destination.suffix}')
+                os.makedirs(destination.parent, exist_ok=True)
+                os.replace(shard_root / relative_path, destination)
+                moved[relative_path.as_posix()] = destination.relative_to(dataset_path).as_posix()
+            checksums = read_manifest(shard_root)
+            if checksums:
+                update_manifest(dataset_path, {moved[path]: record for path, record in checksums['files'].items() 
+                                                if path in moved}, checksums['algorithm'])
+
+        # map imageset names in the manifests back to local imageset paths
+        imageset_paths = {path.name: path for path in map(Path, self.imageset_paths)}
+        self.image_ids = [(imageset_paths.get(name, Path(name)), image_id) 
+                            for manifest in manifests for name, image_id in manifest['image_ids']]
+        self.test_image_ids = [(imageset_paths.get(name, Path(name)), image_id) 
+                                for manifest in manifests for name, image_id in manifest.get('test_image_ids', [])]
+        shutil.rmtree(shards_path)
+
+    def _split_version(self, associated_files):
+        # images from the parent keep their split, added images are split as usual
+        parent_test = self._parent_test_ids(associated_files)
+        added = set(self.added_image_ids)
+        keys = list(self.obj_dict)
+        inherited = [key for key in keys if key not in added]
+        test_keys = [key for key in inherited if (key[0].name, key[1]) in parent_test]
+        dev_keys = [key for key in inherited if (key[0].name, key[1]) not in parent_test]
+        new_keys = [key for key in keys if key in added]
+        new_test, new_dev = [], new_keys
+        if len(new_keys) > 1:
+            try:
+                new_test, new_dev = split_data(new_keys, test_percent=self.test_percent, 
+                                                groups=self._groups_of(new_keys), seed=self.seed)
+            except ValueError:
+                # added images are all near duplicates of each other, the test set is kept as is
+                click.echo('WARNING: Added images form one near duplicate group, adding all of them to dev.')
+        return self._obj_subset(test_keys + new_test), self._obj_subset(dev_keys + new_dev)
+
+    def _parent_test_ids(self, associated_files):
+        test_ids = self.parent_dataset.test_image_ids
+        if test_ids is not None:
+            return set(test_ids)
+        # datasets created before test_image_ids was recorded, find images with files in the test set instead
+        names = set(self.parent_dataset.list_files('test'))
+        return {tuple(image_id) for image_id in self.parent_dataset.image_ids 
+                if any(f'{prefix}{image_id[1]}{suffix}' in names for prefix, suffix in associated_files)}
+
+    def _budgeted(self, image_ids):
+        # filtered image_ids are spilled again under a memory budget
+        return SpillList(self.memory_budget, image_ids) if self.memory_budget else image_ids
+
+    def _groups_of(self, keys):
+        # group label of every key for split_data, None if near duplicates were not grouped
+        if not self.duplicate_groups:
+            return None
+        return [self.duplicate_groups.get(key, key) for key in keys]
+
+    def _obj_subset(self, keys):
+        if isinstance(self.obj_dict, SpillDict):
+            return self.obj_dict.items_view(keys)
+        return [(key, self.obj_dict[key]) for key in keys]
+
+    def _link_parent_files(self, image_ids, path, associated_files, parent_manifest, records):
+        # links the parent's copies of the images' files, returning the image_ids which must be copied
+        to_copy = []
+        for image_id in image_ids:
+            names = [self.layout.relative_path(f'{prefix}{image_id[1]}{suffix}') for prefix, suffix in set(associated_files)]
+            inherited = [name for name in names if f'{path.name}/{name}' in parent_manifest['files']]
+            if not inherited:
+                to_copy.append(image_id)
+            for name in inherited:
+                record = parent_manifest['files'][f'{path.name}/{name}']
+                link_or_copy(self.parent_dataset.path / path.name / name, path / name)
+                records[name] = dict(record, prefix=record.get('prefix', self.parent))
+        return to_copy
+
+    def _build_shards(self, indices, associated_files):
+        with ProcessPoolExecutor(max_workers=min(self.shard_workers, len(indices))) as executor:
+            futures = [executor.submit(_build_shard_worker, self._shard_writer(index), index, associated_files) 
+                        for index in indices]
+            for future in futures:
+                future.result()
+
+    def _shard_writer(self, index):
+        # shallow copy holding only the image_ids of the shard, writing into the shards directory
+        writer = copy.copy(self)
+        writer.image_ids = partition_image_ids(self.image_ids, self.shards, groups=self.duplicate_groups)[index]
+        writer.tags_df = pd.DataFrame()
+        writer.obj_dict = {}
+        writer.dataset_path = self.dataset_path / self.dataset_name / SHARDS_DIRNAME
+        writer.dataset_name = _shard_name(index)
+        return writer
+
+
+### HELPERS ###
+def _shard_name(index):
+    return f'shard_{index:05d}'
+
+def _build_shard(writer, index, associated_files):
+    shard_path = writer.dataset_path / writer.dataset_name
+    if os.path.isdir(shard_path):
+        # remove the output of an interrupted attempt
+        shutil.rmtree(shard_path)
+    os.makedirs(shard_path)
+    if writer.memory_budget:
+        writer.obj_dict = SpillDict(writer.memory_budget)
+    writer.construct_all()
+    writer.write_dataset(associated_files)
+    _write_shard_manifest(shard_path, index, writer.shards, writer.image_ids, writer.test_image_ids)
+
+def _build_shard_worker(writer, index, associated_files):
+    # spinners of concurrent worker processes would overwrite each other
+    question.spinners_enabled = False
+    progress.enabled = False
+    _build_shard(writer, index, associated_files)
+
+def _named_pairs(image_ids):
+    # (imageset name, image id) pairs as stored in dataset metadata
+    return [(image_id[0].name, image_id[1]) for image_id in image_ids]
+
+def _write_shard_manifest(shard_path, index, num_shards, image_ids, test_image_ids=None):
+    manifest = {
+        'index': index,
+        'num_shards': num_shards,
+        'image_ids': [(Path(image_id[0]).name, image_id[1]) for image_id in image_ids],
+        'test_image_ids': [(Path(image_id[0]).name, image_id[1]) for image_id in test_image_ids or []],
+        'complete': True
+    }
+    # written under a temporary name and renamed, so a manifest is never seen half written
+    temp_path = shard_path / f'{SHARD_MANIFEST}.part'
+    with open(temp_path, 'w') as outfile:
+        json.dump(manifest, outfile)
+    os.replace(temp_path, shard_path / SHARD_MANIFEST)
+
+def _read_shard_manifest(shards_path, index):
+    try:
+        with open(shards_path / _shard_name(index) / SHARD_MANIFEST, 'r') as infile:
+            manifest = json.load(infile)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('complete') else None
+
+def _wait_for_shards(shards_path, num_shards, timeout=None, poll_interval=5):
+    # the timeout restarts whenever a shard completes, so long builds are not cut short
+    complete = set()
+    last_completed = time.monotonic()
+    with progress.task('Waiting for shards', total=num_shards) as task:
+        while True:
+            completed = {index for index in range(num_shards) 
+                            if index not in complete and _read_shard_manifest(shards_path, index) is not None}
+            if completed:
+                task.advance(len(completed))
+                complete |= completed
+                last_completed = time.monotonic()
+            missing = [index for index in range(num_shards) if index not in complete]
+            if not missing:
+                return
+            if timeout is not None and time.monotonic() - last_completed > timeout:
+                raise Exception(f'Timed out after {timeout}s waiting for shards {missing} of {num_shards}, '
+                                f'check the hosts building them')
+            time.sleep(poll_interval)
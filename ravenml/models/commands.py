@@ -0,0 +1,130 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Command group for finding and retrieving trained models in ravenml.
+"""
+
+import click
+import json
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore
+from ravenml.utils.question import cli_spinner
+from ravenml.utils.model import sync_model_index, query_models, get_model_metadata, pull_model
+
+### OPTIONS ###
+no_sync_opt = click.option(
+    '-n', '--no-sync', 'no_sync', is_flag=True,
+    help='Use the local model index as is, without syncing it with S3 first.'
+)
+
+
+### COMMANDS ###
+@click.group(help='Model registry commands.')
+@click.pass_context
+def models(ctx: click.Context):
+    """Model registry command group.
+
+    Args:
+        ctx (Context): click context object
+    """
+    pass
+
+@models.command(help='Sync the local model index with S3.')
+def sync():
+    """Sync the local model index with S3, downloading only new or changed metadata.
+    """
+    summary = cli_spinner('Syncing model index...', sync_model_index)
+    click.echo(f'{summary["added"]} added, {summary["updated"]} updated, {summary["removed"]} removed.')
+
+@models.command(name='list', help='List trained models, newest first.')
+@click.option('-a', '--architecture', type=str, help='Only models of this architecture.')
+@click.option('-d', '--dataset', type=str, help='Only models trained on this dataset.')
+@click.option('-g', '--git-sha', 'git_sha', type=str, help='Only models trained with this ravenml or plugin git sha (prefix).')
+@click.option('--since', type=str, help='Only models started on or after this date (i.e, 2026-01-31).')
+@click.option('--until', type=str, help='Only models started on or before this date.')
+@click.option('-f', '--filter', 'text', type=str, help='Only models whose metadata contains this text.')
+@click.option('-l', '--limit', type=int, help='Largest number of models to list.')
+@no_sync_opt
+def list_models(architecture: str, dataset: str, git_sha: str, since: str, until: str, text: str, 
+                limit: int, no_sync: bool):
+    """List models in the index matching the given criteria.
+
+    Args:
+        architecture (str): architecture filter, None if not provided by user
+        dataset (str): dataset filter, None if not provided by user
+        git_sha (str): git sha prefix filter, None if not provided by user
+        since (str): earliest start date, None if not provided by user
+        until (str): latest start date, None if not provided by user
+        text (str): metadata text filter, None if not provided by user
+        limit (int): largest number of models to list, None for all
+        no_sync (bool): T/F skip syncing the index
+    """
+    if not no_sync:
+        cli_spinner('Syncing model index...', sync_model_index)
+    rows = query_models(architecture=architecture, dataset=dataset, git_sha=git_sha, since=since, 
+                        until=until, text=text, limit=limit)
+    if not rows:
+        click.echo(Fore.RED + 'No models found.')
+        return
+    click.echo(_format_table(rows, ['uuid', 'architecture', 'dataset', 'date_started_at', 'created_by']))
+
+@models.command(help='See detailed metadata about a model.')
+@click.argument('uuid')
+@no_sync_opt
+def inspect(uuid: str, no_sync: bool):
+    """See detailed metadata about a model.
+
+    Args:
+        uuid (str): UUID of the model to inspect
+        no_sync (bool): T/F skip syncing the index
+    """
+    if not no_sync:
+        cli_spinner('Syncing model index...', sync_model_index)
+    try:
+        metadata = get_model_metadata(uuid)
+    except ValueError:
+        raise click.exceptions.BadParameter(uuid, param=uuid, param_hint='model uuid')
+    click.echo(json.dumps(metadata, indent=2))
+
+@models.command(help='Download models and their extra files into the local cache.')
+@click.argument('uuids', nargs=-1, required=True)
+def pull(uuids: tuple):
+    """Download models, their metadata and extras concurrently.
+
+    Args:
+        uuids (tuple): UUIDs of the models to download
+    """
+    def pull_one(uuid):
+        try:
+            return pull_model(uuid)
+        except ValueError:
+            return None
+
+    def pull_all():
+        with ThreadPoolExecutor(max_workers=min(len(uuids), 4)) as executor:
+            return list(executor.map(pull_one, uuids))
+
+    paths = cli_spinner('Downloading models...', pull_all)
+    missing = [uuid for uuid, path in zip(uuids, paths) if path is None]
+    for uuid, path in zip(uuids, paths):
+        if path is not None:
+            click.echo(f'{uuid}: {path}')
+    if missing:
+        raise click.exceptions.ClickException(f'No such models on S3: {", ".join(missing)}')
+
+
+### HELPERS ###
+def _format_table(rows: list, columns: list) -> str:
+    """Formats rows as a table with aligned columns.
+
+    Args:
+        rows (list): dicts with a value for each column
+        columns (list): names of the columns to show
+
+    Returns:
+        str: table with a header line
+    """
+    cells = [[column.upper() for column in columns]] + [[str(row[column] or '-') for column in columns] for row in rows]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() for line in cells)
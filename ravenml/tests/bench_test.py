@@ -0,0 +1,105 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+pytest-benchmark suite for the dataset pipeline. Mirrors `ravenml bench` on a
+small synthetic imageset, with S3 mocked by moto. Marked "bench", so skipped
+unless selected with -m bench, and when pytest-benchmark is not installed.
+
+Run only the benchmarks with: pytest ravenml/tests/bench_test.py -m bench --benchmark-only
+"""
+
+import pytest
+import os
+import shutil
+import boto3
+import itertools
+from pathlib import Path
+from moto import mock_s3
+from ravenml.bench.synthetic import generate_imageset, synthetic_create_input, ASSOCIATED_FILES, METADATA_FORMAT
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.checksum import MANIFEST_FILENAME
+
+pytest.importorskip('pytest_benchmark')
+pytestmark = pytest.mark.bench
+
+from ravenml.data.write_dataset import DefaultDatasetWriter
+from ravenml.data.helpers import and_filter, or_filter, copy_associated_files, split_data
+from ravenml.utils.aws import upload_directory, download_prefix
+
+### SETUP ###
+mock = mock_s3()
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+NUM_IMAGES = 500
+NUM_TAGS = 20
+BUCKET = 'bench-bucket'
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    generate_imageset(test_cache.path / 'bench_imageset', NUM_IMAGES, NUM_TAGS)
+    boto3.resource('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+def _writer():
+    create = synthetic_create_input([test_cache.path / 'bench_imageset'], test_cache.path / 'datasets')
+    return DefaultDatasetWriter(create)
+
+@pytest.fixture(scope='module')
+def loaded_writer():
+    writer = _writer()
+    writer.load_image_ids(METADATA_FORMAT)
+    writer.load_tags()
+    return writer
+
+
+### TESTS ###
+def test_bench_load_image_ids(benchmark):
+    benchmark(lambda: _writer().load_image_ids(METADATA_FORMAT))
+
+def test_bench_tag_filters(benchmark, loaded_writer):
+    tags = list(loaded_writer.tags_df)
+    benchmark(lambda: (and_filter(loaded_writer.tags_df, tags[:2]), or_filter(loaded_writer.tags_df, tags[:3])))
+
+def test_bench_copy_associated_files(benchmark, loaded_writer):
+    destination = test_cache.path / 'copy'
+    def setup():
+        shutil.rmtree(destination, ignore_errors=True)
+        os.makedirs(destination)
+    benchmark.pedantic(copy_associated_files, args=(loaded_writer.image_ids, destination, ASSOCIATED_FILES),
+                        setup=setup, rounds=3)
+    assert len(os.listdir(destination)) == NUM_IMAGES * len(ASSOCIATED_FILES)
+
+def test_bench_split_data(benchmark, loaded_writer):
+    test, dev = benchmark(split_data, list(loaded_writer.image_ids))
+    assert len(test) + len(dev) == NUM_IMAGES
+
+def test_bench_upload_directory(benchmark):
+    imageset_path = test_cache.path / 'bench_imageset'
+    prefixes = (f'upload_{i}' for i in itertools.count())
+    def setup():
+        # files identical to those under the prefix are skipped, and recorded ones verified
+        # rather than hashed, so each round uploads unrecorded files to a new prefix
+        if (imageset_path / MANIFEST_FILENAME).exists():
+            os.remove(imageset_path / MANIFEST_FILENAME)
+        return (BUCKET, next(prefixes), str(imageset_path)), {}
+    manifest = benchmark.pedantic(upload_directory, setup=setup, rounds=3)
+    assert len(manifest['files']) == len(os.listdir(imageset_path)) - 1
+
+def test_bench_download_prefix(benchmark):
+    upload_directory(BUCKET, 'download', str(test_cache.path / 'bench_imageset'))
+    cache = RMLCache()
+    cache.path = test_cache.path / 'download'
+    def setup():
+        cache.clean()
+        return (BUCKET, 'download', cache), {}
+    benchmark.pedantic(download_prefix, setup=setup, rounds=3)
+    assert set(os.listdir(test_cache.path / 'bench_imageset')) <= set(os.listdir(cache.path / 'download'))
@@ -0,0 +1,153 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests checksum manifests written while copying, uploading and downloading.
+"""
+
+import pytest
+import boto3
+import os
+import json
+from pathlib import Path
+from moto import mock_s3
+import ravenml.utils.checksum as checksum
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.storage import S3Driver
+from ravenml.utils.checksum import (MANIFEST_FILENAME, ChecksumError, read_manifest, hash_file,
+                                    verify_directory, update_manifest, default_algorithm)
+from ravenml.utils.aws import upload_directory, download_prefix, verify_prefix
+from ravenml.data.helpers import copy_associated_files
+
+### SETUP ###
+mock = mock_s3()
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+BUCKET = 'checksum-bucket'
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    source = test_cache.path / 'source'
+    os.makedirs(source / 'nested')
+    for i in range(5):
+        with open(source / f'image_{i}.png', 'wb') as f:
+            f.write(os.urandom(1000 + i))
+    with open(source / 'nested' / 'train.record', 'wb') as f:
+        f.write(os.urandom(5000))
+    boto3.resource('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+
+### TESTS ###
+def test_copy_records_checksums():
+    """Tests that copies record the checksums of the copied files.
+    """
+    destination = test_cache.path / 'copied'
+    os.makedirs(destination)
+    manifest = {}
+    copy_associated_files([(test_cache.path / 'source', str(i)) for i in range(5)], destination,
+                            [('image_', '.png')], manifest=manifest)
+    assert sorted(manifest) == [f'image_{i}.png' for i in range(5)]
+    for name, record in manifest.items():
+        assert record == hash_file(destination / name, default_algorithm())
+
+def test_upload_download_verify():
+    """Tests that uploads publish a manifest, downloads check against it, and
+    verification re-downloads only bad files.
+    """
+    manifest = upload_directory(BUCKET, 'dataset', test_cache.path / 'source')
+    assert sorted(manifest['files']) == [f'image_{i}.png' for i in range(5)] + ['nested/train.record']
+    remote = json.loads(boto3.client('s3', region_name='us-east-1').get_object(
+        Bucket=BUCKET, Key=f'dataset/{MANIFEST_FILENAME}')['Body'].read())
+    assert remote == manifest
+
+    cache = RMLCache()
+    cache.path = test_cache.path / 'download'
+    assert download_prefix(BUCKET, 'dataset', cache)
+    local_path = cache.path / 'dataset'
+    assert verify_directory(local_path) == []
+    assert not download_prefix(BUCKET, 'missing', cache)
+
+    # corrupt one file, delete another
+    with open(local_path / 'image_1.png', 'r+b') as f:
+        f.write(b'corrupted')
+    os.remove(local_path / 'nested' / 'train.record')
+    untouched = os.stat(local_path / 'image_2.png').st_mtime_ns
+    assert sorted(verify_directory(local_path)) == ['image_1.png', 'nested/train.record']
+    summary = verify_prefix(BUCKET, 'dataset', local_path)
+    assert summary['checked'] == 6 and summary['failed'] == []
+    assert sorted(summary['repaired']) == ['image_1.png', 'nested/train.record']
+    assert os.stat(local_path / 'image_2.png').st_mtime_ns == untouched
+    assert verify_directory(local_path) == []
+
+def test_download_without_remote_manifest():
+    """Tests that downloading a prefix without a manifest writes a local one.
+    """
+    client = boto3.client('s3', region_name='us-east-1')
+    client.put_object(Bucket=BUCKET, Key='imageset/meta_0.json', Body=b'{}')
+    cache = RMLCache()
+    cache.path = test_cache.path / 'imagesets'
+    assert download_prefix(BUCKET, 'imageset', cache)
+    assert list(read_manifest(cache.path / 'imageset')['files']) == ['meta_0.json']
+    os.remove(cache.path / 'imageset' / 'meta_0.json')
+    assert verify_prefix(BUCKET, 'imageset', cache.path / 'imageset')['repaired'] == ['meta_0.json']
+
+def test_upload_detects_changed_files():
+    """Tests that uploads fail if files changed after their checksums were recorded.
+    """
+    source = test_cache.path / 'changed'
+    os.makedirs(source)
+    with open(source / 'image_0.png', 'wb') as f:
+        f.write(b'original')
+    update_manifest(source, {'image_0.png': hash_file(source / 'image_0.png', default_algorithm())}, default_algorithm())
+    with open(source / 'image_0.png', 'wb') as f:
+        f.write(b'modified')
+    with pytest.raises(ChecksumError):
+        upload_directory(BUCKET, 'changed', source)
+
+def test_download_with_unavailable_algorithm(monkeypatch):
+    """Tests that a prefix whose manifest uses a hash unavailable here is downloaded with a local manifest.
+    """
+    monkeypatch.setattr(checksum, 'xxhash', None)
+    manifest = upload_directory(BUCKET, 'foreign', test_cache.path / 'source')
+    foreign = {'algorithm': 'xxh3_128', 'files': {path: dict(record, hash='0' * 32) 
+                                                   for path, record in manifest['files'].items()}}
+    boto3.client('s3', region_name='us-east-1').put_object(Bucket=BUCKET, Key=f'foreign/{MANIFEST_FILENAME}', 
+                                                          Body=json.dumps(foreign).encode())
+    cache = RMLCache()
+    cache.path = test_cache.path / 'foreign_download'
+    assert download_prefix(BUCKET, 'foreign', cache)
+    local_manifest = read_manifest(cache.path / 'foreign')
+    assert local_manifest['algorithm'] == default_algorithm()
+    assert sorted(local_manifest['files']) == sorted(manifest['files'])
+    assert verify_directory(cache.path / 'foreign') == []
+
+def test_reupload_transfers_changed_files(monkeypatch):
+    """Tests that re-uploading a directory only uploads files new since the last upload,
+    and that manifests of plugin files below the root are uploaded.
+    """
+    source = test_cache.path / 'reupload'
+    os.makedirs(source / 'model')
+    for i in range(3):
+        with open(source / f'image_{i}.png', 'wb') as f:
+            f.write(os.urandom(100))
+    with open(source / 'model' / MANIFEST_FILENAME, 'w') as f:
+        f.write('{"plugin": true}')
+    manifest = upload_directory(BUCKET, 'reupload', source)
+    assert f'model/{MANIFEST_FILENAME}' in manifest['files']
+
+    put = S3Driver.put
+    keys = []
+    monkeypatch.setattr(S3Driver, 'put', lambda self, bucket, key, fileobj: (keys.append(key), put(self, bucket, key, fileobj)))
+    with open(source / 'image_3.png', 'wb') as f:
+        f.write(os.urandom(100))
+    assert sorted(upload_directory(BUCKET, 'reupload', source)['files']) == sorted(list(manifest['files']) + ['image_3.png'])
+    assert keys == ['reupload/image_3.png', f'reupload/{MANIFEST_FILENAME}']
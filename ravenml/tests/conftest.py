@@ -10,8 +10,25 @@ More info here: https://docs.pytest.org/en/2.7.3/plugins.html?highlight=re
 
 def pytest_configure(config):
     import sys
+    import os
 
     sys._called_from_test = True
+    # moto mis-decodes the chunked uploads with trailing checksums sent by recent
+    # botocore versions for bodies over 1MB, only send checksums where required
+    os.environ.setdefault('AWS_REQUEST_CHECKSUM_CALCULATION', 'when_required')
+    config.addinivalue_line('markers', 'bench: benchmark, only run when selected with -m bench')
+
+
+def pytest_collection_modifyitems(config, items):
+    import pytest
+
+    # benchmarks are slow, and only meaningful when asked for
+    if 'bench' in config.getoption('markexpr', ''):
+        return
+    skip = pytest.mark.skip(reason='benchmark, select with -m bench to run')
+    for item in items:
+        if item.get_closest_marker('bench'):
+            item.add_marker(skip)
 
 
 def pytest_unconfigure(config):
@@ -0,0 +1,43 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Minimal dataset writer shared by the tests building datasets from synthetic imagesets.
+"""
+
+import os
+from pathlib import Path
+from ravenml.data.write_dataset import DefaultDatasetWriter
+from ravenml.bench.synthetic import synthetic_create_input, METADATA_FORMAT
+
+
+class ListWriter(DefaultDatasetWriter):
+    """Writer listing the image ids of each split in a text file.
+    """
+    def construct_all(self):
+        for image_id in self.image_ids:
+            self.obj_dict[image_id] = image_id[1]
+
+    def write_out_train_split(self, objects, path, split_type):
+        with open(path / f'{split_type}.txt', 'w') as f:
+            f.write('\n'.join(objects))
+
+def list_writer(imageset_paths: list, dataset_path: Path, dataset_name: str, **overrides) -> ListWriter:
+    """Creates a ListWriter with the image ids of synthetic imagesets loaded.
+
+    Args:
+        imageset_paths (list): paths to the imagesets to build from
+        dataset_path (Path): directory the dataset is written to
+        dataset_name (str): name of the dataset
+        **overrides: CreateInput attributes to override (i.e, shards, parent)
+
+    Returns:
+        ListWriter: writer ready to be filtered and built
+    """
+    create = synthetic_create_input(imageset_paths, dataset_path, **overrides)
+    create.metadata['dataset_name'] = dataset_name
+    # hosts of a multi-host build share the dataset directory
+    os.makedirs(create.dataset_path / dataset_name, exist_ok=True)
+    writer = ListWriter(create)
+    writer.load_image_ids(METADATA_FORMAT)
+    return writer
@@ -0,0 +1,91 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests near-duplicate grouping and group-aware splits.
+"""
+
+import pytest
+import os
+import numpy as np
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.data.dedup import group_hashes, hamming_distance
+from ravenml.data.helpers import split_data
+from ravenml.data.write_dataset import DefaultDatasetWriter
+from ravenml.bench.synthetic import synthetic_create_input
+
+Image = pytest.importorskip('PIL.Image')
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+
+### TESTS ###
+def test_group_hashes_matches_brute_force():
+    """Tests that multi-index search finds the same groups as comparing all pairs.
+    """
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2**63, size=300, dtype=np.uint64)
+    # plant chains of near duplicates by flipping a few bits
+    for i in range(0, 60, 3):
+        hashes[i + 1] = hashes[i] ^ np.uint64(0b101)
+        hashes[i + 2] = hashes[i + 1] ^ np.uint64(1 << 40)
+    hashes[299] = hashes[0]
+    labels = group_hashes(hashes, 3)
+
+    close = hamming_distance(hashes[:, None], hashes[None, :]) <= 3
+    for i in range(len(hashes)):
+        for j in np.flatnonzero(close[i]):
+            assert labels[i] == labels[j]
+    assert len(np.unique(labels)) == 300 - 41
+    assert (group_hashes(hashes[::-1], 3)[::-1] == labels).all()
+
+def test_split_keeps_groups_together():
+    """Tests that split_data never splits a group.
+    """
+    objects = list(range(100))
+    groups = [i // 5 for i in range(100)]
+    test, dev = split_data(objects, test_percent=.2, groups=groups)
+    assert len(test) == 20 and sorted(test + dev) == list(range(100))
+    assert not {i // 5 for i in test} & {i // 5 for i in dev}
+    # seeded splits are reproducible
+    assert split_data(list(range(100)), .2, groups=groups, seed=3) == split_data(list(range(100)), .2, groups=groups, seed=3)
+    # a single group cannot be split without leaking
+    with pytest.raises(ValueError):
+        split_data(list(range(10)), .2, groups=['g'] * 10)
+
+def test_writer_groups_near_duplicate_frames():
+    """Tests that near-identical frames are grouped and stay on one side of the split.
+    """
+    imageset = test_cache.path / 'frames'
+    os.makedirs(imageset)
+    rng = np.random.default_rng(1)
+    for sequence in range(10):
+        frame = rng.integers(0, 256, size=(64, 64), dtype=np.uint8)
+        for i in range(4):
+            noisy = np.clip(frame.astype(int) + rng.integers(-2, 3, size=frame.shape), 0, 255).astype(np.uint8)
+            Image.fromarray(noisy).save(imageset / f'image_{sequence}_{i}.png')
+
+    writer = DefaultDatasetWriter(synthetic_create_input([imageset], test_cache.path / 'build', near_duplicate_distance=6))
+    writer.image_ids = [(imageset, f'{sequence}_{i}') for sequence in range(10) for i in range(4)]
+    writer.group_near_duplicates(num_workers=2)
+    assert writer.filter_metadata['near_duplicates']['groups'] == 10
+    assert writer.duplicate_groups[(imageset, '3_2')] == (imageset, '3_0')
+
+    items = [(image_id, None) for image_id in writer.image_ids]
+    test, dev = split_data(items, test_percent=.25, groups=writer._groups_of([item[0] for item in items]))
+    sequences = lambda subset: {item[0][1].split('_')[0] for item in subset}
+    assert len(test) in (8, 12) and not sequences(test) & sequences(dev)
@@ -0,0 +1,97 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests comparing the images of two datasets.
+"""
+
+import os
+import json
+import boto3
+from pathlib import Path
+from moto import mock_s3
+from shutil import copyfile
+from click.testing import CliRunner
+from ravenml.data.commands import data as data_cmd_group
+from ravenml.data.diff import diff_datasets
+from ravenml.data.image_index import write_image_index, IMAGE_INDEX_FILENAME
+from ravenml.data.interfaces import Dataset
+from ravenml.utils.config import get_config, config_cache
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.dataset import dataset_cache
+
+### SETUP ###
+mock = mock_s3()
+runner = CliRunner()
+test_dir = Path(os.path.dirname(__file__))
+test_data_dir = test_dir / Path('data')
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    dataset_cache.path = test_cache.path / Path('datasets')
+    config_cache.path = test_cache.path
+    copyfile(test_data_dir / Path('config.yml'), test_cache.path / Path('config.yml'))
+    S3 = boto3.resource('s3', region_name='us-east-1')
+    S3.create_bucket(Bucket=get_config()['dataset_bucket_name'])
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+
+### TESTS ###
+def test_diff_datasets():
+    """Tests counting shared images, imageset changes and leakage between splits.
+    """
+    old = [('set_a', str(i)) for i in range(100)]
+    new = old[50:] + [('set_b', str(i)) for i in range(30)]
+    first = _dataset('first', old, test_image_ids=old[:20] + old[90:])
+    second = _dataset('second', new, test_image_ids=new[-10:])
+    result = diff_datasets(first, second)
+    assert result['images'] == {'first': 100, 'second': 80, 'shared': 50, 'only_first': 50, 'only_second': 30}
+    assert result['imagesets'] == {'added': ['set_b'], 'removed': [], 'shared': ['set_a']}
+    assert result['shared_test'] == 0
+    assert result['first_test_in_second_dev'] == old[90:]
+    assert result['second_test_in_first_dev'] == []
+
+    # datasets listing image ids in their metadata compare with those using the sidecar
+    legacy = Dataset('legacy', {'image_ids': [list(pair) for pair in old]}, test_cache.path / 'missing')
+    result = diff_datasets(legacy, second)
+    assert result['images']['shared'] == 50
+    assert result['shared_test'] is None and result['first_test_in_second_dev'] is None
+
+def test_diff_command():
+    """Tests the diff subcommand, downloading only the metadata and image index of each dataset.
+    """
+    bucket = boto3.resource('s3', region_name='us-east-1').Bucket(get_config()['dataset_bucket_name'])
+    pairs = [('set_a', str(i)) for i in range(10)]
+    for name, image_ids, test_image_ids in (('diff_1', pairs, pairs[:2]), ('diff_2', pairs[2:], pairs[-2:])):
+        dataset = _dataset(name, image_ids, test_image_ids)
+        bucket.put_object(Key=f'{name}/metadata.json', Body=json.dumps(dataset.metadata))
+        bucket.put_object(Key=f'{name}/{IMAGE_INDEX_FILENAME}', Body=open(dataset.path / IMAGE_INDEX_FILENAME, 'rb'))
+        bucket.put_object(Key=f'{name}/dev/image_0.png', Body=b'image')
+
+    result = runner.invoke(data_cmd_group, ['diff', 'diff_1', 'diff_2', '--show-leaks'])
+    assert result.exit_code == 0, result.output
+    assert '8 shared, 2 only in diff_1, 0 only in diff_2' in result.output
+    assert '0 test images of diff_1 in the dev set of diff_2' in result.output
+    assert '2 test images of diff_2 in the dev set of diff_1\n  set_a/8\n  set_a/9' in result.output
+    assert not (dataset_cache.path / 'diff_1' / 'dev').exists()
+
+    result = runner.invoke(data_cmd_group, ['diff', 'diff_1', 'missing'])
+    assert result.exit_code == 2
+
+
+### HELPERS ###
+def _dataset(name: str, image_ids: list, test_image_ids: list) -> Dataset:
+    path = test_cache.path / 'local' / name
+    os.makedirs(path, exist_ok=True)
+    metadata = dict(name=name, **write_image_index(path, image_ids, test_image_ids=test_image_ids))
+    return Dataset(name, metadata, path)
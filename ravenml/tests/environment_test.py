@@ -0,0 +1,98 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests compute environment detection and shutdown policies against a fake EC2
+instance metadata service.
+"""
+
+import pytest
+import boto3
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from moto import mock_ec2
+import ravenml.utils.environment as environment
+from ravenml.utils.environment import detect_environment, apply_shutdown_policy, IMDS_ENDPOINT_VARIABLE
+
+### SETUP ###
+mock = mock_ec2()
+server = None
+TOKEN = 'fake-token'
+instance_id = None
+
+class FakeMetadataHandler(BaseHTTPRequestHandler):
+    """ Instance metadata service which only answers IMDSv2 requests.
+    """
+    def do_PUT(self):
+        if self.path == '/latest/api/token' and self.headers.get('X-aws-ec2-metadata-token-ttl-seconds'):
+            self._reply(200, TOKEN)
+        else:
+            self._reply(400, '')
+
+    def do_GET(self):
+        values = {'/latest/meta-data/instance-id': instance_id, '/latest/meta-data/placement/region': 'us-east-1'}
+        if self.headers.get('X-aws-ec2-metadata-token') != TOKEN:
+            self._reply(401, '')
+        elif self.path in values:
+            self._reply(200, values[self.path])
+        else:
+            self._reply(404, '')
+
+    def _reply(self, code, body):
+        self.send_response(code)
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    global server, instance_id
+    mock.start()
+    ec2 = boto3.client('ec2', region_name='us-east-1')
+    instance_id = ec2.run_instances(ImageId='ami-12c6146b', MinCount=1, MaxCount=1)['Instances'][0]['InstanceId']
+    server = HTTPServer(('127.0.0.1', 0), FakeMetadataHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    server.shutdown()
+    mock.stop()
+
+@pytest.fixture(autouse=True)
+def fresh_detection(monkeypatch):
+    monkeypatch.setattr(environment, '_detection', None)
+
+
+### TESTS ###
+def test_detects_ec2_and_stops(monkeypatch):
+    """Tests detection through IMDSv2 and applying the stop policy to the instance.
+    """
+    monkeypatch.setenv(IMDS_ENDPOINT_VARIABLE, f'http://127.0.0.1:{server.server_port}')
+    detected = detect_environment()
+    assert detected.provider.name == 'ec2'
+    assert (detected.instance_id, detected.region) == (instance_id, 'us-east-1')
+    # cached for the process
+    assert detect_environment() is detected
+
+    assert 'keep running' in apply_shutdown_policy('keep')
+    assert 'Applied policy "stop"' in apply_shutdown_policy(None)
+    state = boto3.client('ec2', region_name='us-east-1').describe_instances(InstanceIds=[instance_id])
+    assert state['Reservations'][0]['Instances'][0]['State']['Name'] in ('stopping', 'stopped')
+    with pytest.raises(ValueError):
+        apply_shutdown_policy('hibernate')
+
+def test_local_without_network(monkeypatch, tmp_path):
+    """Tests that DMI identifiers of a non-cloud machine rule out EC2 without any request.
+    """
+    monkeypatch.delenv(IMDS_ENDPOINT_VARIABLE, raising=False)
+    (tmp_path / 'sys_vendor').write_text('LENOVO\n')
+    monkeypatch.setattr(environment, 'DMI_PATH', str(tmp_path))
+    def no_requests(*args, **kwargs):
+        raise AssertionError('metadata service was contacted')
+    monkeypatch.setattr(environment, 'urlopen', no_requests)
+    assert detect_environment().provider is None
+    assert 'No cloud runtime' in apply_shutdown_policy('terminate')
@@ -0,0 +1,77 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests the parallel map utility.
+"""
+
+import pytest
+import time
+import threading
+from ravenml.utils.executor import parallel_map, parallel_imap, ParallelMapError, CHUNKS_IN_FLIGHT
+
+### SETUP ###
+def _square(x):
+    return x * x
+
+def _fail_on_odd(x):
+    if x % 2:
+        raise ValueError(x)
+    return x
+
+
+### TESTS ###
+def test_ordered_and_unordered():
+    """Tests results are in input order by default, and complete with either backend.
+    """
+    def slow_first(x):
+        time.sleep(.2 if x == 0 else 0)
+        return x
+    assert parallel_map(slow_first, range(20), num_workers=4) == list(range(20))
+    unordered = parallel_map(slow_first, range(20), num_workers=4, ordered=False)
+    assert sorted(unordered) == list(range(20)) and unordered[-1] == 0
+    assert parallel_map(_square, range(100), backend='process', num_workers=2, chunk_size=7) == \
+        [x * x for x in range(100)]
+
+def test_errors_aggregated_and_progress():
+    """Tests that every item is attempted, failures are raised together and progress reported.
+    """
+    updates = []
+    with pytest.raises(ParallelMapError) as e:
+        parallel_map(_fail_on_odd, range(10), chunk_size=3, ordered=False,
+                        progress=lambda done, total: updates.append((done, total)))
+    assert [item for item, _ in e.value.errors] == [1, 3, 5, 7, 9]
+    assert all(isinstance(error, ValueError) for _, error in e.value.errors)
+    assert updates[-1] == (10, 10)
+    with pytest.raises(ValueError):
+        parallel_map(_square, [1], backend='gpu')
+
+def test_stopping_cancels_pending():
+    """Tests that stopping iteration early cancels chunks which have not started.
+    """
+    started = []
+    lock = threading.Lock()
+    def record(x):
+        with lock:
+            started.append(x)
+        time.sleep(.01)
+        return x
+    results = parallel_imap(record, range(1000), num_workers=2)
+    assert next(results) == 0
+    results.close()
+    assert len(started) < 20
+
+def test_slow_chunk_bounds_buffered_results():
+    """Tests that ordered maps stop submitting chunks while an early chunk holds back results.
+    """
+    mapped = []
+    mapped_before_first = []
+    def slow_first(x):
+        if x == 0:
+            time.sleep(.3)
+            mapped_before_first.append(len(mapped))
+        mapped.append(x)
+        return x
+    assert parallel_map(slow_first, range(1000), num_workers=2) == list(range(1000))
+    # only the other chunks in flight with the first are mapped while it runs
+    assert mapped_before_first[0] < CHUNKS_IN_FLIGHT * 2
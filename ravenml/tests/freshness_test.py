@@ -0,0 +1,90 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests confirming cached datasets with their manifest ETag, and offline mode.
+"""
+
+import pytest
+import boto3
+import os
+import json
+from pathlib import Path
+from moto import mock_s3
+from shutil import copyfile
+from botocore.exceptions import EndpointConnectionError
+import ravenml.utils.dataset as dataset_utils
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.config import get_config, config_cache
+from ravenml.utils.dataset import dataset_cache, get_dataset, COMPLETE_FILENAME
+from ravenml.utils.aws import upload_directory
+
+### SETUP ###
+mock = mock_s3()
+test_dir = Path(os.path.dirname(__file__))
+test_data_dir = test_dir / Path('data')
+test_cache = RMLCache()
+bucket = None
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    global bucket
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    config_cache.path = test_cache.path
+    dataset_cache.path = test_cache.path / Path('datasets')
+    copyfile(test_data_dir / Path('config.yml'), test_cache.path / Path('config.yml'))
+    bucket = get_config()['dataset_bucket_name']
+    boto3.resource('s3', region_name='us-east-1').create_bucket(Bucket=bucket)
+    source = test_cache.path / 'source'
+    os.makedirs(source / 'test')
+    with open(source / 'metadata.json', 'w') as f:
+        json.dump({'name': 'fresh'}, f)
+    with open(source / 'test' / 'image_0.png', 'wb') as f:
+        f.write(os.urandom(1000))
+    upload_directory(bucket, 'fresh', source)
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+def _no_listing(*args, **kwargs):
+    raise AssertionError('dataset was listed')
+
+def _unreachable(*args, **kwargs):
+    raise EndpointConnectionError(endpoint_url='https://s3.amazonaws.com')
+
+
+### TESTS ###
+def test_unchanged_dataset_is_not_listed(monkeypatch):
+    """Tests that a complete, unchanged local copy is confirmed without syncing it, and
+    that a changed manifest triggers a sync.
+    """
+    dataset = get_dataset('fresh')
+    assert (dataset.path / COMPLETE_FILENAME).exists()
+    with monkeypatch.context() as m:
+        m.setattr(dataset_utils, 'download_prefix', _no_listing)
+        assert (get_dataset('fresh').path / 'test' / 'image_0.png').exists()
+
+    source = test_cache.path / 'source'
+    with open(source / 'test' / 'image_1.png', 'wb') as f:
+        f.write(os.urandom(1000))
+    upload_directory(bucket, 'fresh', source)
+    assert (get_dataset('fresh').path / 'test' / 'image_1.png').exists()
+
+def test_offline_mode(monkeypatch):
+    """Tests that offline mode uses complete local copies without contacting S3.
+    """
+    get_dataset('fresh')
+    monkeypatch.setattr(dataset_utils, 'get_object_etag', _unreachable)
+    monkeypatch.setattr(dataset_utils, 'download_prefix', _no_listing)
+    assert get_dataset('fresh', offline=True).metadata == {'name': 'fresh'}
+    # an unreachable S3 also falls back to the complete local copy
+    assert get_dataset('fresh').metadata == {'name': 'fresh'}
+    os.remove(dataset_cache.path / 'fresh' / COMPLETE_FILENAME)
+    with pytest.raises(ValueError):
+        get_dataset('fresh', offline=True)
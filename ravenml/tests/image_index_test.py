@@ -0,0 +1,59 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests storing dataset image ids in the image index sidecar.
+"""
+
+import os
+import json
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.data.interfaces import Dataset
+from ravenml.data.image_index import write_image_index, load_image_index, IMAGE_INDEX_FILENAME
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+
+### TESTS ###
+def test_round_trip():
+    """Tests that image ids, their split and version changes are written compactly and read back.
+    """
+    image_ids = [(f'set_{i % 3}', f'{i}') for i in range(3000)]
+    test_ids = image_ids[::5]
+    fields = write_image_index(test_cache.path, image_ids, test_image_ids=test_ids, added_image_ids=image_ids[-10:],
+                                removed_image_ids=[('set_0', 'gone')])
+    assert fields == {'image_index': IMAGE_INDEX_FILENAME, 'image_count': 3000, 'test_image_count': 600,
+                        'added_image_count': 10, 'removed_image_count': 1}
+    assert os.path.getsize(test_cache.path / IMAGE_INDEX_FILENAME) < len(json.dumps(image_ids)) / 4
+
+    dataset = Dataset('indexed', fields, test_cache.path)
+    assert dataset.image_ids == image_ids
+    assert dataset.test_image_ids == test_ids
+    assert dataset.image_index()['added_image_ids'] == image_ids[-10:]
+    assert dataset.image_index()['removed_image_ids'] == [('set_0', 'gone')]
+
+    write_image_index(test_cache.path, image_ids[:5])
+    assert load_image_index(fields, test_cache.path)['test_image_ids'] is None
+
+def test_legacy_metadata():
+    """Tests that datasets listing image ids in their metadata are still read.
+    """
+    metadata = {'image_ids': [['set_0', '1'], ['set_1', '2']], 'test_image_ids': [['set_1', '2']]}
+    dataset = Dataset('legacy', metadata, test_cache.path / 'missing')
+    assert dataset.image_ids == [('set_0', '1'), ('set_1', '2')]
+    assert dataset.test_image_ids == [('set_1', '2')]
+    assert dataset.image_index()['added_image_ids'] is None
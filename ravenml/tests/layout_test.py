@@ -0,0 +1,76 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests hash-sharded directory layouts of dataset files.
+"""
+
+import os
+import json
+import pytest
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.checksum import read_manifest, verify_directory
+from ravenml.data.layout import FileLayout, FLAT
+from ravenml.data.interfaces import Dataset
+from ravenml.bench.synthetic import generate_imageset, ASSOCIATED_FILES
+from dataset_writers import list_writer
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    generate_imageset(test_cache.path / 'layout_imageset', 40, 5)
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+
+### TESTS ###
+def test_layout_paths():
+    """Tests placing files in hash-prefixed subdirectories.
+    """
+    layout = FileLayout(levels=2, width=1)
+    relative_path = layout.relative_path('image_1.png')
+    parts = relative_path.split('/')
+    assert len(parts) == 3 and all(len(part) == 1 for part in parts[:2]) and parts[2] == 'image_1.png'
+    # placement only depends on the filename
+    assert FileLayout(2, 1).path(Path('/data'), 'image_1.png') == Path('/data') / relative_path
+    assert FLAT.relative_path('image_1.png') == 'image_1.png'
+
+    assert FileLayout.from_metadata({'layout': layout.to_metadata()}) == layout
+    assert FileLayout.from_metadata({}) == FLAT
+    with pytest.raises(ValueError):
+        FileLayout(levels=-1)
+    with pytest.raises(ValueError):
+        FileLayout(levels=9, width=2)
+
+def test_sharded_build_with_layout():
+    """Tests that a dataset built in shards keeps its layout, and is resolved through Dataset.
+    """
+    layout = FileLayout(levels=1, width=1)
+    writer = list_writer([test_cache.path / 'layout_imageset'], test_cache.path / 'datasets', 'laid_out',
+                            shards=2, shard_workers=2, layout=layout)
+    writer.build_dataset(ASSOCIATED_FILES)
+    writer.write_metadata()
+
+    dataset_path = test_cache.path / 'datasets' / 'laid_out'
+    with open(dataset_path / 'metadata.json') as f:
+        dataset = Dataset('laid_out', json.load(f), dataset_path)
+    assert dataset.layout == layout
+    # no test files are placed flat
+    assert all((dataset_path / 'test' / name).is_dir() for name in os.listdir(dataset_path / 'test'))
+    names = sorted(dataset.list_files())
+    assert names == sorted(f'{prefix}{image_id[1]}{suffix}' for image_id in writer.test_image_ids
+                            for prefix, suffix in ASSOCIATED_FILES)
+    assert all(dataset.file_path(name).is_file() for name in names)
+    manifest = read_manifest(dataset_path)
+    assert {f'test/{layout.relative_path(name)}' for name in names} <= set(manifest['files'])
+    assert verify_directory(dataset_path) == []
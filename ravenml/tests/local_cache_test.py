@@ -10,10 +10,12 @@ NOTE: If this test fails, it may cause cascades of failures in other tests.
 import pytest
 import os
 import re
+import time
+import multiprocessing
 from pathlib import Path
 from click.testing import CliRunner
 from ravenml.cli import cli
-from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.local_cache import RMLCache, partial_path
 
 ### SETUP ###
 runner = CliRunner()
@@ -42,3 +44,32 @@ def test_no_leaky_cache_creation():
     result = runner.invoke(cli)
     assert result.exit_code == 0
     assert not os.path.exists(test_cache.path)
+
+def test_single_flight():
+    """Tests that concurrent processes filling the same entry fill it once, and the
+    others reuse it.
+    """
+    test_cache.ensure_exists()
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=_fill_entry, args=(results,)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(10)
+    assert sorted(results.get(timeout=1) for _ in processes) == [False, False, True]
+    assert (test_cache.path / 'entry' / 'file').read_text() == 'filled'
+
+
+### HELPERS ###
+def _fill_entry(results):
+    entry = test_cache.path / 'entry' / 'file'
+
+    def fill():
+        time.sleep(.2)
+        os.makedirs(entry.parent, exist_ok=True)
+        temp_path = partial_path(entry)
+        temp_path.write_text('filled')
+        os.replace(temp_path, entry)
+
+    results.put(test_cache.single_flight('entry', entry.exists, fill))
@@ -0,0 +1,120 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests memory accounting and the memory-budgeted containers.
+"""
+
+import pytest
+import os
+import pandas as pd
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.memory import MemoryBudget, SpillList, SpillDict, SpillView, parse_size, current_rss
+from ravenml.data.helpers import split_data
+from ravenml.data.write_dataset import DefaultDatasetWriter
+from ravenml.bench.synthetic import generate_imageset, synthetic_create_input, METADATA_FORMAT
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+def _exhausted_budget():
+    # a zero byte budget is always exceeded, forcing containers to spill
+    return MemoryBudget(0, spill_dir=test_cache.path / 'spill')
+
+
+### TESTS ###
+def test_parse_size():
+    """Tests parsing of human readable sizes.
+    """
+    assert parse_size('512') == 512
+    assert parse_size('2KB') == 2048
+    assert parse_size('1.5 G') == int(1.5 * 2**30)
+    assert parse_size(None) is None
+    with pytest.raises(ValueError):
+        parse_size('lots')
+
+def test_budget_exceeded():
+    """Tests budget checks against the current RSS.
+    """
+    assert current_rss() > 0
+    assert _exhausted_budget().exceeded()
+    assert not MemoryBudget('1TB').exceeded()
+
+def test_spill_list():
+    """Tests that a spilled list keeps its contents and order.
+    """
+    items = SpillList(_exhausted_budget(), range(25), chunk_size=10)
+    assert items.spilled
+    assert len(items) == 25
+    assert list(items) == list(range(25))
+    assert items[3] == 3 and items[17] == 17 and items[-1] == 24
+    assert items[8:12] == [8, 9, 10, 11]
+
+def test_spill_list_within_budget():
+    """Tests that a list within budget stays in memory.
+    """
+    items = SpillList(MemoryBudget('1TB'), range(25), chunk_size=10)
+    assert not items.spilled
+    assert list(items) == list(range(25))
+
+def test_spill_dict():
+    """Tests that a spilled dict keeps its contents and insertion order.
+    """
+    objects = SpillDict(_exhausted_budget(), check_every=5)
+    for i in range(12):
+        objects[(Path('/imageset'), str(i))] = {'index': i}
+    assert objects.spilled
+    assert len(objects) == 12
+    assert objects[(Path('/imageset'), '7')] == {'index': 7}
+    objects[(Path('/imageset'), '7')] = {'index': 70}
+    assert objects[(Path('/imageset'), '7')] == {'index': 70}
+    del objects[(Path('/imageset'), '0')]
+    assert [key[1] for key in objects] == [str(i) for i in range(1, 12)]
+
+def test_spill_dict_equal_keys():
+    """Tests that spilled values are found by keys equal to, but built apart from, their own.
+    """
+    objects = SpillDict(_exhausted_budget(), check_every=1)
+    image_id = '0_7'
+    # the same string object twice pickles differently from two equal strings
+    objects[(Path('/imageset') / image_id, image_id)] = 'value'
+    key = (Path('/imageset') / '0_7', ''.join(['0_', '7']))
+    assert objects.spilled
+    assert objects[key] == 'value'
+    del objects[key]
+    assert len(objects) == 0
+
+def test_split_spill_view():
+    """Tests that split_data splits a SpillView without losing objects.
+    """
+    objects = SpillDict(_exhausted_budget(), check_every=1)
+    for i in range(10):
+        objects[i] = i * 10
+    test, dev = split_data(objects.items_view(), test_percent=.2)
+    assert isinstance(test, SpillView) and isinstance(dev, SpillView)
+    assert len(test) == 2 and len(dev) == 8
+    assert sorted(list(dev.values()) + [value for _, value in test]) == [i * 10 for i in range(10)]
+
+def test_load_tags_sparse_over_budget():
+    """Tests that the tag table is built with sparse columns when a dense one does not fit.
+    """
+    imageset = generate_imageset(test_cache.path / 'imageset', 50, 5)
+    writer = DefaultDatasetWriter(synthetic_create_input([imageset], test_cache.path, memory_budget=_exhausted_budget()))
+    writer.load_image_ids(METADATA_FORMAT)
+    writer.load_tags()
+    assert len(writer.tags_df) == 50
+    assert all(isinstance(dtype, pd.SparseDtype) for dtype in writer.tags_df.dtypes)
+    assert sum(writer.tags_df[tag].to_numpy().sum() for tag in writer.tags_df) == 50 * 3
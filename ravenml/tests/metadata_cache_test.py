@@ -0,0 +1,92 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests conditional revalidation of cached imageset/dataset metadata.
+"""
+
+import pytest
+import boto3
+import os
+import json
+from pathlib import Path
+from moto import mock_s3
+from shutil import copyfile
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.config import get_config, config_cache
+from ravenml.utils.dataset import dataset_cache, get_dataset_metadata, refresh_dataset_metadata
+from ravenml.utils.aws import download_object_if_modified, read_validator
+
+### SETUP ###
+mock = mock_s3()
+test_dir = Path(os.path.dirname(__file__))
+test_data_dir = test_dir / Path('data')
+test_cache = RMLCache()
+bucket = None
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    global bucket
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    config_cache.path = test_cache.path
+    dataset_cache.path = test_cache.path / Path('datasets')
+    copyfile(test_data_dir / Path('config.yml'), test_cache.path / Path('config.yml'))
+
+    config = get_config()
+    S3 = boto3.resource('s3', region_name='us-east-1')
+    S3.create_bucket(Bucket=config['dataset_bucket_name'])
+    bucket = S3.Bucket(config['dataset_bucket_name'])
+    bucket.put_object(Key='test_dataset_1/metadata.json', Body=open(test_data_dir / Path('test_metadata_1.json'), 'rb'))
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+
+### TESTS ###
+def test_download_records_validator():
+    """Tests that a first download stores the object's ETag next to the local copy.
+    """
+    local_path = test_cache.path / 'object.json'
+    assert download_object_if_modified(bucket.name, 'test_dataset_1/metadata.json', local_path)
+    validator = read_validator(local_path)
+    assert validator['key'] == 'test_dataset_1/metadata.json'
+    assert validator['etag'] == bucket.Object('test_dataset_1/metadata.json').e_tag
+
+def test_unchanged_object_is_not_downloaded():
+    """Tests that revalidating an unchanged object does not download it again.
+    """
+    local_path = test_cache.path / 'unchanged.json'
+    download_object_if_modified(bucket.name, 'test_dataset_1/metadata.json', local_path)
+    assert not download_object_if_modified(bucket.name, 'test_dataset_1/metadata.json', local_path, ttl=0)
+
+def test_ttl_controls_revalidation():
+    """Tests that a changed object is only picked up once the TTL has expired.
+    """
+    key = 'ttl_test/metadata.json'
+    local_path = test_cache.path / 'ttl.json'
+    bucket.put_object(Key=key, Body=json.dumps({'version': 1}))
+    download_object_if_modified(bucket.name, key, local_path)
+    bucket.put_object(Key=key, Body=json.dumps({'version': 2}))
+    assert not download_object_if_modified(bucket.name, key, local_path, ttl=3600)
+    assert json.load(open(local_path))['version'] == 1
+    assert download_object_if_modified(bucket.name, key, local_path, ttl=0)
+    assert json.load(open(local_path))['version'] == 2
+
+def test_get_dataset_metadata_uses_cache():
+    """Tests that dataset metadata is served from the cache within the configured TTL.
+    """
+    assert get_dataset_metadata('test_dataset_1')['name'] == 'test_dataset_1'
+    assert read_validator(dataset_cache.path / 'test_dataset_1' / 'metadata.json')
+
+def test_refresh_dataset_metadata_reports_errors():
+    """Tests that batched revalidation reports invalid dataset names without raising.
+    """
+    errors = refresh_dataset_metadata(['test_dataset_1', 'bad_dataset_name'])
+    assert errors['test_dataset_1'] is None
+    assert isinstance(errors['bad_dataset_name'], ValueError)
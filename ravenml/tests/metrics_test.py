@@ -0,0 +1,70 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests exporting run metrics.
+"""
+
+import boto3
+import os
+import json
+from pathlib import Path
+from moto import mock_s3
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.progress import progress
+from ravenml.utils.question import cli_spinner
+from ravenml.utils.aws import s3_client
+from ravenml.utils.metrics import metrics, start_metrics, record_cache, METRICS_DIR_VARIABLE, JSONL_FILENAME
+
+### SETUP ###
+mock = mock_s3()
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    # stop collecting so nothing is written at exit
+    metrics.enabled = False
+    progress.listeners.remove(metrics._record_task)
+    test_cache.clean()
+    mock.stop()
+
+
+### TESTS ###
+def test_metrics_export(monkeypatch):
+    """Tests that stages, S3 requests and cache lookups are exported as JSON lines and a Prometheus textfile.
+    """
+    metrics_dir = test_cache.path / 'metrics'
+    monkeypatch.setenv(METRICS_DIR_VARIABLE, str(metrics_dir))
+    start_metrics('data')
+    assert metrics.enabled
+
+    cli_spinner('Copying...', lambda: progress.advance(4, nbytes=400))
+    boto3.resource('s3', region_name='us-east-1').create_bucket(Bucket='metrics-bucket')
+    s3_client().list_objects_v2(Bucket='metrics-bucket')
+    record_cache('s3_files', hit=True, count=3)
+    record_cache('s3_files', hit=False)
+    metrics.flush()
+
+    with open(metrics_dir / JSONL_FILENAME, 'r') as f:
+        events = [json.loads(line) for line in f]
+    stage = next(event for event in events if event['event'] == 'stage')
+    assert (stage['stage'], stage['items'], stage['bytes'], stage['command']) == ('Copying', 4, 400, 'data')
+    run = events[-1]
+    assert run['event'] == 'run'
+    assert run['metrics']['cache_hit_ratio{cache="s3_files"}'] == .75
+    assert run['metrics']['s3_requests_total{operation="ListObjectsV2"}'] == 1
+
+    textfile = (metrics_dir / 'ravenml_data.prom').read_text()
+    assert '# TYPE ravenml_stage_items_total counter' in textfile
+    assert f'ravenml_stage_items_total{{command="data",run_id="{metrics.labels["run_id"]}",stage="Copying"}} 4' \
+        in textfile
+    assert 'ravenml_cache_hit_ratio{cache="s3_files",' in textfile
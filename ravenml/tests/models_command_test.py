@@ -0,0 +1,108 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests the ravenml models command group.
+"""
+
+import boto3
+import os
+import json
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from moto import mock_s3
+from click.testing import CliRunner
+from ravenml.models.commands import models as models_cmd_group
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.config import config_cache
+from ravenml.utils.model import model_cache, query_models, pull_model
+
+### SETUP ###
+mock = mock_s3()
+runner = CliRunner()
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+MODEL_BUCKET = 'ravenml-models-test'
+bucket = None
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    global bucket
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    config_cache.path = test_cache.path
+    model_cache.path = test_cache.path / 'models'
+    with open(test_cache.path / 'config.yml', 'w') as f:
+        yaml.dump({'dataset_bucket_name': 'datasets-test', 'image_bucket_name': 'images-test',
+                    'model_bucket_name': MODEL_BUCKET}, f)
+    bucket = boto3.resource('s3', region_name='us-east-1').create_bucket(Bucket=MODEL_BUCKET)
+    _put_model('abc23', 'tf_bbox', 'dataset_a', '2026-01-10T10:00:00Z')
+    _put_model('def45', 'pt_pose', 'dataset_b', '2026-02-10T10:00:00Z')
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+def _put_model(uuid, architecture, dataset, date):
+    metadata = {'created_by': 'tester', 'comments': 'test', 'date_started_at': date,
+                'dataset_used': {'name': dataset}, 'ravenml_git_sha': f'sha{uuid}',
+                architecture: {'architecture': architecture}}
+    bucket.put_object(Key=f'models/{architecture}_{uuid}.pb', Body=f'model {uuid}'.encode())
+    bucket.put_object(Key=f'models/metadata_{uuid}.json', Body=json.dumps(metadata).encode())
+    bucket.put_object(Key=f'extras/{uuid}/checkpoints/model.ckpt', Body=b'shared checkpoint')
+
+
+### TESTS ###
+def test_sync_is_incremental():
+    """Tests that syncing only fetches new or changed metadata and drops removed models.
+    """
+    result = runner.invoke(models_cmd_group, ['sync'])
+    assert result.exit_code == 0
+    assert '2 added, 0 updated, 0 removed' in result.output
+    result = runner.invoke(models_cmd_group, ['sync'])
+    assert '0 added, 0 updated, 0 removed' in result.output
+
+    _put_model('ghi67', 'tf_bbox', 'dataset_b', '2026-03-10T10:00:00Z')
+    bucket.Object('models/metadata_def45.json').delete()
+    result = runner.invoke(models_cmd_group, ['sync'])
+    assert '1 added, 0 updated, 1 removed' in result.output
+
+def test_list_queries():
+    """Tests querying the index by architecture, dataset, git sha and date.
+    """
+    runner.invoke(models_cmd_group, ['sync'])
+    assert [row['uuid'] for row in query_models(architecture='tf_bbox')] == ['ghi67', 'abc23']
+    assert [row['uuid'] for row in query_models(dataset='dataset_b')] == ['ghi67']
+    assert [row['uuid'] for row in query_models(git_sha='shaabc')] == ['abc23']
+    assert [row['uuid'] for row in query_models(since='2026-02-01', until='2026-03-10')] == ['ghi67']
+    result = runner.invoke(models_cmd_group, ['list', '--no-sync', '-a', 'tf_bbox'])
+    assert result.exit_code == 0
+    lines = result.output.strip().split('\n')
+    assert lines[0].split() == ['UUID', 'ARCHITECTURE', 'DATASET', 'DATE_STARTED_AT', 'CREATED_BY']
+    assert [line.split()[0] for line in lines[1:]] == ['ghi67', 'abc23']
+
+def test_pull_deduplicates():
+    """Tests that pulls download models and extras, storing identical files once.
+    """
+    result = runner.invoke(models_cmd_group, ['pull', 'abc23', 'ghi67'])
+    assert result.exit_code == 0, result.output
+    first, second = model_cache.path / 'abc23', model_cache.path / 'ghi67'
+    assert (first / 'tf_bbox_abc23.pb').read_bytes() == b'model abc23'
+    assert json.loads((first / 'metadata.json').read_text())['dataset_used'] == {'name': 'dataset_a'}
+    checkpoint = first / 'extras' / 'checkpoints' / 'model.ckpt'
+    assert os.stat(checkpoint).st_ino == os.stat(second / 'extras' / 'checkpoints' / 'model.ckpt').st_ino
+    result = runner.invoke(models_cmd_group, ['pull', 'missing'])
+    assert result.exit_code != 0
+
+def test_concurrent_pulls():
+    """Tests that concurrent pulls of the same model replace its files without colliding.
+    """
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        paths = list(executor.map(lambda _: pull_model('abc23', num_threads=1), range(8)))
+    assert (paths[0] / 'tf_bbox_abc23.pb').read_bytes() == b'model abc23'
+    assert not [name for name in os.listdir(paths[0]) if name.endswith('.part')]
@@ -0,0 +1,82 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests background dataset prefetching.
+"""
+
+import pytest
+import boto3
+import os
+import json
+import threading
+from pathlib import Path
+from moto import mock_s3
+from shutil import copyfile
+import ravenml.utils.dataset as dataset_utils
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.config import get_config, config_cache
+from ravenml.utils.dataset import dataset_cache, prefetch_dataset
+from ravenml.utils.aws import upload_directory
+
+### SETUP ###
+mock = mock_s3()
+test_dir = Path(os.path.dirname(__file__))
+test_data_dir = test_dir / Path('data')
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    config_cache.path = test_cache.path
+    dataset_cache.path = test_cache.path / Path('datasets')
+    copyfile(test_data_dir / Path('config.yml'), test_cache.path / Path('config.yml'))
+    bucket = get_config()['dataset_bucket_name']
+    boto3.resource('s3', region_name='us-east-1').create_bucket(Bucket=bucket)
+    source = test_cache.path / 'source'
+    os.makedirs(source / 'test')
+    with open(source / 'metadata.json', 'w') as f:
+        json.dump({'name': 'prefetched'}, f)
+    with open(source / 'test' / 'image_0.png', 'wb') as f:
+        f.write(os.urandom(1000))
+    upload_directory(bucket, 'prefetched', source)
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+
+### TESTS ###
+def test_prefetch_blocks_only_on_path(monkeypatch):
+    """Tests that metadata is available at once and the path once the download completes.
+    """
+    release = threading.Event()
+    ensure_dataset = dataset_utils._ensure_dataset
+    def held_ensure_dataset(name):
+        release.wait(10)
+        ensure_dataset(name)
+    monkeypatch.setattr(dataset_utils, '_ensure_dataset', held_ensure_dataset)
+
+    dataset = prefetch_dataset('prefetched')
+    assert dataset.metadata == {'name': 'prefetched'}
+    assert not dataset.done()
+    release.set()
+    assert (dataset.path / 'test' / 'image_0.png').exists()
+    assert dataset.done()
+
+def test_prefetch_errors(monkeypatch):
+    """Tests that unknown datasets fail immediately and download errors surface at access.
+    """
+    with pytest.raises(ValueError):
+        prefetch_dataset('missing')
+    def failing_ensure_dataset(name):
+        raise ValueError(name)
+    monkeypatch.setattr(dataset_utils, '_ensure_dataset', failing_ensure_dataset)
+    dataset = prefetch_dataset('prefetched')
+    with pytest.raises(ValueError):
+        dataset.path
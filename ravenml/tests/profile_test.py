@@ -0,0 +1,104 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests the ravenml profiling module.
+"""
+
+import pytest
+import os
+import json
+import tracemalloc
+from pathlib import Path
+from ravenml.utils.profile import Profiler, profiler, timed, REPORT_FILENAME, SPAN_STACKS_FILENAME
+from ravenml.utils.question import cli_spinner
+from ravenml.utils.local_cache import RMLCache
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    profiler.stop()
+    test_cache.clean()
+
+@timed()
+def _transfer():
+    pass
+
+def _stage():
+    _transfer()
+
+
+### TESTS ###
+def test_disabled_profiler_records_nothing():
+    """Tests that spans are not recorded unless profiling was started.
+    """
+    p = Profiler()
+    with p.span('stage'):
+        pass
+    assert p.spans == []
+
+def test_spinner_stages_are_nested_spans():
+    """Tests that cli_spinner stages and timed helpers are recorded as nested spans.
+    """
+    profiler.start('timing', name='run')
+    cli_spinner('Running stage...', _stage)
+    profiler.stop()
+    stacks = [';'.join(span['stack']) for span in profiler.spans]
+    assert 'run;_stage;profile_test._transfer' in stacks
+    assert 'run' in stacks
+
+def test_memory_mode_leaves_caller_tracing():
+    """Tests that memory profiling only stops tracemalloc if it started it.
+    """
+    p = Profiler()
+    p.start('memory')
+    p.stop()
+    assert not tracemalloc.is_tracing()
+    tracemalloc.start()
+    try:
+        p.start('memory')
+        p.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_write_report():
+    """Tests the JSON report and folded stack files written by the profiler.
+    """
+    profiler.start('cprofile', name='run')
+    cli_spinner('Running stage...', _stage)
+    written = profiler.write_report(test_cache.path)
+    assert all(path.exists() for path in written)
+    report = json.load(open(test_cache.path / REPORT_FILENAME))
+    assert report['mode'] == 'cprofile'
+    assert {stage['path'] for stage in report['stages']} >= {'run', 'run;_stage'}
+    for line in open(test_cache.path / SPAN_STACKS_FILENAME):
+        stack, weight = line.rsplit(' ', 1)
+        assert stack.startswith('run')
+        assert int(weight) >= 0
+
+def test_write_report_and_continue():
+    """Tests writing a report of the stages so far, then again once later stages finish.
+    """
+    profiler.start('cprofile', name='run')
+    cli_spinner('Running stage...', _stage)
+    profiler.write_report(test_cache.path, stop=False)
+    report = json.load(open(test_cache.path / REPORT_FILENAME))
+    assert profiler.enabled and report['total_seconds'] > 0
+    assert 'run;upload' not in {stage['path'] for stage in report['stages']}
+    with profiler.span('upload'):
+        _transfer()
+    profiler.write_report(test_cache.path)
+    report = json.load(open(test_cache.path / REPORT_FILENAME))
+    assert not profiler.enabled
+    assert {stage['path'] for stage in report['stages']} >= {'run', 'run;_stage', 'run;upload'}
@@ -0,0 +1,55 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests progress reporting.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ravenml.utils.progress import ProgressReporter, progress
+from ravenml.utils.question import cli_spinner
+
+
+### TESTS ###
+def test_nested_tasks_and_summary():
+    """Tests that work reported from other threads and sub-tasks is aggregated per task path.
+    """
+    reporter = ProgressReporter()
+    with reporter.task('Build') as build:
+        for _ in range(2):
+            with reporter.task('Copying files', total=10, total_bytes=1000) as task:
+                assert reporter.current() is task and task.parent is build
+                with ThreadPoolExecutor(4) as executor:
+                    list(executor.map(lambda _: task.advance(nbytes=100), range(10)))
+                assert task.eta() == 0
+        reporter.advance(3)
+    summary = reporter.summary()
+    assert set(summary) == {'Build', 'Build/Copying files'}
+    assert summary['Build/Copying files']['items'] == 20
+    assert summary['Build/Copying files']['bytes'] == 2000
+    assert summary['Build']['items'] == 3
+    assert 'bytes_per_second' in summary['Build/Copying files']
+    assert reporter.current() is None
+
+def test_rendering():
+    """Tests terminal descriptions and structured log lines of a task in progress.
+    """
+    reporter = ProgressReporter()
+    with reporter.task('Downloading', total=200, total_bytes=4000) as task:
+        task.advance(50, nbytes=1000)
+        time.sleep(.01)
+        description = task.describe()
+        assert description.startswith('[#####...............] 25% 50/200')
+        assert 'ETA' in description
+        line = task.log_line()
+        assert line.startswith('progress task="Downloading" items=50 total=200 bytes=1000 total_bytes=4000')
+        assert 'eta_seconds=' in line
+
+def test_spinner_stages_are_tasks():
+    """Tests that stages run through cli_spinner are recorded with the progress reported in them.
+    """
+    def stage():
+        progress.advance(5, nbytes=50)
+    cli_spinner('Testing progress...', stage)
+    assert progress.summary()['Testing progress']['items'] == 5
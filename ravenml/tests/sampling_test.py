@@ -0,0 +1,75 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests seeded sampling of image ids.
+"""
+
+import pytest
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.data.sampling import sample_image_ids
+from ravenml.data.write_dataset import DefaultDatasetWriter
+from ravenml.bench.synthetic import generate_imageset, synthetic_create_input, METADATA_FORMAT
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+image_ids = [(Path('a'), str(i)) for i in range(600)] + [(Path('b'), str(i)) for i in range(200)]
+tags_df = pd.DataFrame({'night': np.arange(800) % 4 == 0, 'day': np.arange(800) % 4 != 0},
+                        index=pd.Index(image_ids, tupleize_cols=False))
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+
+### TESTS ###
+def test_quotas_and_seeds():
+    """Tests per-imageset quotas and that a recorded plan reproduces its sample.
+    """
+    sample, plan = sample_image_ids(image_ids, {'by': 'imageset', 'mode': 'quota', 'quotas': {'a': 30, 'b': 20}})
+    assert sum(1 for image_id in sample if image_id[0] == Path('a')) == 30
+    assert len(sample) == 50 and len(set(sample)) == 50
+    assert plan['strata'] == {'a': 30, 'b': 20}
+    assert sample_image_ids(image_ids, plan)[0] == sample
+    assert sample_image_ids(image_ids, dict(plan, seed=plan['seed'] + 1))[0] != sample
+    with pytest.raises(ValueError):
+        sample_image_ids(image_ids, {'by': 'imageset', 'mode': 'quota', 'quotas': {'b': 201}})
+
+def test_stratified_balanced_weighted():
+    """Tests proportional and balanced allocation over tags, and tag weights.
+    """
+    sample, plan = sample_image_ids(image_ids, {'size': 100, 'by': ['night'], 'seed': 0}, tags_df)
+    assert plan['strata'] == {'night': 25, '(none)': 75}
+    assert tags_df.loc[pd.Index(sample, tupleize_cols=False), 'night'].sum() == 25
+
+    _, plan = sample_image_ids(image_ids, {'size': 500, 'by': 'imageset', 'mode': 'balanced', 'seed': 0})
+    assert plan['strata'] == {'a': 300, 'b': 200}
+
+    sample, _ = sample_image_ids(image_ids, {'size': 200, 'weights': {'night': 0}, 'seed': 0}, tags_df)
+    assert not tags_df.loc[pd.Index(sample, tupleize_cols=False), 'night'].any()
+
+def test_set_size_filter_records_plan():
+    """Tests that the writer's size filter samples with the configured seed and records its plan.
+    """
+    imageset = generate_imageset(test_cache.path / 'imageset', 50, 5)
+    samples = []
+    for _ in range(2):
+        writer = DefaultDatasetWriter(synthetic_create_input([imageset], test_cache.path / 'build', seed=7))
+        writer.load_image_ids(METADATA_FORMAT)
+        writer.set_size_filter({'imageset': 10})
+        samples.append(writer.image_ids)
+    assert len(samples[0]) == 10 and samples[0] == samples[1]
+    assert writer.filter_metadata['imageset'] == 10
+    assert writer.filter_metadata['sampling'][0]['seed'] == 7
@@ -0,0 +1,91 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests scheduling S3 transfers under shared caps.
+"""
+
+import os
+import time
+import threading
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.aws import TokenBucket, TransferScheduler, transfer_cache, HEARTBEAT_SUFFIX
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    transfer_cache.path = test_cache.path / 'transfers'
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+
+### TESTS ###
+def test_priorities():
+    """Tests that waiting transfers get slots and bandwidth most urgent first.
+    """
+    scheduler = TransferScheduler()
+    scheduler.configure(max_transfers=1)
+    started = []
+    release = threading.Event()
+
+    def run(priority):
+        with scheduler.transfer(priority):
+            started.append(priority)
+            release.wait()
+
+    holder = threading.Thread(target=run, args=('bulk',))
+    holder.start()
+    while not started:
+        time.sleep(.01)
+    waiters = []
+    for priority in ('bulk', 'artifacts', 'metadata'):
+        waiters.append(threading.Thread(target=run, args=(priority,)))
+        waiters[-1].start()
+        time.sleep(.05)
+    release.set()
+    for thread in [holder] + waiters:
+        thread.join(5)
+    assert started == ['bulk', 'metadata', 'artifacts', 'bulk']
+
+    # an urgent request is served before a bulk request waiting on an empty bucket
+    bucket = TokenBucket(100000)
+    bucket.acquire(100000)
+    served = []
+    bulk = threading.Thread(target=lambda: (bucket.acquire(50000, 2), served.append('bulk')))
+    bulk.start()
+    time.sleep(.05)
+    bucket.acquire(50000, 0)
+    served.append('metadata')
+    bulk.join(5)
+    assert served == ['metadata', 'bulk']
+
+def test_fair_share():
+    """Tests that the caps are shared between processes with recent heartbeats.
+    """
+    scheduler = TransferScheduler()
+    scheduler.configure(max_bandwidth='1MB', max_transfers=8)
+    transfer_cache.ensure_exists()
+    # a live process (the test runner's parent) and an exited one
+    (transfer_cache.path / f'{os.getppid()}{HEARTBEAT_SUFFIX}').touch()
+    (transfer_cache.path / f'999999999{HEARTBEAT_SUFFIX}').touch()
+    with scheduler.transfer('bulk'):
+        assert scheduler.peers == 2
+        assert scheduler._bucket.rate == 2**20 / 2
+        assert (transfer_cache.path / f'{os.getpid()}{HEARTBEAT_SUFFIX}').exists()
+    assert not (transfer_cache.path / f'999999999{HEARTBEAT_SUFFIX}').exists()
+
+    # stale heartbeats no longer take a share
+    stale = time.time() - 60
+    os.utime(transfer_cache.path / f'{os.getppid()}{HEARTBEAT_SUFFIX}', (stale, stale))
+    scheduler._last_heartbeat = None
+    with scheduler.transfer('metadata'):
+        assert scheduler.peers == 1
@@ -0,0 +1,88 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests sharded dataset builds.
+"""
+
+import os
+import json
+import pytest
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.data.helpers import shard_of, partition_image_ids
+from ravenml.data.write_dataset import SHARDS_DIRNAME, _wait_for_shards
+from ravenml.bench.synthetic import generate_imageset, ASSOCIATED_FILES
+from dataset_writers import list_writer
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    generate_imageset(test_cache.path / 'shard_imageset', 60, 5)
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+
+def _writer(dataset_name, **overrides):
+    return list_writer([test_cache.path / 'shard_imageset'], test_cache.path / 'datasets', dataset_name, **overrides)
+
+def _check_merged(writer, dataset_path):
+    train_files = sorted(os.listdir(dataset_path / 'splits' / 'complete' / 'train'))
+    assert train_files == [f'{split}-{i:05d}-of-00003.txt' for split in ('test', 'train') for i in range(3)]
+    train_ids = []
+    for name in train_files:
+        with open(dataset_path / 'splits' / 'complete' / 'train' / name) as f:
+            train_ids += f.read().split('\n')
+    test_ids = [name[len('image_'):-len('.png')] for name in os.listdir(dataset_path / 'test') if name.startswith('image_')]
+    assert sorted(train_ids + test_ids) == sorted(f'0_{i}' for i in range(60))
+    assert sorted(image_id[1] for image_id in writer.image_ids) == sorted(f'0_{i}' for i in range(60))
+    assert not os.path.exists(dataset_path / SHARDS_DIRNAME)
+
+
+### TESTS ###
+def test_partition_is_deterministic():
+    """Tests that shard assignment only depends on imageset name and image id.
+    """
+    ids = [(Path('/a/imageset'), str(i)) for i in range(100)]
+    moved = [(Path('/b/imageset'), str(i)) for i in range(100)]
+    shards = partition_image_ids(ids, 4)
+    assert sum(len(shard) for shard in shards) == 100
+    assert [[image_id[1] for image_id in shard] for shard in shards] == \
+            [[image_id[1] for image_id in shard] for shard in partition_image_ids(moved, 4)]
+    assert all(shard_of(image_id, 4) == i for i, shard in enumerate(shards) for image_id in shard)
+
+def test_process_pool_build():
+    """Tests building shards in local worker processes and merging them.
+    """
+    writer = _writer('pool', shards=3, shard_workers=2)
+    writer.build_dataset(ASSOCIATED_FILES)
+    _check_merged(writer, test_cache.path / 'datasets' / 'pool')
+
+def test_multi_host_build():
+    """Tests merging shards built by separate shard_index writers.
+    """
+    for index in range(3):
+        writer = _writer('hosts', shards=3, shard_index=index)
+        writer.build_dataset(ASSOCIATED_FILES)
+        with open(test_cache.path / 'datasets' / 'hosts' / SHARDS_DIRNAME / f'shard_{index:05d}' / 'shard.json') as f:
+            assert json.load(f)['complete']
+    coordinator = _writer('hosts', shards=3, shard_workers=0)
+    coordinator.build_dataset(ASSOCIATED_FILES)
+    _check_merged(coordinator, test_cache.path / 'datasets' / 'hosts')
+
+def test_wait_for_missing_shards_times_out():
+    """Tests that the merging host gives up on shards which do not complete, naming them.
+    """
+    writer = _writer('stalled', shards=3, shard_index=1)
+    writer.build_dataset(ASSOCIATED_FILES)
+    with pytest.raises(Exception, match=r'shards \[0, 2\] of 3'):
+        _wait_for_shards(test_cache.path / 'datasets' / 'stalled' / SHARDS_DIRNAME, 3, timeout=.1, poll_interval=.05)
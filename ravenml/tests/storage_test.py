@@ -0,0 +1,83 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests serving buckets from the local filesystem through the storage drivers.
+"""
+
+import io
+import os
+import pytest
+from pathlib import Path
+from botocore.exceptions import ClientError
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.storage import storage_driver, FileSystemDriver, S3Driver, PARTIAL_DIRNAME
+from ravenml.utils.aws import upload_directory, download_prefix, download_object_if_modified, list_top_level_bucket_prefixes
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+
+### TESTS ###
+def test_filesystem_driver():
+    """Tests the object store operations of the filesystem driver.
+    """
+    bucket = f'file://{test_cache.path / "bucket"}'
+    driver = storage_driver(bucket)
+    assert isinstance(driver, FileSystemDriver) and isinstance(storage_driver('my-bucket'), S3Driver)
+    driver.put(bucket, 'set_a/meta_1.json', io.BytesIO(b'{}'))
+    driver.put(bucket, 'set_a/images/1.png', io.BytesIO(b'image'))
+    driver.put(bucket, 'set_b/1.png', io.BytesIO(b'other'))
+
+    assert driver.list_prefixes(bucket) == ['set_a', 'set_b']
+    assert [obj['Key'] for obj in driver.list(bucket, 'set_a/')] == ['set_a/images/1.png', 'set_a/meta_1.json']
+    assert [obj['Key'] for obj in driver.list(bucket, 'set_a/meta_', limit=1)] == ['set_a/meta_1.json']
+    assert not os.listdir(test_cache.path / 'bucket' / PARTIAL_DIRNAME)
+
+    etag = driver.head(bucket, 'set_b/1.png')['ETag']
+    with pytest.raises(ClientError) as error:
+        driver.get(bucket, 'set_b/1.png', if_none_match=etag)
+    assert error.value.response['Error']['Code'] == '304'
+    with pytest.raises(ClientError):
+        driver.head(bucket, 'set_b/missing.png')
+    with pytest.raises(ValueError):
+        driver.get(bucket, '../outside')
+    driver.delete(bucket, 'set_b/1.png')
+    driver.delete(bucket, 'set_b/1.png')
+    assert driver.list(bucket, 'set_b/') == []
+
+def test_sync_through_filesystem():
+    """Tests uploading and downloading a prefix with a filesystem bucket, like an S3 bucket.
+    """
+    bucket = f'file://{test_cache.path / "datasets"}'
+    source = test_cache.path / 'source'
+    for i in range(5):
+        os.makedirs(source / 'dev', exist_ok=True)
+        (source / 'dev' / f'{i}.png').write_bytes(os.urandom(100))
+    (source / 'metadata.json').write_text('{"name": "local"}')
+    manifest = upload_directory(bucket, 'local', source)
+    assert len(manifest['files']) == 6
+    assert list_top_level_bucket_prefixes(bucket) == ['local']
+
+    cache = RMLCache()
+    cache.path = test_cache.path / 'cache'
+    assert download_prefix(bucket, 'local', cache)
+    for i in range(5):
+        assert (cache.path / 'local' / 'dev' / f'{i}.png').read_bytes() == (source / 'dev' / f'{i}.png').read_bytes()
+
+    metadata_path = test_cache.path / 'metadata.json'
+    assert download_object_if_modified(bucket, 'local/metadata.json', metadata_path)
+    assert not download_object_if_modified(bucket, 'local/metadata.json', metadata_path)
+    assert metadata_path.read_text() == '{"name": "local"}'
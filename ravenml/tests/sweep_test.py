@@ -0,0 +1,84 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests hyperparameter sweeps.
+"""
+
+import pytest
+import os
+import json
+import yaml
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.train.sweep import sweep_cache, load_sweep, expand_runs, apply_overrides, run_sweep, \
+    format_summary, SWEEP_FIELD
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    sweep_cache.path = test_cache.path / 'sweeps'
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+def _write_sweep(sweep):
+    path = test_cache.path / 'sweep.yml'
+    with open(path, 'w') as f:
+        yaml.dump(sweep, f)
+    return path
+
+
+### TESTS ###
+def test_expand_and_override():
+    """Tests expanding listed runs and grids into overrides, and applying them to a config.
+    """
+    sweep = {'runs': [{'plugin.optimizer': 'sgd'}],
+                'parameters': {'plugin.learning_rate': [.1, .01], 'plugin.batch_size': [16, 32]}}
+    runs = expand_runs(sweep)
+    assert len(runs) == 5
+    assert runs[0] == {'plugin.optimizer': 'sgd'}
+    assert {'plugin.learning_rate': .01, 'plugin.batch_size': 16} in runs
+
+    base = {'dataset': 'test', 'plugin': {'learning_rate': 1, 'epochs': 5}}
+    config = apply_overrides(base, {'plugin.learning_rate': .1, 'plugin.model.depth': 3})
+    assert config['plugin'] == {'learning_rate': .1, 'epochs': 5, 'model': {'depth': 3}}
+    assert base['plugin'] == {'learning_rate': 1, 'epochs': 5}
+
+def test_load_sweep_validation():
+    """Tests that malformed sweep files are rejected.
+    """
+    assert load_sweep(_write_sweep({'parameters': {'plugin.lr': [1, 2]}}))['parameters'] == {'plugin.lr': [1, 2]}
+    for sweep in ({}, {'parameters': {'plugin.lr': []}}, {'runs': ['lr']}, {'grid': {}},
+                    {'runs': [{}], 'slots_per_run': 4, 'max_slots': 2}):
+        with pytest.raises(ValueError):
+            load_sweep(_write_sweep(sweep))
+
+def test_run_sweep():
+    """Tests that every run gets its own config with the shared state and is summarized.
+    """
+    sweep = {'parameters': {'plugin.lr': [1, 2, 3]}, 'max_slots': 2}
+    shared = {'sweep_id': 'abc', 'dataset': {'name': 'test', 'path': '/data/test'}, 'git_info': {}}
+    # --help exits before any training, only the orchestration is exercised
+    results = run_sweep(sweep, {'dataset': 'test', 'plugin': {'lr': 0}}, shared, ['--help'])
+    assert [result['returncode'] for result in results] == [0, 0, 0]
+    for i, result in enumerate(results):
+        with open(sweep_cache.path / 'abc' / f'run_{i}' / 'config.yml', 'r') as f:
+            config = yaml.safe_load(f)
+        assert config['plugin'] == {'lr': i + 1}
+        assert config[SWEEP_FIELD]['run'] == i and config[SWEEP_FIELD]['dataset']['path'] == '/data/test'
+        assert config['ec2_policy'] == 'keep'
+        assert 'Training commands.' in Path(result['log']).read_text()
+    with open(sweep_cache.path / 'abc' / 'summary.json', 'r') as f:
+        assert len(json.load(f)) == 3
+    lines = format_summary(results).split('\n')
+    assert lines[0].split() == ['RUN', 'STATUS', 'SECONDS', 'RESULT', 'OVERRIDES']
+    assert lines[2].split()[1] == 'ok' and lines[2].endswith('plugin.lr=2')
@@ -0,0 +1,79 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests the cached image transform stage.
+"""
+
+import pytest
+import os
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+from ravenml.data import transforms
+from ravenml.data.transforms import validate_transforms, transform_images
+from ravenml.data.write_dataset import DefaultDatasetWriter
+from ravenml.bench.synthetic import synthetic_create_input
+
+Image = pytest.importorskip('PIL.Image')
+
+### SETUP ###
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+STEPS = [
+    {'op': 'resize', 'size': [64, 48]},
+    {'op': 'crop', 'size': [32, 32]},
+    {'op': 'encode', 'format': 'jpeg', 'quality': 80}
+]
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    test_cache.path = test_dir / '.testing'
+    transforms.transform_cache.path = test_cache.path / 'transforms'
+    os.makedirs(test_cache.path / 'imageset', exist_ok=True)
+    for i in range(6):
+        Image.new('RGBA', (100, 80), (40 * i, 0, 0, 255)).save(test_cache.path / 'imageset' / f'image_{i}.png')
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+
+
+### TESTS ###
+def test_validate_transforms():
+    """Tests rejection of malformed transform steps.
+    """
+    assert validate_transforms(STEPS) == STEPS
+    for steps in ([{'op': 'rotate'}], [{'op': 'resize'}], [{'op': 'resize', 'size': [1, 1], 'scale': 2}],
+                    [{'op': 'encode', 'format': 'gif'}], {'op': 'crop'}):
+        with pytest.raises(ValueError):
+            validate_transforms(steps)
+
+def test_transform_images_cached():
+    """Tests that transforms are applied and outputs are reused by later builds.
+    """
+    sources = [test_cache.path / 'imageset' / f'image_{i}.png' for i in range(6)]
+    outputs = transform_images(sources, STEPS, num_workers=2)
+    assert len(set(outputs)) == 6
+    for output in outputs:
+        assert output.suffix == '.jpg'
+        with Image.open(output) as image:
+            assert image.format == 'JPEG' and image.size == (32, 32)
+    mtimes = [os.stat(output).st_mtime_ns for output in outputs]
+    assert transform_images(sources, STEPS, num_workers=2) == outputs
+    assert [os.stat(output).st_mtime_ns for output in outputs] == mtimes
+    # different parameters are cached separately
+    assert not set(transform_images(sources[:1], STEPS[:1], num_workers=1)) & set(outputs)
+
+def test_writer_transform_images():
+    """Tests that writers map image ids to transformed images and record transforms.
+    """
+    image_ids = [(test_cache.path / 'imageset', str(i)) for i in range(6)]
+    writer = DefaultDatasetWriter(synthetic_create_input([test_cache.path / 'imageset'], test_cache.path, transforms=STEPS))
+    writer.image_ids = image_ids
+    outputs = writer.transform_images(num_workers=2)
+    assert list(outputs) == image_ids
+    assert all(path.suffix == '.jpg' for path in outputs.values())
+    writer.transforms = []
+    assert writer.transform_images()[image_ids[0]] == test_cache.path / 'imageset' / 'image_0.png'
@@ -0,0 +1,92 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests incremental dataset versions.
+"""
+
+import boto3
+import os
+import shutil
+from pathlib import Path
+from moto import mock_s3
+from shutil import copyfile
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.config import get_config, config_cache
+from ravenml.utils.dataset import dataset_cache, get_dataset
+from ravenml.utils.checksum import read_manifest, verify_directory
+from ravenml.utils.aws import upload_directory
+from ravenml.bench.synthetic import generate_imageset, ASSOCIATED_FILES
+from dataset_writers import list_writer
+
+### SETUP ###
+mock = mock_s3()
+test_dir = Path(os.path.dirname(__file__))
+test_data_dir = test_dir / Path('data')
+test_cache = RMLCache()
+bucket = None
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    global bucket
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    test_cache.ensure_exists()
+    config_cache.path = test_cache.path
+    dataset_cache.path = test_cache.path / Path('datasets')
+    copyfile(test_data_dir / Path('config.yml'), test_cache.path / Path('config.yml'))
+    S3 = boto3.resource('s3', region_name='us-east-1')
+    bucket = S3.create_bucket(Bucket=get_config()['dataset_bucket_name'])
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+
+def _build(name, num_images, **overrides):
+    imageset = generate_imageset(test_cache.path / 'imageset', num_images, 5)
+    writer = list_writer([imageset], test_cache.path / 'build', name, **overrides)
+    if writer.parent:
+        writer.load_parent()
+    writer.build_dataset(ASSOCIATED_FILES)
+    writer.write_metadata()
+    return writer
+
+
+### TESTS ###
+def test_version_uploads_and_downloads_delta():
+    """Tests that a version stores only its new files and is reconstructed from its parent.
+    """
+    parent = _build('parent', 40)
+    upload_directory(bucket.name, 'parent', test_cache.path / 'build' / 'parent')
+    parent_test = {image_id[1] for image_id in parent.test_image_ids}
+
+    version = _build('version', 50, parent='parent', remove_image_ids=[('imageset', '0_3')])
+    assert sorted(image_id[1] for image_id in version.added_image_ids) == sorted(f'0_{i}' for i in range(40, 50))
+    assert [image_id[1] for image_id in version.removed_image_ids] == ['0_3']
+    assert len(version.image_ids) == 49
+    # images from the parent keep their split
+    version_test = {image_id[1] for image_id in version.test_image_ids}
+    assert parent_test - {'0_3'} == version_test - {f'0_{i}' for i in range(40, 50)}
+
+    version_path = test_cache.path / 'build' / 'version'
+    manifest = upload_directory(bucket.name, 'version', version_path, parent_manifest=read_manifest(
+                                dataset_cache.path / 'parent'), parent_prefix='parent')
+    assert manifest['parent'] == 'parent'
+    uploaded = {obj.key[len('version/'):] for obj in bucket.objects.filter(Prefix='version/')}
+    inherited = {path for path, record in manifest['files'].items() if record.get('prefix') == 'parent'}
+    assert inherited and not inherited & uploaded
+    assert all(f'0_{i}' not in path for path in inherited for i in range(40, 50))
+
+    # reconstruct the version from scratch
+    shutil.rmtree(dataset_cache.path, ignore_errors=True)
+    dataset = get_dataset('version')
+    assert verify_directory(dataset.path) == []
+    assert 'image_ids' not in dataset.metadata and dataset.metadata['image_count'] == 49
+    assert sorted(dataset.image_index()['removed_image_ids']) == [('imageset', '0_3')]
+    assert sorted(os.listdir(dataset.path / 'test')) == sorted(os.listdir(version_path / 'test'))
+    linked = sorted(inherited)[0]
+    assert os.stat(dataset.path / linked).st_ino == os.stat(dataset_cache.path / 'parent' / linked).st_ino
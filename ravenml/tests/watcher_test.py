@@ -0,0 +1,106 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Tests streaming artifact uploads during training.
+"""
+
+import boto3
+import os
+import io
+import time
+from pathlib import Path
+from moto import mock_s3
+from ravenml.utils.local_cache import RMLCache
+from ravenml.utils.aws import TokenBucket, ThrottledReader
+from ravenml.train.watcher import ArtifactWatcher
+
+### SETUP ###
+mock = mock_s3()
+test_dir = Path(os.path.dirname(__file__))
+test_cache = RMLCache()
+BUCKET = 'watcher-bucket'
+
+def setup_module():
+    """ Sets up the module for testing.
+    """
+    mock.start()
+    test_cache.path = test_dir / '.testing'
+    os.makedirs(test_cache.path / 'artifacts' / 'checkpoints')
+    boto3.resource('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+
+def teardown_module():
+    """ Tears down the module after testing.
+    """
+    test_cache.clean()
+    mock.stop()
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _keys():
+    return sorted(obj.key for obj in boto3.resource('s3', region_name='us-east-1').Bucket(BUCKET).objects.all())
+
+
+### TESTS ###
+def test_watcher_uploads_stable_changes():
+    """Tests that files are uploaded once unchanged between scans, and again when changed.
+    """
+    artifacts = test_cache.path / 'artifacts'
+    watcher = ArtifactWatcher(artifacts, BUCKET, 'extras/abc', patterns=['*.ckpt', 'events*'])
+    _write(artifacts / 'checkpoints' / 'model.ckpt', b'step 1')
+    _write(artifacts / 'events.out', b'events')
+    _write(artifacts / 'ignored.tmp', b'tmp')
+    assert watcher.scan() == []
+    assert sorted(watcher.scan()) == ['checkpoints/model.ckpt', 'events.out']
+    assert watcher.scan() == []
+    # keyed by filename, as extra files are uploaded when training ends
+    assert _keys() == ['extras/abc/events.out', 'extras/abc/model.ckpt']
+
+    _write(artifacts / 'checkpoints' / 'model.ckpt', b'step 2, longer')
+    assert watcher.uploaded_key(artifacts / 'checkpoints' / 'model.ckpt') is None
+    assert watcher.uploaded_key(artifacts / 'events.out') == 'extras/abc/events.out'
+    # the final flush uploads changes without waiting for them to settle
+    assert watcher.stop() == ['checkpoints/model.ckpt']
+    body = boto3.client('s3', region_name='us-east-1').get_object(
+        Bucket=BUCKET, Key='extras/abc/model.ckpt')['Body'].read()
+    assert body == b'step 2, longer'
+
+def test_stop_deletes_unwanted_uploads():
+    """Tests that files removed since they were uploaded, or not kept, are deleted when stopping.
+    """
+    artifacts = test_cache.path / 'rotated'
+    os.makedirs(artifacts)
+    watcher = ArtifactWatcher(artifacts, BUCKET, 'extras/rotated')
+    for step in range(3):
+        _write(artifacts / f'model.ckpt-{step}', b'step')
+    _write(artifacts / 'events.out.tfevents.1', b'events')
+    assert len(watcher.scan(flush=True)) == 4
+    # training keeps the latest checkpoints only
+    os.remove(artifacts / 'model.ckpt-0')
+    assert watcher.prune() == ['extras/rotated/model.ckpt-0']
+    watcher.stop(keep=[artifacts / 'model.ckpt-2', artifacts / 'events.out.tfevents.1'])
+    assert [key for key in _keys() if key.startswith('extras/rotated/')] == \
+        ['extras/rotated/events.out.tfevents.1', 'extras/rotated/model.ckpt-2']
+    assert sorted(watcher.uploaded) == ['events.out.tfevents.1', 'model.ckpt-2']
+
+def test_default_patterns():
+    """Tests that only checkpoints and event logs are streamed by default.
+    """
+    artifacts = test_cache.path / 'defaults'
+    os.makedirs(artifacts / 'train')
+    for name in ('train/events.out.tfevents.1', 'model.ckpt-10.index', 'scratch.tmp', 'pipeline.config'):
+        _write(artifacts / name, b'data')
+    watcher = ArtifactWatcher(artifacts, BUCKET, 'extras/defaults')
+    assert sorted(watcher.scan(flush=True)) == ['model.ckpt-10.index', 'train/events.out.tfevents.1']
+
+def test_throttled_reads():
+    """Tests that throttled reads are limited to the bucket's rate after the initial burst.
+    """
+    bucket = TokenBucket(100000)
+    reader = ThrottledReader(io.BytesIO(os.urandom(130000)), bucket)
+    start = time.monotonic()
+    while reader.read(10000):
+        pass
+    assert time.monotonic() - start >= .25
@@ -7,51 +7,75 @@ Command group for training in ravenml.
 
 import click
 import json
-import shortuuid
-import boto3
 import yaml
 import os
 import inspect
 import ravenml.utils.git as git
-from urllib.request import urlopen
-from urllib.error import URLError
 from pathlib import Path
-from ravenml.train.interfaces import TrainInput, TrainOutput
-from ravenml.utils.question import cli_spinner
+from ravenml.train.interfaces import TrainInput, TrainOutput, new_model_uuid, ravenml_git_info
+from ravenml.train.watcher import ArtifactWatcher
+from ravenml.train.sweep import load_sweep, run_sweep, format_summary
+from ravenml.utils.question import cli_spinner, user_input, user_selects
+from ravenml.utils.dataset import get_dataset, get_dataset_names
 from ravenml.utils.aws import upload_file_to_s3, upload_dict_to_s3_as_json
 from ravenml.utils.plugins import LazyPluginGroup
 from ravenml.utils.config import load_yaml_config
-
-EC2_INSTANCE_ID_URL = 'http://169.254.169.254/latest/meta-data/instance-id'
+from ravenml.utils.profile import profiler, PROFILE_MODES
+from ravenml.utils.progress import progress
+from ravenml.utils.metrics import metrics
+from ravenml.utils.environment import start_environment_detection, apply_shutdown_policy
 
 ### OPTIONS ###
 config_opt = click.option(
     '-c', '--config', type=str, help='Path to config file. Defaults to ~/ravenML_configs/config.yaml'
 )
 
+profile_opt = click.option(
+    '--profile', type=click.Choice(PROFILE_MODES),
+    help=('Profile training, including the upload of its artifacts, and write a per-stage timing report '
+            'into the artifact directory. '
+            '"memory" additionally traces Python allocations per stage, "cprofile" and "sampling" '
+            'attach cProfile stats or sampled stacks.')
+)
+
+sweep_opt = click.option(
+    '--sweep', type=str,
+    help=('Path to a sweep file. Runs one training of the plugin command per set of overrides '
+            'to the config, concurrently and sharing one download of the dataset.')
+)
+
 ### COMMANDS ###
 @click.group(cls=LazyPluginGroup, entry_point_name='ravenml.plugins.train', help='Training commands.')
 @click.pass_context
 @config_opt
-def train(ctx: click.Context, config: str):
+@profile_opt
+@sweep_opt
+def train(ctx: click.Context, config: str, profile: str, sweep: str):
     """ Training command group.
     
     Args:
         ctx (Context): click context object
         config (str): Path to config yaml file for this training run. Required
             when a user is calling a plugin command decorated with @pass_train
+        profile (str): profiling mode, None if not profiling
+        sweep (str): path to sweep file, None if not sweeping
     """
+    if profile:
+        profiler.start(profile, name='train')
     # check if config flag was passed, if not simply carry on to child command
     if config:
         # attempt to load config
         # NOTE: this function will raise a click error if there is an issue loading config
         train_config = load_yaml_config(Path(config))
+        if sweep:
+            # the plugin command runs in the sweep's workers rather than here
+            ctx.exit(_sweep(ctx, train_config, sweep))
         # trigger TrainInput creation, note this may prompt the user depending on the config file used
         ctx.obj = TrainInput(train_config, ctx.invoked_subcommand)
 
 @train.resultcallback()
 @click.pass_context
-def process_result(ctx: click.Context, result: TrainOutput, config: str):
+def process_result(ctx: click.Context, result: TrainOutput, config: str, profile: str, sweep: str):
     """Processes the result of a training by analyzing the given TrainOutput object.
     This callback is called after ANY command originating from the train command 
     group, hence the check to see if a result was actually returned - plugins
@@ -66,6 +90,8 @@ def process_result(ctx: click.Context, result: TrainOutput, config: str):
         result (TrainOutput): training output object returned by training plugin
         config (str): config option from train command. Click requires that command
             callbacks accept the options from the original command.
+        profile (str): profile option from train command, None if not profiling
+        sweep (str): sweep option from train command
     """
     if result is not None:
         # only plugin training commands that return a TrainOutput will activate this block
@@ -74,6 +100,8 @@ def process_result(ctx: click.Context, result: TrainOutput, config: str):
         # non-training plugin commands, the TrainInput __init__ will be called by Click
         # when process_result runs and no TrainInput is at ctx.obj
         ti = ctx.obj    
+        # detect where training ran while artifacts upload, for the shutdown policy
+        start_environment_detection()
         
         # store git info for plugin
         # NOTE: this will fail for plugins not installed via source
@@ -88,63 +116,137 @@ def process_result(ctx: click.Context, result: TrainOutput, config: str):
             git_info = git.retrieve_from_pkg(result.plugin_dir)
         ti.metadata.update(git_info)
 
+        # durations and throughput of the stages of this training
+        ti.metadata['throughput'] = progress.summary()
+
+        # write profiling report into the artifact directory, uploaded as extras when not local
+        if profile:
+            report_files = profiler.write_report(ti.artifact_path, stop=bool(ti.config.get('artifact_path')))
+            result.extra_files = list(result.extra_files) + report_files
+
         # upload if not in local mode, determined by user defined artifact_path field in config
         if not ti.config.get('artifact_path'):
-            uuid = cli_spinner('Uploading artifacts...', _upload_result, result, ti.metadata, ti.plugin_metadata)
+            # artifacts streamed during training are only uploaded again if they changed since,
+            # and are deleted if training removed them or they are not among the extra files
+            if ti.artifact_watcher:
+                cli_spinner('Flushing streamed artifacts...', ti.artifact_watcher.stop, result.extra_files)
+            uuid = cli_spinner('Uploading artifacts...', _upload_result, result, ti.metadata, ti.plugin_metadata,
+                                ti.uuid, ti.artifact_watcher)
+            # replace the uploaded report with one covering the upload
+            if profile:
+                report_files = profiler.write_report(ti.artifact_path)
+                cli_spinner('Uploading profiling report...', _upload_files, f'extras/{uuid}', report_files)
             click.echo(f'Artifact UUID: {uuid}')
+            metrics.event('training', uuid=uuid, dataset=ti.dataset.name, started_at=ti.metadata['date_started_at'])
         else:
             with open(ti.artifact_path / 'metadata.json', 'w') as f:
                 json.dump(ti.metadata, f, indent=2)
             click.echo(f'LOCAL MODE: Not uploading model to S3. Model is located at: {ti.artifact_path}')
+            metrics.event('training', artifact_path=str(ti.artifact_path), dataset=ti.dataset.name, 
+                            started_at=ti.metadata['date_started_at'])
             
         # stop, terminate, or do nothing to ec2 based on policy
-        ec2_policy = ti.config.get('ec2_policy')
-        # check if the policy is to stop or terminate
-        if ec2_policy == None or ec2_policy == 'stop' or ec2_policy == 'terminate':
-            policy_str = ec2_policy if ec2_policy else 'default'
-            click.echo(f'Checking for EC2 instance and applying policy "{policy_str}"...')
-            try:
-                # grab ec2 id
-                with urlopen(EC2_INSTANCE_ID_URL, timeout=5) as url:
-                    ec2_instance_id = url.read().decode('utf-8')
-                click.echo(f'EC2 Runtime detected.')
-                client = boto3.client('ec2')
-                # default is stop
-                if ec2_policy == None or ec2_policy == 'stop':
-                    click.echo("Stopping...")
-                    client.stop_instances(InstanceIds=[ec2_instance_id], DryRun=False)
-                else:
-                    click.echo("Terminating...")
-                    client.terminate_instances(InstanceIds=[ec2_instance_id], DryRun=False)
-            except URLError:
-                click.echo('No EC2 runtime detected. Doing nothing.')
-        else:
-            click.echo('Not checking for EC2 runtime since policy is to keep running.')
+        _apply_shutdown_policy(ti.config.get('ec2_policy'))
     return result
 
 
 ### HELPERS ###
-def _upload_result(result: TrainOutput, metadata: dict, plugin_metadata: dict):
+def _upload_result(result: TrainOutput, metadata: dict, plugin_metadata: dict, uuid: str = None, 
+                    watcher: ArtifactWatcher = None):
     """ Wraps upload procedure into single function for use with cli_spinner.
 
-    Generates a UUID for the model and uploads all artifacts.
+    Uploads all artifacts under the UUID of the model.
 
     Args:
         result (TrainOutput): TrainOutput object, to be uploaded
         metadata (dict): metadata associated with this run, to be uploaded
         plugin_metadata (dict): plugin metadata, used to access architecture of run
             for naming uploading model
+        uuid (str, optional): UUID of the model, generated if not given
+        watcher (ArtifactWatcher, optional): watcher which streamed artifacts during training,
+            extra files it uploaded which are unchanged since are not uploaded again
     
     Returns:
         str: uuid assigned to result on upload
     """
-    shortuuid.set_alphabet('23456789abcdefghijkmnopqrstuvwxyz')
-    uuid = shortuuid.uuid()
+    uuid = uuid or new_model_uuid()
     file_extension = os.path.splitext(result.model_path)[1]
     model_name = f'{plugin_metadata["architecture"]}_{uuid}{file_extension}'
     upload_file_to_s3('models', result.model_path, alternate_name=model_name)
     upload_dict_to_s3_as_json(f'models/metadata_{uuid}', metadata)
     if result.extra_files != []:
         for fp in result.extra_files:
+            # skipped only if streamed to the key it would be uploaded to here
+            if watcher is not None and watcher.uploaded_key(fp) == f'extras/{uuid}/{Path(fp).name}':
+                continue
             upload_file_to_s3(f'extras/{uuid}', fp)
     return uuid
+
+def _upload_files(prefix: str, file_paths: list):
+    """ Uploads files to the model bucket under a prefix, for use with cli_spinner.
+
+    Args:
+        prefix (str): prefix for filenames on S3
+        file_paths (list): paths to files
+    """
+    for fp in file_paths:
+        upload_file_to_s3(prefix, fp)
+
+def _sweep(ctx: click.Context, config: dict, sweep_path: str) -> int:
+    """ Runs a sweep of the invoked plugin command over the given config.
+
+    Everything the runs share is resolved once here: user defined metadata is
+    prompted for, the dataset is downloaded and ravenml git info is captured.
+
+    Args:
+        ctx (Context): click context object
+        config (dict): base training config
+        sweep_path (str): path to sweep file
+
+    Returns:
+        int: exit code, nonzero if any run failed
+    """
+    try:
+        sweep = load_sweep(Path(sweep_path))
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        raise click.exceptions.BadParameter(sweep_path, param=sweep_path, param_hint=f'sweep, {e}. Sweep was')
+    # runs are not interactive, so prompt for user defined metadata up front
+    metadata = config.setdefault('metadata', {})
+    if not metadata.get('created_by'):
+        metadata['created_by'] = user_input('Please enter your first and last name:')
+    if not metadata.get('comments'):
+        metadata['comments'] = user_input('Please enter descriptive comments about this training:')
+    dataset_name = config.get('dataset')
+    if dataset_name is None:
+        dataset_options = cli_spinner('No dataset provided. Finding datasets on S3...', get_dataset_names)
+        dataset_name = user_selects('Choose dataset:', dataset_options)
+    try:
+        dataset = cli_spinner(f'Downloading {dataset_name} from S3...', get_dataset, dataset_name,
+                                config.get('offline'))
+    except ValueError:
+        hint = 'dataset name, no such dataset exists on S3'
+        raise click.exceptions.BadParameter(dataset_name, param=dataset_name, param_hint=hint)
+    shared = {
+        'sweep_id': new_model_uuid(),
+        'dataset': {'name': dataset.name, 'path': str(dataset.path)},
+        'git_info': ravenml_git_info()
+    }
+    start_environment_detection()
+    click.echo(f'Starting sweep {shared["sweep_id"]}...')
+    results = run_sweep(sweep, config, shared, ctx.meta['subcommand_args'])
+    click.echo(format_summary(results))
+    _apply_shutdown_policy(config.get('ec2_policy'))
+    return 0 if all(result['returncode'] == 0 for result in results) else 1
+
+def _apply_shutdown_policy(ec2_policy: str):
+    """ Stops, terminates, or does nothing to the cloud instance training ran on, if any.
+
+    Args:
+        ec2_policy (str): name of a shutdown policy (see ravenml.utils.environment),
+            None for the default "stop"
+    """
+    click.echo(f'Applying policy "{ec2_policy or "default"}"...')
+    try:
+        click.echo(apply_shutdown_policy(ec2_policy))
+    except ValueError as e:
+        click.echo(f'{e}. Doing nothing.')
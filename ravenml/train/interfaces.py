@@ -8,13 +8,18 @@ import os
 import click
 import shutil
 import inspect
+import json
+import shortuuid
 import ravenml.utils.git as git
 from datetime import datetime
 from pathlib import Path
 from colorama import Fore
 from ravenml.utils.local_cache import RMLCache
 from ravenml.utils.question import cli_spinner, user_input, user_selects, user_confirms
-from ravenml.utils.dataset import get_dataset_names, get_dataset
+from ravenml.utils.dataset import get_dataset_names, get_dataset, prefetch_dataset
+from ravenml.utils.config import get_config
+from ravenml.train.watcher import ArtifactWatcher
+from ravenml.train.sweep import SWEEP_FIELD
 from ravenml.data.interfaces import Dataset
 
 class TrainInput(object):
@@ -34,7 +39,9 @@ class TrainInput(object):
         artifact_path (Path): path to save artifacts. Points to temp/ inside
             the root of plugin_cache if uploading to S3, otherwise points
             to user defined local path.
-        dataset (Dataset): Dataset object for this training run.
+        dataset (Dataset): Dataset object for this training run. Unless the config sets
+            "prefetch_dataset" to false, a PrefetchedDataset still downloading in the
+            background, whose path blocks until the download completes.
         metadata (dict): dictionary of metadata about this training.
             Automatically populated with common data, plugins add more as needed.
         plugin_metadata (dict): dictionary within full metadata dict where plugins
@@ -42,6 +49,11 @@ class TrainInput(object):
             attribute as it will break the relationship between plugin_metadata and metadata.
         plugin_config (dict): plugin section of config dict. Plugins look here
             for plugin-specific configuration.
+        sweep (dict): shared state of the sweep this training is a run of (see
+            ravenml.train.sweep), None if it is not part of a sweep
+        uuid (str): UUID the trained model is uploaded under
+        artifact_watcher (ArtifactWatcher): watcher streaming artifacts to S3 during training
+            when the config sets "artifact_watcher" and artifacts are uploaded, otherwise None
     """
     def __init__(self, config:dict=None, plugin_name:str=None):
         """ Keyword args must be used for this class to work with the @pass_train pass decorator.
@@ -69,6 +81,8 @@ class TrainInput(object):
 
         ## Store config
         self.config = config
+        # runs of a sweep reuse the dataset and provenance resolved once for the sweep
+        self.sweep = config.get(SWEEP_FIELD)
         
         ## Set up Local Cache
         # TODO: maybe create the subdir here?
@@ -78,9 +92,11 @@ class TrainInput(object):
         ## Set up Artifact Path
         ap = config.get('artifact_path')
         if ap is None:
-            self.plugin_cache.ensure_clean_subpath('temp')
-            self.plugin_cache.ensure_subpath_exists('temp')
-            self.artifact_path = Path(self.plugin_cache.path / 'temp')
+            # concurrent runs of a sweep each need their own directory
+            temp_dir = f'temp_{self.sweep["sweep_id"]}_{self.sweep["run"]}' if self.sweep else 'temp'
+            self.plugin_cache.ensure_clean_subpath(temp_dir)
+            self.plugin_cache.ensure_subpath_exists(temp_dir)
+            self.artifact_path = Path(self.plugin_cache.path / temp_dir)
         else:
             ap = Path(os.path.expanduser(ap))
             # check if local path contains data
@@ -99,15 +115,28 @@ class TrainInput(object):
         ## Set up Dataset
         # prompt for dataset if not provided
         dataset_name = config.get('dataset')
-        if dataset_name is None:
+        if self.sweep:
+            dataset_name = self.sweep['dataset']['name']
+        elif dataset_name is None:
             dataset_options = cli_spinner('No dataset provided. Finding datasets on S3...', get_dataset_names)
             dataset_name = user_selects('Choose dataset:', dataset_options)
-        # download dataset and populate field
+        # download dataset and populate field. By default the download runs in the background
+        # while the user is prompted and the plugin sets up, blocking at first access of dataset.path
         try:
-            self.dataset = cli_spinner(f'Downloading {dataset_name} from S3...', 
-                get_dataset, dataset_name)
+            if self.sweep:
+                dataset_path = Path(self.sweep['dataset']['path'])
+                with open(dataset_path / 'metadata.json', 'r') as f:
+                    self.dataset = Dataset(dataset_name, json.load(f), dataset_path)
+            elif config.get('prefetch_dataset', True):
+                self.dataset = cli_spinner(f'Fetching {dataset_name} metadata from S3...',
+                    prefetch_dataset, dataset_name, config.get('offline'))
+            else:
+                self.dataset = cli_spinner(f'Downloading {dataset_name} from S3...', 
+                    get_dataset, dataset_name, config.get('offline'))
         except ValueError as e:
             hint = 'dataset name, no such dataset exists on S3'
+            if config.get('offline'):
+                hint = 'dataset name, dataset is not completely downloaded for offline use'
             raise click.exceptions.BadParameter(dataset_name, param=dataset_name, param_hint=hint)
     
         ## Set up Basic Metadata
@@ -122,21 +151,10 @@ class TrainInput(object):
         # handle automatic metadata fields
         self.metadata['date_started_at'] = datetime.utcnow().isoformat() + "Z"
         self.metadata['dataset_used'] = self.dataset.metadata
-        # find ravenml directory
-        # when in an editable install, file is at:
-        #   ravenml/ravenml/data/write_dataset (must go up 3 levels)
-        # when in site-packages, file is at:
-        #   ravenml/data/write_dataset (must go up 2 levels)
-        # start two levels up and do a check at 3 levels up
-        rml_dir = Path(__file__).resolve().parent.parent
-        git_info = {}
-        if git.is_repo(rml_dir.parent):
-            rml_dir = rml_dir.parent
-            git_info['ravenml_git_sha'] = git.git_sha(rml_dir)
-            git_info['ravenml_tracked_git_patch'] = git.git_patch_tracked(rml_dir)
-            git_info['ravenml_untracked_git_patch'] = git.git_patch_untracked(rml_dir)
-        else:
-            git_info = git.retrieve_from_pkg(rml_dir)
+        if self.sweep:
+            self.metadata['sweep'] = {'id': self.sweep['sweep_id'], 'run': self.sweep['run'], 
+                                        'overrides': self.sweep['overrides']}
+        git_info = self.sweep['git_info'] if self.sweep else ravenml_git_info()
         self.metadata.update(git_info)
         # NOTE: plugin git data cannot be found yet, must wait until after plugin
         # calls are on the stack for inspection. We add plugin git info when processing results 
@@ -153,7 +171,53 @@ class TrainInput(object):
             raise click.exceptions.BadParameter(config, param=config, param_hint='config, no "plugin" field. Config was')
         else:
             self.plugin_config = config.get('plugin') 
+
+        ## Set up Artifact Streaming
+        # the UUID is known up front so artifacts can be uploaded under it during training
+        self.uuid = new_model_uuid()
+        self.artifact_watcher = None
+        if config.get('artifact_watcher') and not config.get('artifact_path'):
+            try:
+                self.artifact_watcher = ArtifactWatcher.from_config(config['artifact_watcher'], self.artifact_path,
+                                            get_config()['model_bucket_name'], f'extras/{self.uuid}')
+            except ValueError as e:
+                raise click.exceptions.BadParameter(config, param=config, param_hint=f'config, {e}. Config was')
+            self.artifact_watcher.start()
+            click.echo(f'Streaming artifacts to extras/{self.uuid}')
             
+def ravenml_git_info() -> dict:
+    """Captures the git state of ravenml for training metadata.
+
+    Returns:
+        dict: git sha and patches of ravenml, or the git info recorded in the package
+            when ravenml is not installed from source
+    """
+    # find ravenml directory
+    # when in an editable install, file is at:
+    #   ravenml/ravenml/train/interfaces (must go up 3 levels)
+    # when in site-packages, file is at:
+    #   ravenml/train/interfaces (must go up 2 levels)
+    # start two levels up and do a check at 3 levels up
+    rml_dir = Path(__file__).resolve().parent.parent
+    git_info = {}
+    if git.is_repo(rml_dir.parent):
+        rml_dir = rml_dir.parent
+        git_info['ravenml_git_sha'] = git.git_sha(rml_dir)
+        git_info['ravenml_tracked_git_patch'] = git.git_patch_tracked(rml_dir)
+        git_info['ravenml_untracked_git_patch'] = git.git_patch_untracked(rml_dir)
+    else:
+        git_info = git.retrieve_from_pkg(rml_dir)
+    return git_info
+
+def new_model_uuid() -> str:
+    """Generates the UUID a trained model is uploaded under.
+
+    Returns:
+        str: short UUID
+    """
+    shortuuid.set_alphabet('23456789abcdefghijkmnopqrstuvwxyz')
+    return shortuuid.uuid()
+
 class TrainOutput(object):
     """Represents a training output. Plugin training command functions return this object
     so it can be processed by the `process_result` callback registed on the train command.
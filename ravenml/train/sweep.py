@@ -0,0 +1,213 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Hyperparameter sweeps: many trainings from one base config, run as concurrent worker
+processes which share one downloaded dataset and one capture of git provenance.
+
+A sweep file gives the overrides of each run as dotted config paths, either as a grid
+whose every combination is run, a list of runs, or both:
+    parameters:
+      plugin.learning_rate: [0.01, 0.001]
+      plugin.batch_size: [16, 32]
+    runs:
+      - {plugin.optimizer: sgd}
+    slots_per_run: 2        # CPUs given to each run, default 1
+    max_slots: 8            # CPUs used by the sweep, defaults to the CPU count
+Each run gets its own config in the sweep directory, with the shared state in the
+reserved SWEEP_FIELD section which TrainInput reads instead of resolving it again.
+"""
+
+import os
+import sys
+import copy
+import time
+import json
+import itertools
+import subprocess
+import yaml
+from pathlib import Path
+from ravenml.utils.local_cache import RMLCache
+
+sweep_cache = RMLCache('sweeps')
+# reserved training config section holding the state shared by the runs of a sweep
+SWEEP_FIELD = '_sweep'
+SWEEP_FIELDS = {'parameters', 'runs', 'slots_per_run', 'max_slots'}
+# environment variables limiting the threads of common numerical libraries
+THREAD_VARIABLES = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS',
+                    'TF_NUM_INTRAOP_THREADS']
+# line printed by the train command once a model is uploaded
+UUID_LINE_PREFIX = 'Artifact UUID: '
+
+
+### PUBLIC METHODS ###
+def load_sweep(path: Path) -> dict:
+    """Loads and checks a sweep file.
+
+    Args:
+        path (Path): path to the sweep YAML file
+
+    Returns:
+        dict: the sweep
+
+    Raises:
+        ValueError: if the sweep file is malformed or defines no runs
+    """
+    with open(path, 'r') as f:
+        sweep = yaml.safe_load(f) or {}
+    if not isinstance(sweep, dict):
+        raise ValueError('sweep must be a mapping')
+    unknown = set(sweep) - SWEEP_FIELDS
+    if unknown:
+        raise ValueError(f'Unknown sweep fields {sorted(unknown)}')
+    if not isinstance(sweep.get('parameters', {}), dict) or not all(
+            isinstance(values, list) and values for values in sweep.get('parameters', {}).values()):
+        raise ValueError('sweep "parameters" must map config paths to non-empty lists of values')
+    if not isinstance(sweep.get('runs', []), list) or not all(isinstance(run, dict) for run in sweep.get('runs', [])):
+        raise ValueError('sweep "runs" must be a list of mappings')
+    if not expand_runs(sweep):
+        raise ValueError('sweep defines no runs')
+    if sweep.get('slots_per_run', 1) > sweep.get('max_slots', os.cpu_count()):
+        raise ValueError('sweep "slots_per_run" exceeds "max_slots"')
+    return sweep
+
+def expand_runs(sweep: dict) -> list:
+    """Expands a sweep into the overrides of each run.
+
+    Args:
+        sweep (dict): sweep (see load_sweep)
+
+    Returns:
+        list: dicts of dotted config paths and values, the runs listed in "runs"
+            followed by every combination of "parameters"
+    """
+    runs = [dict(run) for run in sweep.get('runs', [])]
+    parameters = sweep.get('parameters', {})
+    if parameters:
+        names = list(parameters)
+        runs += [dict(zip(names, values)) for values in itertools.product(*parameters.values())]
+    return runs
+
+def apply_overrides(config: dict, overrides: dict) -> dict:
+    """Applies dotted path overrides to a copy of a config.
+
+    Args:
+        config (dict): base config
+        overrides (dict): dotted config paths (i.e, "plugin.learning_rate") and values
+
+    Returns:
+        dict: the new config
+    """
+    config = copy.deepcopy(config)
+    for path, value in overrides.items():
+        *parents, name = path.split('.')
+        section = config
+        for parent in parents:
+            section = section.setdefault(parent, {})
+        section[name] = value
+    return config
+
+def run_sweep(sweep: dict, base_config: dict, shared: dict, command: list) -> list:
+    """Runs the trainings of a sweep as concurrent worker processes.
+
+    At most max_slots // slots_per_run trainings run at once, each pinned to its own
+    slots_per_run CPUs (where supported) with thread counts of numerical libraries
+    limited to match.
+
+    Args:
+        sweep (dict): sweep (see load_sweep)
+        base_config (dict): training config the runs override
+        shared (dict): state shared by the runs (dataset and provenance), stored in the
+            SWEEP_FIELD section of every run's config
+        command (list): plugin command and arguments run by each worker (i.e, ["tf-bbox", "train"])
+
+    Returns:
+        list: dicts describing each run: "run", "overrides", "returncode", "seconds", "uuid"
+            (None if nothing was uploaded), "log" and "artifact_path" (None if uploaded)
+    """
+    sweep_id = shared['sweep_id']
+    sweep_path = sweep_cache.path / sweep_id
+    runs = expand_runs(sweep)
+    slots_per_run = sweep.get('slots_per_run', 1)
+    max_slots = sweep.get('max_slots', os.cpu_count())
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count()))
+    # groups of CPUs handed to one run at a time
+    free_slots = [cpus[i:i + slots_per_run] for i in range(0, min(max_slots, len(cpus)) - slots_per_run + 1, slots_per_run)]
+    free_slots = free_slots or [cpus[:slots_per_run]]
+
+    pending = list(enumerate(runs))
+    running = {}
+    results = [None] * len(runs)
+    while pending or running:
+        while pending and free_slots:
+            index, overrides = pending.pop(0)
+            slot = free_slots.pop(0)
+            running[index] = (_start_run(sweep_path, index, overrides, base_config, shared, command, slot), slot, time.time())
+        for index, (process, slot, started) in list(running.items()):
+            if process.poll() is None:
+                continue
+            process.log.close()
+            del running[index]
+            free_slots.append(slot)
+            results[index] = _run_result(sweep_path, index, runs[index], base_config, process.returncode, time.time() - started)
+        time.sleep(.2)
+
+    with open(sweep_path / 'summary.json', 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+    return results
+
+def format_summary(results: list) -> str:
+    """Formats the results of a sweep as a table.
+
+    Args:
+        results (list): results returned by run_sweep
+
+    Returns:
+        str: table with one line per run
+    """
+    lines = [['RUN', 'STATUS', 'SECONDS', 'RESULT', 'OVERRIDES']]
+    for result in results:
+        status = 'ok' if result['returncode'] == 0 else f'failed ({result["returncode"]})'
+        outcome = result['uuid'] or result['artifact_path'] or result['log']
+        overrides = ' '.join(f'{path}={value}' for path, value in result['overrides'].items())
+        lines.append([str(result['run']), status, f'{result["seconds"]:.0f}', str(outcome), overrides])
+    widths = [max(len(line[i]) for line in lines) for i in range(len(lines[0]))]
+    return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip() for line in lines)
+
+
+### HELPERS ###
+def _run_config(index: int, overrides: dict, base_config: dict, shared: dict) -> dict:
+    config = apply_overrides(base_config, overrides)
+    config[SWEEP_FIELD] = dict(shared, run=index, overrides=overrides)
+    # the sweep applies the EC2 policy once all runs are done
+    config['ec2_policy'] = 'keep'
+    if base_config.get('artifact_path'):
+        config['artifact_path'] = str(Path(os.path.expanduser(base_config['artifact_path'])) / f'run_{index}')
+        config['overwrite_local'] = True
+    return config
+
+def _start_run(sweep_path: Path, index: int, overrides: dict, base_config: dict, shared: dict, command: list,
+                slot: list) -> subprocess.Popen:
+    run_path = sweep_path / f'run_{index}'
+    os.makedirs(run_path, exist_ok=True)
+    with open(run_path / 'config.yml', 'w') as f:
+        yaml.safe_dump(_run_config(index, overrides, base_config, shared), f)
+    env = dict(os.environ, **{variable: str(len(slot)) for variable in THREAD_VARIABLES})
+    args = [sys.executable, '-c', 'from ravenml.cli import cli; cli()', 'train', '--config', str(run_path / 'config.yml')] + command
+    preexec_fn = (lambda: os.sched_setaffinity(0, slot)) if hasattr(os, 'sched_setaffinity') else None
+    log = open(run_path / 'train.log', 'w')
+    process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, env=env,
+                                preexec_fn=preexec_fn)
+    process.log = log
+    return process
+
+def _run_result(sweep_path: Path, index: int, overrides: dict, base_config: dict, returncode: int, seconds: float) -> dict:
+    log_path = sweep_path / f'run_{index}' / 'train.log'
+    uuid = None
+    with open(log_path, 'r', errors='replace') as f:
+        for line in f:
+            if UUID_LINE_PREFIX in line:
+                uuid = line.split(UUID_LINE_PREFIX, 1)[1].strip()
+    artifact_path = _run_config(index, overrides, base_config, {}).get('artifact_path') if base_config.get('artifact_path') else None
+    return {'run': index, 'overrides': overrides, 'returncode': returncode, 'seconds': seconds, 'uuid': uuid,
+            'log': str(log_path), 'artifact_path': artifact_path}
@@ -0,0 +1,224 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Background upload of training artifacts while training runs.
+
+Enabled by the "artifact_watcher" field of the training config, either true for the
+defaults or a dict:
+    artifact_watcher:
+      interval: 60                  # seconds between scans of the artifact directory
+      max_bandwidth: 20MB           # bytes per second, unlimited if omitted
+      patterns: ['*.ckpt*', 'events.out.tfevents*']     # files to stream, see DEFAULT_PATTERNS
+Files are uploaded to extras/<uuid>/<filename> once they are unchanged between two scans,
+so files still being written are not uploaded. This is the key the extra files of the
+training result are uploaded to when training ends, which skips files the watcher already
+uploaded. As there, files with the same name in different directories share one key.
+When the watcher stops, uploaded files which were removed since (i.e checkpoints rotated
+out by training) or are not among the extra files of the training result are deleted.
+"""
+
+import os
+import threading
+from fnmatch import fnmatch
+from pathlib import Path
+from botocore.exceptions import BotoCoreError, ClientError
+from ravenml.utils.aws import TokenBucket, ThrottledReader, scheduler
+from ravenml.utils.storage import storage_driver
+from ravenml.utils.memory import parse_size
+
+WATCHER_FIELDS = {'interval', 'max_bandwidth', 'patterns'}
+# checkpoints and event logs, rather than every scratch file in the artifact directory
+DEFAULT_PATTERNS = ['*.ckpt*', 'checkpoint', 'events.out.tfevents*', '*.h5', '*.pt', '*.pth']
+
+
+class ArtifactWatcher(object):
+    """Periodically uploads new and changed files in an artifact directory.
+
+    Args:
+        artifact_path (Path): directory to watch
+        bucket_name (str): bucket to upload to
+        prefix (str): prefix files are uploaded under
+        interval (float, optional): seconds between scans, default 60
+        max_bandwidth (str or int, optional): upload rate limit in bytes per second
+            (i.e, "20MB"), unlimited if None
+        patterns (list, optional): glob patterns of the file names or relative paths
+            to upload, DEFAULT_PATTERNS if None
+
+    Attributes:
+        uploaded (dict): relative path of every uploaded file mapped to the (size, mtime)
+            it had when uploaded
+        errors (list): errors of failed uploads, retried at the next scan
+    """
+    def __init__(self, artifact_path: Path, bucket_name: str, prefix: str, interval: float = 60,
+                    max_bandwidth=None, patterns: list = None):
+        self.artifact_path = Path(artifact_path)
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.interval = interval
+        self.patterns = patterns or DEFAULT_PATTERNS
+        rate = parse_size(max_bandwidth)
+        self._bucket = TokenBucket(rate) if rate else None
+        self.uploaded = {}
+        self.errors = []
+        # stat of files at the previous scan, a file is uploaded once its stat stops changing
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, watcher_config, artifact_path: Path, bucket_name: str, prefix: str) -> 'ArtifactWatcher':
+        """Creates a watcher from the "artifact_watcher" field of a training config.
+
+        Args:
+            watcher_config (bool or dict): true for defaults, or a dict of WATCHER_FIELDS
+            artifact_path (Path): directory to watch
+            bucket_name (str): bucket to upload to
+            prefix (str): prefix files are uploaded under
+
+        Returns:
+            ArtifactWatcher: the watcher, not yet started
+
+        Raises:
+            ValueError: if the field is malformed
+        """
+        watcher_config = {} if watcher_config is True else watcher_config
+        if not isinstance(watcher_config, dict):
+            raise ValueError('artifact_watcher must be true or a mapping')
+        unknown = set(watcher_config) - WATCHER_FIELDS
+        if unknown:
+            raise ValueError(f'Unknown artifact_watcher fields {sorted(unknown)}')
+        return cls(artifact_path, bucket_name, prefix, **watcher_config)
+
+    def start(self) -> 'ArtifactWatcher':
+        """Starts scanning in a background daemon thread.
+
+        Returns:
+            ArtifactWatcher: self
+        """
+        self._thread = threading.Thread(target=self._run, name='artifact-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, keep: list = None) -> list:
+        """Stops the background thread, uploads all remaining changes and deletes uploaded
+        files which are no longer wanted, see prune.
+
+        Args:
+            keep (list, optional): paths of the files to keep, see prune
+
+        Returns:
+            list: relative paths uploaded by the final scan
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        uploaded = self.scan(flush=True)
+        self.prune(keep)
+        return uploaded
+
+    def scan(self, flush: bool = False) -> list:
+        """Uploads files which are new or changed since they were last uploaded.
+
+        Args:
+            flush (bool, optional): upload changed files even if they changed since the
+                previous scan, default False
+
+        Returns:
+            list: relative paths of the files uploaded
+        """
+        with self._lock:
+            current = self._stat_files()
+            changed = [path for path, stat in current.items() if self.uploaded.get(path) != stat
+                        and (flush or self._seen.get(path) == stat)]
+            self._seen = current
+            done = []
+            for path in changed:
+                try:
+                    self._upload(path)
+                except (BotoCoreError, ClientError, OSError) as e:
+                    self.errors.append(e)
+                    continue
+                self.uploaded[path] = current[path]
+                done.append(path)
+            return done
+
+    def prune(self, keep: list = None) -> list:
+        """Deletes uploaded files which were removed from the artifact directory since, or
+        are not to be kept.
+
+        Args:
+            keep (list, optional): paths of the files to keep (i.e, the extra files of the
+                training result), matched by filename as they share keys. Every file still
+                in the artifact directory is kept if None.
+
+        Returns:
+            list: keys deleted
+        """
+        with self._lock:
+            if keep is None:
+                kept = {self._key(path) for path in self._stat_files()}
+            else:
+                kept = {self._key(path) for path in keep}
+            deleted = set()
+            for path in [path for path in self.uploaded if self._key(path) not in kept]:
+                key = self._key(path)
+                if key not in deleted:
+                    try:
+                        storage_driver(self.bucket_name).delete(self.bucket_name, key)
+                    except (BotoCoreError, ClientError) as e:
+                        self.errors.append(e)
+                        continue
+                    deleted.add(key)
+                del self.uploaded[path]
+            return sorted(deleted)
+
+    def uploaded_key(self, path: Path) -> str:
+        """Finds the key a file was uploaded to, if it is unchanged since.
+
+        Args:
+            path (Path): path to a file
+
+        Returns:
+            str: key of the file in the bucket, None if the file is outside the artifact
+                directory, was not uploaded, or changed since it was uploaded
+        """
+        try:
+            relative_path = Path(path).resolve().relative_to(self.artifact_path.resolve()).as_posix()
+            stat = os.stat(path)
+        except (ValueError, OSError):
+            return None
+        with self._lock:
+            if self.uploaded.get(relative_path) != (stat.st_size, stat.st_mtime_ns):
+                return None
+        return self._key(relative_path)
+
+    def _key(self, path) -> str:
+        return f'{self.prefix}/{Path(path).name}'
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.scan()
+
+    def _stat_files(self) -> dict:
+        files = {}
+        for root, _, names in os.walk(self.artifact_path):
+            for name in names:
+                path = Path(root) / name
+                relative_path = path.relative_to(self.artifact_path).as_posix()
+                if not any(fnmatch(name, pattern) or fnmatch(relative_path, pattern) for pattern in self.patterns):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:     # removed while scanning
+                    continue
+                files[relative_path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def _upload(self, relative_path: str):
+        with open(self.artifact_path / relative_path, 'rb') as f, scheduler.transfer('artifacts'):
+            # under both the watcher's own limit and the machine wide transfer caps
+            fileobj = scheduler.reader(f, 'artifacts')
+            fileobj = ThrottledReader(fileobj, self._bucket) if self._bucket else fileobj
+            storage_driver(self.bucket_name).put(self.bucket_name, self._key(relative_path), fileobj)
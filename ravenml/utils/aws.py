@@ -1,75 +1,537 @@
+import io
 import os
-import boto3
+import time
+import shutil
 import json
-import subprocess
+import atexit
+import threading
+from contextlib import contextmanager, closing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from ravenml.utils.config import get_config
-from ravenml.utils.local_cache import RMLCache
+from botocore.exceptions import ClientError, BotoCoreError
+from ravenml.utils.config import get_config, get_optional_field
+from ravenml.utils.local_cache import RMLCache, partial_path
+from ravenml.utils.memory import parse_size
+from ravenml.utils.profile import timed
+from ravenml.utils.progress import progress
+from ravenml.utils.metrics import metrics, record_cache
+from ravenml.utils.storage import storage_driver, s3_client
+from ravenml.utils.checksum import (MANIFEST_FILENAME, BLOCK_SIZE, ChecksumError, HashingReader, default_algorithm,
+                                    new_hasher, hash_file, records_match, read_manifest, update_manifest,
+                                    write_manifest, verify_directory)
+
+# suffix of the file stored next to a cached object recording its ETag
+VALIDATOR_SUFFIX = '.etag'
+
+# heartbeats of the ravenml processes on this machine with transfers in flight
+transfer_cache = RMLCache('transfers')
+# transfer priority classes, most urgent first
+PRIORITIES = {'metadata': 0, 'artifacts': 1, 'bulk': 2}
+# seconds between heartbeats of a process with transfers in flight, and after which
+# a process without a heartbeat no longer takes a share of the transfer caps
+HEARTBEAT_INTERVAL = 2
+HEARTBEAT_TIMEOUT = 10
+HEARTBEAT_SUFFIX = '.heartbeat'
+
+class TokenBucket(object):
+    """Thread safe token bucket limiting the rate of transfers.
+
+    Args:
+        rate (float): tokens (bytes) added per second
+        capacity (float, optional): largest burst, defaults to one second worth of tokens
+    """
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        # number of acquirers waiting at each priority
+        self._waiting = {}
+
+    def acquire(self, amount: float, priority: int = 0):
+        """Takes tokens from the bucket, blocking until enough are available.
+        Requests larger than the capacity are let through once the bucket is full.
+        While acquirers of a more urgent (lower) priority wait, others wait behind them.
+
+        Args:
+            amount (float): number of tokens to take
+            priority (int, optional): Defaults to 0. Priority of the request.
+        """
+        with self._condition:
+            self._waiting[priority] = self._waiting.get(priority, 0) + 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    needed = min(amount, self.capacity)
+                    ahead = any(count for other, count in self._waiting.items() if other < priority)
+                    if self._tokens >= needed and not ahead:
+                        self._tokens -= amount
+                        return
+                    # woken early when a more urgent acquirer is served
+                    shortfall = needed - self._tokens if self._tokens < needed else needed
+                    self._condition.wait(shortfall / self.rate)
+            finally:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+
+    def set_rate(self, rate: float):
+        """Changes the rate of the bucket, and its capacity to one second worth of tokens.
+
+        Args:
+            rate (float): tokens (bytes) added per second
+        """
+        with self._condition:
+            self.rate = self.capacity = rate
+            self._tokens = min(self._tokens, self.capacity)
+            self._condition.notify_all()
+
+
+class ThrottledReader(object):
+    """Wraps a binary file object, limiting how fast it is read with a TokenBucket.
+
+    Args:
+        fileobj (file): binary file object to read from
+        bucket (TokenBucket): bucket shared by all throttled transfers
+        priority (int, optional): Defaults to 0. Priority of the reads, see TokenBucket.acquire.
+    """
+    def __init__(self, fileobj, bucket: TokenBucket, priority: int = 0):
+        self._fileobj = fileobj
+        self._bucket = bucket
+        self._priority = priority
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self._bucket.acquire(len(data), self._priority)
+        return data
+
+
+class TransferScheduler(object):
+    """Schedules the S3 transfers of ravenml under caps on bandwidth and concurrent
+    transfers shared by every ravenml process on the machine.
+
+    Each transfer holds a slot for its duration and, when bandwidth is capped, takes
+    tokens for the bytes it moves. Both go to the most urgent class of transfer waiting
+    (see PRIORITIES): metadata before model artifacts before bulk imageset and dataset
+    files. Processes with transfers in flight touch a heartbeat file in transfer_cache,
+    and each takes an equal share of the caps among processes with a recent heartbeat.
+
+    The caps are read from the "max_bandwidth" and "max_transfers" fields of the ravenml
+    config at the first transfer, unless configure is called first.
+
+    Attributes:
+        max_bandwidth (int): bytes per second shared by all processes, None if unlimited
+        max_transfers (int): concurrent transfers shared by all processes, None if unlimited
+        peers (int): number of processes sharing the caps, including this one
+    """
+    def __init__(self):
+        self.max_bandwidth = None
+        self.max_transfers = None
+        self.peers = 1
+        self._configured = False
+        self._bucket = None
+        self._active = 0
+        self._waiting = {}
+        self._condition = threading.Condition()
+        self._last_heartbeat = None
+        self._heartbeat_path = None
+
+    def configure(self, max_bandwidth=None, max_transfers: int = None):
+        """Sets the caps of this machine.
+
+        Args:
+            max_bandwidth (str or int, optional): bytes per second, i.e "50MB", unlimited if omitted
+            max_transfers (int, optional): concurrent transfers, unlimited if omitted
+
+        Raises:
+            ValueError: if max_bandwidth is not a valid size
+        """
+        self.max_bandwidth = parse_size(max_bandwidth) or None
+        self.max_transfers = int(max_transfers) if max_transfers else None
+        self.peers = 1
+        self._bucket = TokenBucket(self.max_bandwidth) if self.max_bandwidth else None
+        self._last_heartbeat = None
+        self._configured = True
+
+    @contextmanager
+    def transfer(self, priority: str = 'bulk'):
+        """Context manager holding a transfer slot for the enclosed block, waiting for one
+        if the concurrency cap is reached.
+
+        Args:
+            priority (str, optional): Defaults to "bulk". Class of the transfer, one of PRIORITIES.
+        """
+        rank = PRIORITIES[priority]
+        self._ensure_configured()
+        self._heartbeat()
+        started = time.monotonic()
+        with self._condition:
+            self._waiting[rank] = self._waiting.get(rank, 0) + 1
+            try:
+                while not self._may_start(rank):
+                    # timeout so changes of this process' share are noticed
+                    self._condition.wait(HEARTBEAT_INTERVAL)
+                self._active += 1
+            finally:
+                self._waiting[rank] -= 1
+                self._condition.notify_all()
+        waited = time.monotonic() - started
+        if waited >= 0.001:
+            metrics.increment('transfer_wait_seconds_total', waited, priority=priority)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def throttle(self, nbytes: int, priority: str = 'bulk'):
+        """Waits until nbytes may be transferred under the bandwidth cap.
+
+        Args:
+            nbytes (int): number of bytes about to be transferred
+            priority (str, optional): Defaults to "bulk". Class of the transfer.
+        """
+        self._ensure_configured()
+        if self._bucket is not None:
+            self._heartbeat()
+            self._bucket.acquire(nbytes, PRIORITIES[priority])
+
+    def reader(self, fileobj, priority: str = 'bulk'):
+        """Wraps a file object being uploaded so it is read under the bandwidth cap.
+
+        Args:
+            fileobj (file): binary file object to upload
+            priority (str, optional): Defaults to "bulk". Class of the transfer.
+
+        Returns:
+            file: throttled file object, or fileobj if bandwidth is unlimited
+        """
+        self._ensure_configured()
+        return ThrottledReader(fileobj, self._bucket, PRIORITIES[priority]) if self._bucket else fileobj
+
+    def _ensure_configured(self):
+        if self._configured:
+            return
+        try:
+            config = get_config()
+            self.configure(get_optional_field(config, 'max_bandwidth'), get_optional_field(config, 'max_transfers'))
+        except (ValueError, FileNotFoundError):
+            self.configure()
+
+    def _may_start(self, rank: int) -> bool:
+        limit = max(1, self.max_transfers // self.peers) if self.max_transfers else None
+        ahead = any(count for other, count in self._waiting.items() if other < rank)
+        return (limit is None or self._active < limit) and not ahead
+
+    def _heartbeat(self):
+        # touches this process' heartbeat and recounts the processes sharing the caps
+        now = time.monotonic()
+        if not (self.max_bandwidth or self.max_transfers) or \
+                (self._last_heartbeat is not None and now - self._last_heartbeat < HEARTBEAT_INTERVAL):
+            return
+        self._last_heartbeat = now
+        try:
+            transfer_cache.ensure_exists()
+            if self._heartbeat_path is None:
+                atexit.register(self._remove_heartbeat)
+            self._heartbeat_path = transfer_cache.path / f'{os.getpid()}{HEARTBEAT_SUFFIX}'
+            self._heartbeat_path.touch()
+            peers = _live_heartbeats(transfer_cache.path)
+        except OSError:
+            # no shared directory, the process keeps the whole caps
+            peers = 1
+        with self._condition:
+            self.peers = max(1, peers)
+            if self._bucket is not None:
+                self._bucket.set_rate(self.max_bandwidth / self.peers)
+            self._condition.notify_all()
+
+    def _remove_heartbeat(self):
+        _remove_quietly(self._heartbeat_path)
+
+# scheduler of every S3 transfer of this process
+scheduler = TransferScheduler()
 
 ### DOWNLOAD FUNCTIONS ###
+@timed()
 def list_top_level_bucket_prefixes(bucket_name: str):
-    """Lists all top level prefixes in an S3 bucket.
+    """Lists all top level prefixes in a bucket.
     
     A top level prefix means it is the first in the chain. This will not list
     any subprefixes. 
     Ex: Bucket contains an element a/b/c/d.json, this function will only list a.
     
     Args:
-        bucket_name (str): name of S3 bucket
+        bucket_name (str): name of bucket (see ravenml.utils.storage)
         
     Returns:
         list: prefix strings
     """
-    S3 = boto3.resource('s3')
-    config = get_config()
-    bucket_contents = S3.meta.client.list_objects(Bucket=bucket_name, Delimiter='/')
-    contents = []
-    if bucket_contents.get('CommonPrefixes') is not None:
-        for obj in bucket_contents.get('CommonPrefixes'):
-            contents.append(obj.get('Prefix')[:-1])
-    return contents
+    with scheduler.transfer('metadata'):
+        return storage_driver(bucket_name).list_prefixes(bucket_name)
     
-def download_prefix(bucket_name: str, prefix: str, cache: RMLCache, custom_path: str = None):
+def list_objects(bucket_name: str, prefix: str) -> list:
+    """Lists every object under a prefix.
+
+    Args:
+        bucket_name (str): name of bucket
+        prefix (str): prefix to list, without a trailing slash
+
+    Returns:
+        list: object summaries (dicts with "Key", "Size", "ETag" and "LastModified")
+    """
+    with scheduler.transfer('metadata'):
+        return storage_driver(bucket_name).list(bucket_name, prefix + '/')
+
+@timed()
+def download_prefix(bucket_name: str, prefix: str, cache: RMLCache, custom_path: str = None, num_threads: int = 10):
     """Downloads all files with the specified prefix into the provided local cache.
 
+    Like "aws s3 sync", files already present locally with the size of their object
+    and at least as recent are not downloaded again. Files are hashed as they are
+    downloaded: if the prefix has a checksum manifest (see ravenml.utils.checksum),
+    downloaded files are checked against it, and otherwise a local manifest of the
+    downloaded files is written, against which the local copy can later be verified.
+
     Args:
         bucket_name (str): name of bucket
         prefix (str): prefix to filter on
         cache (RMLCache): cache to download files to
         custom_path (str, optional): custom subpath in cache
             to download files to
+        num_threads (int, optional): Defaults to 10. Number of concurrent downloads.
     
     Returns:
         bool: T if successful, F if no objects found
+
+    Raises:
+        ChecksumError: if files still do not match the manifest after being downloaded twice
     """
+    if custom_path:
+        local_path = cache.path / custom_path / prefix
+    else:
+        local_path = cache.path / prefix
     try:
-        s3_uri = 's3://' + bucket_name + '/' + prefix 
-        if custom_path:
-            local_path = cache.path / custom_path / prefix
-        else:
-            local_path = cache.path / prefix
+        objects = list_objects(bucket_name, prefix)
+    except ClientError:
+        return False
+    if not objects:
+        return False
+    os.makedirs(local_path, exist_ok=True)
 
-        subprocess.call(["aws", "s3", "sync", s3_uri, str(local_path), '--quiet'])
+    manifest_key = f'{prefix}/{MANIFEST_FILENAME}'
+    remote_manifest = None
+    if any(obj['Key'] == manifest_key for obj in objects):
+        download_object_if_modified(bucket_name, manifest_key, local_path / MANIFEST_FILENAME)
+        remote_manifest = read_manifest(local_path)
+    local_manifest = remote_manifest or read_manifest(local_path)
+    algorithm = local_manifest['algorithm'] if local_manifest else default_algorithm()
+    unverifiable = False
+    try:
+        new_hasher(algorithm)
+    except ValueError:
+        # manifest hashed with an algorithm unavailable here, files can only be downloaded
+        remote_manifest, algorithm, unverifiable = None, default_algorithm(), True
+
+    def download(obj):
+        relative_path = obj['Key'][len(prefix) + 1:]
+        destination = local_path / relative_path
+        modified = obj['LastModified'].timestamp()
+        try:
+            stat = os.stat(destination)
+            if stat.st_size == obj['Size'] and stat.st_mtime >= modified:
+                # already present files count as done, so progress adds up to the total
+                task.advance(nbytes=obj['Size'])
+                return None
+        except OSError:
+            pass
+        record = _download_file(bucket_name, obj['Key'], destination, algorithm, modified)
+        task.advance(nbytes=record['size'])
+        return relative_path, record
+
+    to_download = [obj for obj in objects if obj['Key'] != manifest_key and not obj['Key'].endswith('/')]
+    with progress.task(f'Downloading {prefix}', total=len(to_download), 
+                        total_bytes=sum(obj['Size'] for obj in to_download)) as task, \
+            ThreadPoolExecutor(max_workers=num_threads) as executor:
+        records = dict(result for result in executor.map(download, to_download) if result)
+    record_cache('s3_files', hit=True, count=len(to_download) - len(records))
+    record_cache('s3_files', hit=False, count=len(records))
+
+    if unverifiable:
+        # the manifest in local_path cannot be extended with records of another algorithm,
+        # so it is replaced by one of the files downloaded here
+        write_manifest(local_path, records, algorithm, parent=local_manifest.get('parent'))
         return True
-    except:
-        return False
+    if remote_manifest is None:
+        if records:
+            update_manifest(local_path, records, algorithm)
+        return True
+    # retry files which did not arrive intact once before giving up
+    expected = remote_manifest['files']
+    corrupted = [path for path, record in records.items() if path in expected and not records_match(record, expected[path])]
+    for path in corrupted:
+        if not records_match(_download_file(bucket_name, f'{prefix}/{path}', local_path / path, algorithm), expected[path]):
+            raise ChecksumError(f'{prefix}/{path} does not match its checksum manifest')
+    return True
+
+@timed()
+def verify_prefix(bucket_name: str, prefix: str, local_path: Path, num_threads: int = 16) -> dict:
+    """Verifies a local copy of a prefix against its checksum manifest, downloading
+    again only the files which are missing or corrupted.
+
+    The manifest uploaded with the prefix is used if there is one, otherwise the
+    local manifest written when the prefix was downloaded (see download_prefix).
+    Files a dataset version inherits from its parent are downloaded from the prefix
+    recorded for them in the manifest.
+
+    Args:
+        bucket_name (str): name of bucket
+        prefix (str): prefix the local copy was downloaded from
+        local_path (Path): local copy of the prefix
+        num_threads (int, optional): Defaults to 16. Number of files checked and downloaded concurrently.
+
+    Returns:
+        dict: "checked" number of files in the manifest, "repaired" list of files downloaded
+            again and "failed" list of files which still do not match the manifest
+
+    Raises:
+        ValueError: if there is no manifest for the local copy
+    """
+    local_path = Path(local_path)
+    try:
+        download_object_if_modified(bucket_name, f'{prefix}/{MANIFEST_FILENAME}', local_path / MANIFEST_FILENAME)
+    except ClientError:
+        # prefix uploaded without a manifest, verify against the local one
+        pass
+    manifest = read_manifest(local_path)
+    if manifest is None:
+        raise ValueError(f'No checksum manifest for {prefix}')
+    algorithm = manifest['algorithm']
+    bad = verify_directory(local_path, manifest, num_threads=num_threads)
+
+    def repair(path):
+        record = manifest['files'][path]
+        key = f'{record.get("prefix", prefix)}/{path}'
+        try:
+            return records_match(_download_file(bucket_name, key, local_path / path, algorithm), record)
+        except ClientError:
+            return False
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        repaired = list(executor.map(repair, bad))
+    return {
+        'checked': len(manifest['files']),
+        'repaired': [path for path, ok in zip(bad, repaired) if ok],
+        'failed': [path for path, ok in zip(bad, repaired) if not ok]
+    }
+
+@timed()
+def download_object_if_modified(bucket_name: str, key: str, local_path: Path, ttl: float = 0) -> bool:
+    """Downloads a single object to a local file unless the cached copy is still current.
+
+    The ETag of the downloaded object is stored in a validator file next to the local
+    copy (see VALIDATOR_SUFFIX). Within ttl seconds of the last validation the local
+    copy is trusted without contacting S3. After that, a conditional GET (If-None-Match)
+    is issued, which transfers nothing when the object is unchanged. If S3 cannot be
+    reached at all, an existing local copy is used as is.
+
+    Args:
+        bucket_name (str): name of bucket
+        key (str): key of object to download
+        local_path (Path): local file the object is stored at
+        ttl (float, optional): seconds a validated local copy is trusted, default 0
+
+    Returns:
+        bool: T if the object was downloaded, F if the local copy was already current
+
+    Raises:
+        ClientError: if the object cannot be retrieved (i.e, it does not exist)
+    """
+    local_path = Path(local_path)
+    validator = read_validator(local_path)
+    etag = None
+    if validator and validator.get('key') == key and local_path.exists():
+        if time.time() - validator.get('validated_at', 0) < ttl:
+            record_cache('s3_objects', hit=True)
+            return False
+        etag = validator.get('etag')
+
+    with scheduler.transfer('metadata'):
+        try:
+            response = storage_driver(bucket_name).get(bucket_name, key, if_none_match=etag)
+        except ClientError as e:
+            if etag and e.response.get('Error', {}).get('Code') in ('304', 'NotModified'):
+                _write_validator(local_path, key, etag)
+                record_cache('s3_objects', hit=True)
+                return False
+            raise
+        except BotoCoreError:
+            # S3 unreachable, fall back to the local copy if there is one
+            if local_path.exists():
+                return False
+            raise
+
+        # write to a temporary file first so an interrupted download never leaves a partial copy
+        temp_path = partial_path(local_path)
+        with open(temp_path, 'wb') as f, closing(response['Body']) as body:
+            shutil.copyfileobj(body, f)
+        os.replace(temp_path, local_path)
+    _write_validator(local_path, key, response['ETag'])
+    record_cache('s3_objects', hit=False)
+    return True
+
+def get_object_etag(bucket_name: str, key: str) -> str:
+    """Retrieves the ETag of an object with a single HEAD request.
+
+    Args:
+        bucket_name (str): name of bucket
+        key (str): key of object
+
+    Returns:
+        str: ETag of the object
+
+    Raises:
+        ClientError: if the object cannot be found (i.e, it does not exist)
+    """
+    with scheduler.transfer('metadata'):
+        return storage_driver(bucket_name).head(bucket_name, key)['ETag']
+
+def read_validator(local_path: Path) -> dict:
+    """Reads the validator stored alongside an object downloaded by download_object_if_modified.
+
+    Args:
+        local_path (Path): local file the object is stored at
+
+    Returns:
+        dict: validator with the object key, ETag and last validation time,
+            empty if the file has no (readable) validator
+    """
+    try:
+        with open(_validator_path(local_path), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
 ### UPLOAD FUNCTIONS ###
+@timed()
 def upload_file_to_s3(prefix: str, file_path: Path, alternate_name=None):
-    """Uploads file at given file path to model bucket on S3.
+    """Uploads file at given file path to model bucket on S3, as a model artifact transfer.
 
     Args:
         prefix (str): prefix for filename on S3
         file_path (Path): path to file
         alternate_name (str, optional): name to override local file name
     """
-    S3 = boto3.resource('s3')
     config = get_config()
-    model_bucket = S3.Bucket(config['model_bucket_name'])
     upload_path = prefix + '/' + file_path.name if alternate_name is None \
                     else prefix + '/' + alternate_name
-    model_bucket.upload_file(str(file_path), upload_path)
+    bucket_name = config['model_bucket_name']
+    with open(file_path, 'rb') as f, scheduler.transfer('artifacts'):
+        storage_driver(bucket_name).put(bucket_name, upload_path, scheduler.reader(f, 'artifacts'))
         
+@timed()
 def upload_dict_to_s3_as_json(s3_path: str, obj: dict):
     """Uploads given dictionary to model bucket on S3.
 
@@ -77,19 +539,154 @@ def upload_dict_to_s3_as_json(s3_path: str, obj: dict):
         s3_path (str): full s3 path to save dictionary to, (no .json)
         obj (dict): dictionary to save
     """
-    S3 = boto3.resource('s3')
-    config = get_config()
-    model_bucket = S3.Bucket(config['model_bucket_name'])   
-    model_bucket.put_object(Body=json.dumps(obj, indent=2), Key=s3_path+'.json')
+    bucket_name = get_config()['model_bucket_name']
+    with scheduler.transfer('metadata'):
+        storage_driver(bucket_name).put(bucket_name, s3_path + '.json', io.BytesIO(json.dumps(obj, indent=2).encode()))
+
+@timed()
+def upload_directory(bucket_name, prefix, local_path, num_threads: int = 10, parent_manifest: dict = None, 
+                        parent_prefix: str = None) -> dict:
+    """Recursively uploads a directory to S3, along with a checksum manifest of its files.
 
-def upload_directory(bucket_name, prefix, local_path):
-    """Recursively uploads a directory to S3
+    Files are hashed as they are uploaded. Files already recorded in a local manifest
+    (i.e, by copy_associated_files during dataset creation) must still match it, which
+    catches corruption between writing and uploading. The manifest is written to the
+    directory and uploaded last, so a prefix with a manifest has been fully uploaded.
+
+    Files identical to those recorded in the manifest already uploaded under the prefix
+    are not uploaded again, so re-uploading a directory only transfers changed files.
+    When uploading a dataset version, files identical to the file at the same path in
+    the parent dataset are not uploaded either. Their manifest records instead name the prefix
+    the file is stored under, and the manifest names the parent.
     
     Args:
         bucket_name (str): the name of the S3 bucket to upload to
         prefix (str): the name of the prefix to be uploaded to
         local_path (str): local path to directory being uploaded
+        num_threads (int, optional): Defaults to 10. Number of concurrent uploads.
+        parent_manifest (dict, optional): manifest of the parent dataset of a version
+        parent_prefix (str, optional): prefix of the parent dataset of a version
+
+    Returns:
+        dict: the manifest uploaded
+
+    Raises:
+        ChecksumError: if files changed since they were recorded in the local manifest,
+            in which case no manifest is uploaded
     """
-    
-    s3_uri = 's3://' + bucket_name + '/' + prefix 
-    subprocess.call(["aws", "s3", "sync", local_path, s3_uri, '--quiet'])
+    local_path = Path(local_path)
+    local_manifest = read_manifest(local_path)
+    algorithm = local_manifest['algorithm'] if local_manifest else default_algorithm()
+    recorded = local_manifest['files'] if local_manifest else {}
+    # files can only be matched against the parent if both are hashed the same way
+    parent_files = parent_manifest['files'] if parent_manifest and parent_manifest['algorithm'] == algorithm else {}
+    driver = storage_driver(bucket_name)
+    remote_manifest = _read_remote_manifest(bucket_name, f'{prefix}/{MANIFEST_FILENAME}')
+    # inherited files are not stored under the prefix, so they are always matched against the parent
+    uploaded_files = {path: record for path, record in remote_manifest['files'].items() if 'prefix' not in record} \
+                        if remote_manifest and remote_manifest['algorithm'] == algorithm else {}
+    # only the manifest of the directory itself is written by this function, nested ones are plugin files
+    excluded = {local_path / MANIFEST_FILENAME, local_path / f'{MANIFEST_FILENAME}.part'}
+    paths = [path for path in sorted(local_path.rglob('*')) if path.is_file() and path not in excluded]
+
+    def upload(path):
+        relative_path = path.relative_to(local_path).as_posix()
+        uploaded = uploaded_files.get(relative_path)
+        if uploaded and os.path.getsize(path) == uploaded['size']:
+            record = hash_file(path, algorithm)
+            if records_match(record, uploaded):
+                task.advance()
+                return relative_path, record
+        inherited = parent_files.get(relative_path)
+        if inherited and os.path.getsize(path) == inherited['size']:
+            # files linked from the parent at build time are already recorded, others are hashed to compare
+            record = recorded.get(relative_path)
+            if record is None or 'prefix' not in record:
+                record = hash_file(path, algorithm)
+            if records_match(record, inherited):
+                task.advance()
+                return relative_path, dict(record, prefix=inherited.get('prefix', parent_prefix))
+        with open(path, 'rb') as f, scheduler.transfer('bulk'):
+            reader = HashingReader(f, algorithm)
+            driver.put(bucket_name, f'{prefix}/{relative_path}', scheduler.reader(reader, 'bulk'))
+        task.advance(nbytes=reader.record()['size'])
+        return relative_path, reader.record()
+
+    with progress.task(f'Uploading {prefix}', total=len(paths)) as task, \
+            ThreadPoolExecutor(max_workers=num_threads) as executor:
+        records = dict(executor.map(upload, paths))
+    changed = [path for path, record in records.items() if path in recorded and not records_match(record, recorded[path])]
+    if changed:
+        raise ChecksumError(f'Files changed after they were written: {", ".join(changed)}')
+    manifest = write_manifest(local_path, records, algorithm, parent=parent_prefix if parent_files else None)
+    with scheduler.transfer('metadata'), open(local_path / MANIFEST_FILENAME, 'rb') as f:
+        driver.put(bucket_name, f'{prefix}/{MANIFEST_FILENAME}', f)
+    return manifest
+
+### HELPERS ###
+def _read_remote_manifest(bucket_name: str, key: str) -> dict:
+    # manifest uploaded under a prefix, None if there is none (yet)
+    try:
+        with scheduler.transfer('metadata'):
+            with closing(storage_driver(bucket_name).get(bucket_name, key)['Body']) as body:
+                manifest = json.load(body)
+    except (ClientError, ValueError):
+        return None
+    return manifest if 'files' in manifest else None
+
+def _live_heartbeats(directory: Path) -> int:
+    # counts processes with a recent heartbeat, removing those of exited processes
+    live = 0
+    for path in Path(directory).glob(f'*{HEARTBEAT_SUFFIX}'):
+        try:
+            pid = int(path.name[:-len(HEARTBEAT_SUFFIX)])
+            os.kill(pid, 0)
+        except (ValueError, ProcessLookupError):
+            _remove_quietly(path)
+            continue
+        except PermissionError:
+            # process of another user, still alive
+            pass
+        try:
+            if time.time() - path.stat().st_mtime < HEARTBEAT_TIMEOUT:
+                live += 1
+        except OSError:
+            continue
+    return live
+
+def _remove_quietly(path: Path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _validator_path(local_path: Path) -> Path:
+    return Path(local_path).with_name(Path(local_path).name + VALIDATOR_SUFFIX)
+
+def _write_validator(local_path: Path, key: str, etag: str):
+    validator = {'key': key, 'etag': etag, 'validated_at': time.time()}
+    with open(_validator_path(local_path), 'w') as f:
+        json.dump(validator, f)
+
+def _download_file(bucket_name: str, key: str, destination: Path, algorithm: str, modified: float = None) -> dict:
+    # streams an object to disk as a bulk transfer, hashing it on the way
+    os.makedirs(destination.parent, exist_ok=True)
+    hasher = new_hasher(algorithm)
+    size = 0
+    temp_path = partial_path(destination)
+    try:
+        with scheduler.transfer('bulk'), open(temp_path, 'wb') as f, \
+                closing(storage_driver(bucket_name).get(bucket_name, key)['Body']) as body:
+            for block in iter(lambda: body.read(BLOCK_SIZE), b''):
+                scheduler.throttle(len(block), 'bulk')
+                hasher.update(block)
+                size += len(block)
+                f.write(block)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+    os.replace(temp_path, destination)
+    if modified is not None:
+        # match the object's modification time so unchanged files are skipped next time
+        os.utime(destination, (modified, modified))
+    return {'size': size, 'hash': hasher.hexdigest()}
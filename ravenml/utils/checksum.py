@@ -0,0 +1,256 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Per-file checksum manifests for datasets and imagesets.
+
+A manifest is a JSON file at the root of a dataset/imageset recording the size and
+hash of every file in it, keyed by path relative to the root:
+    {"algorithm": "blake2b", "files": {"test/image_1.png": {"size": 1024, "hash": "..."}}}
+Manifests of dataset versions also name their "parent" dataset, and the records of
+files inherited from it carry the "prefix" of the dataset storing the file on S3.
+Hashes are computed while files are copied, uploaded or downloaded, so writing a
+manifest never requires reading a file a second time.
+"""
+
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import xxhash
+except ImportError:     # optional, faster than the blake2b fallback
+    xxhash = None
+try:
+    import blake3
+except ImportError:     # optional, faster than the blake2b fallback
+    blake3 = None
+
+# name of the manifest file at the root of a dataset/imageset
+MANIFEST_FILENAME = 'manifest.json'
+# supported hash algorithms, in order of preference
+HASH_ALGORITHMS = ['xxh3_128', 'blake3', 'blake2b']
+# size of the blocks files are read in
+BLOCK_SIZE = 1 << 20
+
+
+class ChecksumError(Exception):
+    """Raised when a file does not match the checksum recorded for it.
+    """
+    pass
+
+
+class HashingReader(object):
+    """Wraps a binary file object, hashing everything read through it.
+
+    The wrapper deliberately has no seek method, so consumers such as boto3 uploads
+    read it strictly once from start to end.
+
+    Args:
+        fileobj (file): binary file object to read from
+        algorithm (str): one of HASH_ALGORITHMS
+
+    Attributes:
+        size (int): number of bytes read so far
+    """
+    def __init__(self, fileobj, algorithm: str):
+        self._fileobj = fileobj
+        self._hasher = new_hasher(algorithm)
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self._hasher.update(data)
+        self.size += len(data)
+        return data
+
+    def record(self) -> dict:
+        """Creates the manifest record of the bytes read so far.
+
+        Returns:
+            dict: record with "size" and "hash" keys
+        """
+        return {'size': self.size, 'hash': self._hasher.hexdigest()}
+
+
+### PUBLIC METHODS ###
+def default_algorithm() -> str:
+    """Determines the preferred hash algorithm available in this environment.
+
+    Returns:
+        str: first of HASH_ALGORITHMS whose implementation is installed
+    """
+    if xxhash is not None:
+        return 'xxh3_128'
+    if blake3 is not None:
+        return 'blake3'
+    return 'blake2b'
+
+def new_hasher(algorithm: str):
+    """Creates a hash object for the given algorithm.
+
+    Args:
+        algorithm (str): one of HASH_ALGORITHMS
+
+    Returns:
+        hash object with update and hexdigest methods
+
+    Raises:
+        ValueError: if the algorithm is unknown or its implementation is not installed
+    """
+    if algorithm == 'xxh3_128' and xxhash is not None:
+        return xxhash.xxh3_128()
+    if algorithm == 'blake3' and blake3 is not None:
+        return blake3.blake3()
+    if algorithm == 'blake2b':
+        return hashlib.blake2b(digest_size=16)
+    if algorithm in HASH_ALGORITHMS:
+        package = 'xxhash' if algorithm == 'xxh3_128' else algorithm
+        raise ValueError(f'Hash algorithm "{algorithm}" requires the {package} package')
+    raise ValueError(f'Unknown hash algorithm "{algorithm}"')
+
+def hash_file(path: Path, algorithm: str) -> dict:
+    """Hashes a file.
+
+    Args:
+        path (Path): path to the file
+        algorithm (str): one of HASH_ALGORITHMS
+
+    Returns:
+        dict: manifest record with "size" and "hash" keys
+    """
+    with open(path, 'rb') as f:
+        reader = HashingReader(f, algorithm)
+        while reader.read(BLOCK_SIZE):
+            pass
+    return reader.record()
+
+def copy_with_checksum(source: Path, destination: Path, algorithm: str) -> dict:
+    """Copies a file, hashing it in the same pass.
+
+    Args:
+        source (Path): file to copy
+        destination (Path): path of the copy, or directory to copy into
+        algorithm (str): one of HASH_ALGORITHMS
+
+    Returns:
+        dict: manifest record of the copied file
+    """
+    destination = Path(destination)
+    if destination.is_dir():
+        destination = destination / Path(source).name
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        reader = HashingReader(src, algorithm)
+        for block in iter(lambda: reader.read(BLOCK_SIZE), b''):
+            dst.write(block)
+    return reader.record()
+
+def records_match(record: dict, other: dict) -> bool:
+    """Checks if two manifest records describe the same contents.
+
+    Args:
+        record (dict): manifest record
+        other (dict): manifest record, may be None
+
+    Returns:
+        bool: T if both records have the same size and hash
+    """
+    return other is not None and record['size'] == other['size'] and record['hash'] == other['hash']
+
+def read_manifest(directory: Path) -> dict:
+    """Reads the manifest at the root of a directory.
+
+    Args:
+        directory (Path): root of the dataset/imageset
+
+    Returns:
+        dict: manifest, None if there is no (readable) manifest
+    """
+    try:
+        with open(Path(directory) / MANIFEST_FILENAME, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if 'files' in manifest else None
+
+def write_manifest(directory: Path, files: dict, algorithm: str, parent: str = None) -> dict:
+    """Writes a manifest at the root of a directory, replacing any existing one.
+
+    Args:
+        directory (Path): root of the dataset/imageset
+        files (dict): manifest records keyed by path relative to directory
+        algorithm (str): algorithm the records were hashed with
+        parent (str, optional): name of the parent dataset of a dataset version
+
+    Returns:
+        dict: the manifest written
+    """
+    manifest = {'algorithm': algorithm, 'files': dict(sorted(files.items()))}
+    if parent:
+        manifest['parent'] = parent
+    # written under a temporary name and renamed, so a manifest is never seen half written
+    temp_path = Path(directory) / f'{MANIFEST_FILENAME}.part'
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, Path(directory) / MANIFEST_FILENAME)
+    return manifest
+
+def update_manifest(directory: Path, files: dict, algorithm: str) -> dict:
+    """Adds records to the manifest at the root of a directory, creating it if needed.
+
+    Args:
+        directory (Path): root of the dataset/imageset
+        files (dict): manifest records keyed by path relative to directory
+        algorithm (str): algorithm the records were hashed with
+
+    Returns:
+        dict: the updated manifest
+
+    Raises:
+        ValueError: if the existing manifest uses a different algorithm
+    """
+    manifest = read_manifest(directory) or {'algorithm': algorithm, 'files': {}}
+    if manifest['algorithm'] != algorithm:
+        raise ValueError(f'Manifest in {directory} uses {manifest["algorithm"]}, not {algorithm}')
+    manifest['files'].update(files)
+    return write_manifest(directory, manifest['files'], algorithm, parent=manifest.get('parent'))
+
+def verify_directory(directory: Path, manifest: dict = None, num_threads: int = 16) -> list:
+    """Concurrently checks the files of a directory against a manifest. Files which
+    are not in the manifest are ignored.
+
+    Args:
+        directory (Path): root of the dataset/imageset
+        manifest (dict, optional): manifest to check against, defaults to the one in directory
+        num_threads (int, optional): Defaults to 16. Number of files hashed concurrently.
+
+    Returns:
+        list: relative paths of files which are missing or do not match the manifest
+
+    Raises:
+        ValueError: if there is no manifest, or its algorithm is unavailable
+    """
+    directory = Path(directory)
+    manifest = manifest or read_manifest(directory)
+    if manifest is None:
+        raise ValueError(f'No checksum manifest found in {directory}')
+    algorithm = manifest['algorithm']
+    new_hasher(algorithm)
+
+    def matches(item):
+        relative_path, record = item
+        path = directory / relative_path
+        try:
+            # a size mismatch is detected without reading the file
+            if os.path.getsize(path) != record['size']:
+                return False
+            return hash_file(path, algorithm)['hash'] == record['hash']
+        except OSError:
+            return False
+
+    items = list(manifest['files'].items())
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        results = list(executor.map(matches, items))
+    return [relative_path for (relative_path, _), ok in zip(items, results) if not ok]
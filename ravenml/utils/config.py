@@ -15,6 +15,14 @@ config_cache = RMLCache()
 
 # required configuration fields
 CONFIG_FIELDS = sorted(['image_bucket_name', 'dataset_bucket_name', 'model_bucket_name'])
+# optional configuration fields, mapped to the default used when they are absent
+OPTIONAL_CONFIG_FIELDS = {
+    'metadata_ttl': 600,        # seconds cached imageset/dataset metadata is trusted before revalidation
+    'offline': False,           # use completely downloaded datasets without contacting S3
+    'metrics_dir': None,        # directory run metrics are exported to, see ravenml.utils.metrics
+    'max_bandwidth': None,      # S3 bytes per second shared by ravenml processes on the machine, i.e "50MB"
+    'max_transfers': None,      # concurrent S3 transfers shared by ravenml processes on the machine
+}
 
 def get_config() -> dict:
     """Retrieves the current configuration.
@@ -37,7 +45,7 @@ def get_config() -> dict:
         for key, value in config.items():
             if key in required_fields:    
                 required_fields.remove(key)
-            else:
+            elif key not in OPTIONAL_CONFIG_FIELDS:
                 raise ValueError('Invalid field in configuration - ' + key)
         if len(required_fields) != 0:
             raise ValueError('Missing required configuration fields - ' + str(required_fields))
@@ -45,6 +53,18 @@ def get_config() -> dict:
         raise FileNotFoundError('Configuration file does not exist.')
     return config
 
+def get_optional_field(config: dict, field: str):
+    """Retrieves an optional field from a configuration, falling back to its default.
+
+    Args:
+        config (dict): configuration as returned by get_config
+        field (str): name of the optional field
+
+    Returns:
+        value of the field in the configuration, or its default if not set
+    """
+    return config.get(field, OPTIONAL_CONFIG_FIELDS[field])
+
 def update_config(config: dict):
     """Updates the configuration file.
 
@@ -5,18 +5,27 @@ Date Created:   03/13/2019
 Utility module for managing Jigsaw created datasets.
 """
 
+import os
 import json
-import boto3
-from botocore.exceptions import ClientError
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from botocore.exceptions import ClientError, BotoCoreError
 from pathlib import Path
-from ravenml.utils.local_cache import RMLCache
-from ravenml.utils.config import get_config
-from ravenml.utils.aws import list_top_level_bucket_prefixes, download_prefix
-from ravenml.data.interfaces import Dataset
+from ravenml.utils.local_cache import RMLCache, link_or_copy, partial_path
+from ravenml.utils.checksum import MANIFEST_FILENAME, read_manifest
+from ravenml.utils.config import get_config, get_optional_field
+from ravenml.utils.aws import (list_top_level_bucket_prefixes, download_prefix, download_object_if_modified, 
+                                verify_prefix, get_object_etag, read_validator)
+from ravenml.utils.metrics import record_cache
+from ravenml.data.interfaces import Dataset, PrefetchedDataset
 
 dataset_cache = RMLCache('datasets')
 # name of dataset bucket field inside config dict
 BUCKET_FIELD = 'dataset_bucket_name'
+# marker written into the local copy of a dataset once it is completely downloaded,
+# recording the ETag of the dataset's manifest at the time
+COMPLETE_FILENAME = '.complete'
 
 ### PUBLIC METHODS ###
 def get_dataset_names() -> list:
@@ -48,28 +57,151 @@ def get_dataset_metadata(name: str, no_check=False) -> dict:
             raise
     return json.load(open(dataset_cache.path / Path(name) / 'metadata.json'))
 
-def get_dataset(name: str) -> Dataset:
+def refresh_dataset_metadata(names: list, num_threads=10) -> dict:
+    """Concurrently ensures cached metadata is present and current for several datasets.
+
+    After this call, get_dataset_metadata(name, no_check=True) can be used for every
+    dataset that did not fail.
+
+    Args:
+        names (list): dataset names
+        num_threads (int, optional): Defaults to 10. Number of concurrent revalidations.
+
+    Returns:
+        dict: maps each dataset name to the ValueError raised while ensuring its
+            metadata, or None if its metadata is ready
+    """
+    def ensure(name):
+        try:
+            _ensure_metadata(name)
+        except ValueError as e:
+            return e
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        return dict(zip(names, executor.map(ensure, names)))
+
+def get_dataset_index(name: str) -> Dataset:
+    """Retrieves the metadata and image index of a dataset, without downloading its files.
+
+    The image index of a completely downloaded dataset is used as is, otherwise it is
+    cached like the metadata and revalidated after the "metadata_ttl".
+
+    Args:
+        name (str): string name of dataset
+
+    Returns:
+        Dataset: dataset whose image ids can be read, but whose files may be absent
+
+    Raises:
+        ValueError: if dataset name is invalid (re raised), or its image index is missing
+    """
+    metadata = get_dataset_metadata(name)
+    local_path = dataset_cache.path / Path(name)
+    index = metadata.get('image_index')
+    if index and not ((local_path / index).exists() and _read_complete_marker(name)):
+        config = get_config()
+        try:
+            download_object_if_modified(config[BUCKET_FIELD], f'{name}/{index}', local_path / index,
+                                        ttl=get_optional_field(config, 'metadata_ttl'))
+        except ClientError as e:
+            raise ValueError(name) from e
+    return Dataset(name, metadata, local_path)
+
+def get_dataset(name: str, offline: bool = None) -> Dataset:
     """Retrives a dataset. Downloads from S3 if necessary.
 
+    A completely downloaded dataset whose manifest is unchanged on S3 is confirmed
+    with a single request rather than by listing the dataset. In offline mode S3 is
+    not contacted at all and the local copy is used if it is complete.
+
+    Dataset versions are reconstructed from their parent: the parent is retrieved
+    (recursively) and the files the version inherits are hardlinked from its local
+    copy, so only files new in the version are downloaded.
+
     Args:
         name (str): string name of dataset
+        offline (bool, optional): whether to use the local copy only, defaults to
+            the "offline" field of the ravenml config
     
     Returns:
         Dataset: dataset itself
         
     Raises:
-        ValueError: if dataset name is invalid (re raised)
+        ValueError: if dataset name is invalid (re raised), or in offline mode
+            if the dataset is not completely downloaded
     """
+    if offline is None:
+        offline = get_optional_field(get_config(), 'offline')
     try:
-        _ensure_dataset(name)
+        if not offline:
+            _ensure_dataset(name)
+        elif not _read_complete_marker(name):
+            raise ValueError(name)
         return Dataset(name, get_dataset_metadata(name, no_check=True), dataset_cache.path / Path(name))
     except ValueError:
         raise
+
+def prefetch_dataset(name: str, offline: bool = None) -> Dataset:
+    """Retrieves dataset metadata and starts downloading the dataset in the background.
+
+    Args:
+        name (str): string name of dataset
+        offline (bool, optional): whether to use the local copy only (see get_dataset)
+
+    Returns:
+        Dataset: PrefetchedDataset whose path blocks until the download completes,
+            or the local copy in offline mode
+        
+    Raises:
+        ValueError: if dataset name is invalid (re raised)
+    """
+    if offline is None:
+        offline = get_optional_field(get_config(), 'offline')
+    if offline:
+        # nothing to wait for
+        return get_dataset(name, offline=True)
+    metadata = get_dataset_metadata(name)
+    future = Future()
+
+    def download():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            _ensure_dataset(name)
+            future.set_result(dataset_cache.path / Path(name))
+        except BaseException as e:
+            future.set_exception(e)
+
+    # daemon thread, so an interrupted training does not wait for the download to finish
+    threading.Thread(target=download, name=f'prefetch-{name}', daemon=True).start()
+    return PrefetchedDataset(name, metadata, future)
+
+def verify_dataset_cache(name: str) -> dict:
+    """Verifies the locally cached copy of a dataset against its checksum manifest,
+    downloading again only missing or corrupted files.
+
+    Args:
+        name (str): string name of dataset
+
+    Returns:
+        dict: verification summary, see ravenml.utils.aws.verify_prefix
+
+    Raises:
+        ValueError: if the dataset is not cached locally or has no manifest
+    """
+    local_path = dataset_cache.path / Path(name)
+    if not local_path.is_dir():
+        raise ValueError(name)
+    config = get_config()
+    with dataset_cache.lock(name):
+        return verify_prefix(config[BUCKET_FIELD], name, local_path)
  
 
 ### PRIVATE HELPERS ###
 def _ensure_metadata(name: str):
-    """Ensure dataset metadata exists.
+    """Ensure dataset metadata exists and is current.
+
+    Cached metadata is trusted for the "metadata_ttl" configured in the ravenml config,
+    after which it is revalidated against S3 with a conditional request.
 
     Args:
         name (str): name of dataset
@@ -77,28 +209,124 @@ def _ensure_metadata(name: str):
     Raises:
         ValueError: if dataset name is invalid and metadata cannot be downloaded.
     """
-    S3 = boto3.resource('s3')
     config = get_config()
-    DATASET_BUCKET = S3.Bucket(config['dataset_bucket_name'])
-    metadata_path = Path(name) / 'metadata.json'
-    if not dataset_cache.subpath_exists(metadata_path):
-        dataset_cache.ensure_subpath_exists(name)
-        metadata_key = f'{name}/metadata.json'
-        metadata_absolute_path = dataset_cache.path / metadata_path
-        try:
-            DATASET_BUCKET.download_file(metadata_key, str(metadata_absolute_path))
-        except ClientError as e:
-            raise ValueError(name) from e
+    dataset_cache.ensure_subpath_exists(name)
+    metadata_key = f'{name}/metadata.json'
+    metadata_absolute_path = dataset_cache.path / Path(name) / 'metadata.json'
+    try:
+        download_object_if_modified(config[BUCKET_FIELD], metadata_key, metadata_absolute_path,
+                                    ttl=get_optional_field(config, 'metadata_ttl'))
+    except ClientError as e:
+        raise ValueError(name) from e
 
 def _ensure_dataset(name: str):
     """Ensures dataset exists.
 
+    A complete local copy is current if the ETag of the dataset's manifest is unchanged
+    since it was downloaded, which takes one HEAD request. Otherwise the dataset is synced.
+    Only one thread or process syncs a dataset at a time: others wait for it, and then
+    find the local copy current.
+
     Args:
         name (str): name of dataset
         
+    Raises:
+        ValueError: if dataset name is invalid (no matching objects in S3 bucket)
+    """
+    dataset_cache.single_flight(name, lambda: _dataset_is_current(name), lambda: _sync_dataset(name))
+
+def _dataset_is_current(name: str) -> bool:
+    """Checks if the local copy of a dataset is complete and its manifest unchanged on S3.
+
+    Args:
+        name (str): name of dataset
+
+    Returns:
+        bool: T if the local copy can be used as is
+    """
+    config = get_config()
+    marker = _read_complete_marker(name)
+    if marker.get('manifest_etag'):
+        try:
+            if get_object_etag(config[BUCKET_FIELD], f'{name}/{MANIFEST_FILENAME}') == marker['manifest_etag']:
+                record_cache('datasets', hit=True)
+                return True
+        except ClientError:
+            # manifest removed, fall back to a full sync
+            pass
+        except BotoCoreError:
+            # S3 unreachable, the complete local copy is used as is
+            return True
+    return False
+
+def _sync_dataset(name: str):
+    """Downloads the files of a dataset missing or outdated locally, and marks it complete.
+
+    Args:
+        name (str): name of dataset
+
     Raises:
         ValueError: if dataset name is invalid (no matching objects in S3 bucket)
     """
     config = get_config()
+    # an interrupted sync must not leave the copy marked complete
+    marker_path = dataset_cache.path / Path(name) / COMPLETE_FILENAME
+    if marker_path.exists():
+        os.remove(marker_path)
+    record_cache('datasets', hit=False)
     if not download_prefix(config[BUCKET_FIELD], name, dataset_cache):
         raise ValueError(name)
+    _link_parent_files(name)
+    _write_complete_marker(name)
+
+def _read_complete_marker(name: str) -> dict:
+    """Reads the marker of a completely downloaded dataset.
+
+    Args:
+        name (str): name of dataset
+
+    Returns:
+        dict: marker with the manifest ETag (None for datasets uploaded without a manifest)
+            and completion time, empty if the dataset is not completely downloaded
+    """
+    try:
+        with open(dataset_cache.path / Path(name) / COMPLETE_FILENAME, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_complete_marker(name: str):
+    """Marks a dataset as completely downloaded.
+
+    Args:
+        name (str): name of dataset
+    """
+    local_path = dataset_cache.path / Path(name)
+    # download_prefix records the ETag of the manifest it downloaded
+    validator = read_validator(local_path / MANIFEST_FILENAME)
+    marker = {'manifest_etag': validator.get('etag'), 'completed_at': time.time()}
+    temp_path = partial_path(local_path / COMPLETE_FILENAME)
+    with open(temp_path, 'w') as f:
+        json.dump(marker, f)
+    os.replace(temp_path, local_path / COMPLETE_FILENAME)
+
+def _link_parent_files(name: str):
+    """Links the files a dataset version inherits from its parent into the version.
+
+    Args:
+        name (str): name of dataset
+
+    Raises:
+        ValueError: if the parent dataset cannot be retrieved
+    """
+    local_path = dataset_cache.path / Path(name)
+    manifest = read_manifest(local_path)
+    if not manifest or not manifest.get('parent'):
+        return
+    inherited = [path for path, record in manifest['files'].items() 
+                    if 'prefix' in record and not (local_path / path).exists()]
+    if not inherited:
+        return
+    parent = get_dataset(manifest['parent'])
+    for path in inherited:
+        link_or_copy(parent.path / path, local_path / path)
@@ -0,0 +1,231 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Utility module for detecting the compute environment ravenml runs in and applying
+shutdown policies to it once training is done.
+
+Detection asks each registered Provider in turn. Providers check cheap local hints
+first (i.e, DMI identifiers of the hypervisor) so that non-cloud machines are ruled
+out without any network request. The result is cached for the process, and detection
+can be started in the background (see start_environment_detection) to overlap with
+other work such as uploading artifacts. Additional providers can be registered with
+register_provider or through the "ravenml.providers" entry point, and additional
+policies by adding them to SHUTDOWN_POLICIES.
+"""
+
+import os
+import threading
+import boto3
+from concurrent.futures import Future
+from urllib.request import Request, urlopen
+from urllib.error import URLError
+from pkg_resources import iter_entry_points
+
+# shutdown policies, mapped to the action applied to a detected cloud environment (None to do nothing)
+SHUTDOWN_POLICIES = {
+    'stop': lambda environment: environment.provider.stop(environment),
+    'terminate': lambda environment: environment.provider.terminate(environment),
+    'keep': None
+}
+DEFAULT_POLICY = 'stop'
+# environment variable overriding the EC2 instance metadata endpoint (i.e, for testing)
+IMDS_ENDPOINT_VARIABLE = 'RAVENML_IMDS_ENDPOINT'
+IMDS_ENDPOINT = 'http://169.254.169.254'
+# seconds to wait on the instance metadata service, which answers in milliseconds when present
+IMDS_TIMEOUT = 1
+IMDS_TOKEN_TTL = 60
+DMI_PATH = '/sys/class/dmi/id'
+PROVIDER_ENTRY_POINT = 'ravenml.providers'
+
+# registered providers, asked in order, see register_provider
+_providers = []
+# process wide detection, see start_environment_detection
+_detection = None
+_detection_lock = threading.Lock()
+
+class ComputeEnvironment(object):
+    """Compute environment ravenml is running in.
+
+    Args:
+        provider (Provider): provider of the environment, None when running locally
+        instance_id (str, optional): id of the machine with the provider
+        region (str, optional): region of the machine with the provider
+    """
+    def __init__(self, provider=None, instance_id: str = None, region: str = None):
+        self.provider = provider
+        self.instance_id = instance_id
+        self.region = region
+
+    def __repr__(self):
+        if self.provider is None:
+            return 'local'
+        return f'{self.provider.name} instance {self.instance_id}'
+
+class Provider(object):
+    """Base class of compute providers which can be detected and shut down.
+
+    Subclasses set name and implement detect, stop and terminate.
+    """
+    name = None
+
+    def detect(self) -> ComputeEnvironment:
+        """Detects whether ravenml is running on this provider.
+
+        Returns:
+            ComputeEnvironment: the environment, None if not running on this provider
+        """
+        raise NotImplementedError
+
+    def stop(self, environment: ComputeEnvironment):
+        """Stops the machine of the environment.
+
+        Args:
+            environment (ComputeEnvironment): environment detected by this provider
+        """
+        raise NotImplementedError
+
+    def terminate(self, environment: ComputeEnvironment):
+        """Terminates the machine of the environment.
+
+        Args:
+            environment (ComputeEnvironment): environment detected by this provider
+        """
+        raise NotImplementedError
+
+class EC2Provider(Provider):
+    """AWS EC2, detected through DMI identifiers and the instance metadata service (IMDSv2).
+    """
+    name = 'ec2'
+
+    def detect(self) -> ComputeEnvironment:
+        endpoint = os.environ.get(IMDS_ENDPOINT_VARIABLE)
+        # an overridden endpoint is always asked, DMI says nothing about it
+        if endpoint is None:
+            if _dmi_mentions('amazon', 'ec2') is False:
+                return None
+            endpoint = IMDS_ENDPOINT
+        try:
+            token = self._token(endpoint)
+            instance_id = self._metadata(endpoint, 'instance-id', token)
+            region = self._metadata(endpoint, 'placement/region', token)
+        except (URLError, OSError):
+            return None
+        return ComputeEnvironment(self, instance_id, region)
+
+    def stop(self, environment: ComputeEnvironment):
+        self._client(environment).stop_instances(InstanceIds=[environment.instance_id], DryRun=False)
+
+    def terminate(self, environment: ComputeEnvironment):
+        self._client(environment).terminate_instances(InstanceIds=[environment.instance_id], DryRun=False)
+
+    def _token(self, endpoint: str) -> str:
+        # session token for IMDSv2, None if only IMDSv1 is available
+        request = Request(f'{endpoint}/latest/api/token', method='PUT',
+                            headers={'X-aws-ec2-metadata-token-ttl-seconds': str(IMDS_TOKEN_TTL)})
+        try:
+            with urlopen(request, timeout=IMDS_TIMEOUT) as response:
+                return response.read().decode('utf-8')
+        except URLError as e:
+            if getattr(e, 'code', None) in (403, 404, 405):
+                return None
+            raise
+
+    def _metadata(self, endpoint: str, path: str, token: str) -> str:
+        headers = {'X-aws-ec2-metadata-token': token} if token else {}
+        request = Request(f'{endpoint}/latest/meta-data/{path}', headers=headers)
+        with urlopen(request, timeout=IMDS_TIMEOUT) as response:
+            return response.read().decode('utf-8')
+
+    def _client(self, environment: ComputeEnvironment):
+        return boto3.client('ec2', region_name=environment.region) if environment.region else boto3.client('ec2')
+
+
+### PUBLIC METHODS ###
+def register_provider(provider: Provider):
+    """Registers a provider to be asked during detection, before those already registered
+    and the built in ones.
+
+    Args:
+        provider (Provider): provider to register
+    """
+    _providers.insert(0, provider)
+
+def start_environment_detection() -> Future:
+    """Starts detecting the compute environment in the background, once per process.
+
+    Returns:
+        Future: future resolving to the detected ComputeEnvironment
+    """
+    global _detection
+    with _detection_lock:
+        if _detection is None:
+            _detection = Future()
+            threading.Thread(target=_detect, args=(_detection,), name='environment-detection', daemon=True).start()
+        return _detection
+
+def detect_environment() -> ComputeEnvironment:
+    """Detects the compute environment, blocking until detection completes.
+
+    Returns:
+        ComputeEnvironment: detected environment, with no provider when running locally
+    """
+    return start_environment_detection().result()
+
+def apply_shutdown_policy(policy: str, environment: ComputeEnvironment = None) -> str:
+    """Applies a shutdown policy to the compute environment.
+
+    Args:
+        policy (str): name of one of the SHUTDOWN_POLICIES, None for the DEFAULT_POLICY
+        environment (ComputeEnvironment, optional): environment to apply the policy to,
+            detected if not given
+
+    Returns:
+        str: description of the action taken
+
+    Raises:
+        ValueError: if the policy is unknown
+    """
+    policy = policy or DEFAULT_POLICY
+    if policy not in SHUTDOWN_POLICIES:
+        raise ValueError(f'Unknown shutdown policy {policy}')
+    action = SHUTDOWN_POLICIES[policy]
+    if action is None:
+        return f'Policy "{policy}" is to keep running. Doing nothing.'
+    environment = environment or detect_environment()
+    if environment.provider is None:
+        return 'No cloud runtime detected. Doing nothing.'
+    action(environment)
+    return f'Applied policy "{policy}" to {environment}.'
+
+
+### HELPERS ###
+def _detect(future: Future):
+    try:
+        plugin_providers = [entry_point.load()() for entry_point in iter_entry_points(PROVIDER_ENTRY_POINT)]
+        for provider in list(_providers) + plugin_providers + [EC2Provider()]:
+            environment = provider.detect()
+            if environment is not None:
+                future.set_result(environment)
+                return
+        future.set_result(ComputeEnvironment())
+    except BaseException as e:
+        future.set_exception(e)
+
+def _dmi_mentions(*words) -> bool:
+    """Checks DMI identifiers for any of the given words.
+
+    Returns:
+        bool: whether any identifier mentions one of the words, None if DMI identifiers
+            are not available (i.e, not on Linux)
+    """
+    values = []
+    for field in ('sys_vendor', 'bios_vendor', 'bios_version', 'product_name', 'product_uuid', 'board_asset_tag'):
+        try:
+            with open(os.path.join(DMI_PATH, field), 'r') as f:
+                values.append(f.read().strip().lower())
+        except OSError:
+            continue
+    if not values:
+        return None
+    return any(word in value for value in values for word in words)
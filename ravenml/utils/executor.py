@@ -0,0 +1,152 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Utility module for applying a function to many items in parallel, i.e in plugin
+construct_all and write_out_train_split implementations:
+
+    from ravenml.utils.executor import parallel_map
+    records = parallel_map(write_record, self.image_ids, chunk_size=64)
+
+Items are sent to a thread or process pool in chunks, with a bounded number of chunks
+in flight or awaiting their turn to be yielded, so long iterables are never materialized. Every item is attempted: failures
+are collected and raised together once the map completes. A KeyboardInterrupt cancels
+chunks which have not started and waits only for those already running.
+"""
+
+import os
+import itertools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+BACKENDS = ['thread', 'process']
+# chunks submitted ahead of the workers, per worker
+CHUNKS_IN_FLIGHT = 2
+
+class ParallelMapError(Exception):
+    """Raised when items of a parallel map fail.
+
+    Args:
+        errors (list): (item, exception) tuples of the failed items, in input order
+        total (int): number of items mapped
+    """
+    def __init__(self, errors: list, total: int):
+        self.errors = errors
+        self.total = total
+        item, error = errors[0]
+        super().__init__(f'{len(errors)} of {total} items failed, first {item!r}: {error!r}')
+
+
+### PUBLIC METHODS ###
+def parallel_imap(fn, items, backend: str = 'thread', num_workers: int = None, chunk_size: int = 1,
+                    ordered: bool = True, progress=None):
+    """Lazily applies a function to items in parallel.
+
+    Args:
+        fn (callable): function applied to each item, must be picklable (i.e, defined at
+            module level) for the process backend
+        items (iterable): items to apply fn to
+        backend (str, optional): Defaults to "thread". One of BACKENDS, use "process" for
+            CPU bound functions which hold the GIL.
+        num_workers (int, optional): number of workers, defaults to the CPU count for
+            processes and the ThreadPoolExecutor default for threads
+        chunk_size (int, optional): Defaults to 1. Items sent to a worker at a time,
+            larger chunks amortize the cost of dispatching cheap functions.
+        ordered (bool, optional): Defaults to True. Whether results are yielded in
+            input order, otherwise in order of completion.
+        progress (callable, optional): called with (completed items, total items or None
+            if items has no length) after each chunk, from the calling thread
+
+    Yields:
+        results of fn for each item
+
+    Raises:
+        ValueError: if the backend is unknown
+        ParallelMapError: after all results are yielded, if any item failed
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown backend {backend}, expected one of {BACKENDS}')
+    total = len(items) if hasattr(items, '__len__') else None
+    pool_type = ThreadPoolExecutor if backend == 'thread' else ProcessPoolExecutor
+    # defaults of the standard library executors
+    num_workers = num_workers or (os.cpu_count() if backend == 'process' else min(32, (os.cpu_count() or 1) + 4))
+    executor = pool_type(max_workers=num_workers)
+    max_in_flight = CHUNKS_IN_FLIGHT * num_workers
+
+    chunks = enumerate(_chunks(items, chunk_size))
+    in_flight, finished = {}, {}
+    next_chunk, completed, errors = 0, 0, []
+    try:
+        while True:
+            # chunks finished out of order count against the bound until they are yielded,
+            # so a slow early chunk does not buffer the results of the whole iterable
+            for index, chunk in itertools.islice(chunks, max(0, max_in_flight - len(in_flight) - len(finished))):
+                in_flight[executor.submit(_run_chunk, fn, chunk)] = (index, chunk)
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, chunk = in_flight.pop(future)
+                finished[index] = (chunk, future.result())
+                completed += len(chunk)
+            if progress is not None:
+                progress(completed, total)
+            # yield what can be yielded in the requested order
+            ready = sorted(finished) if not ordered else []
+            while ordered and next_chunk in finished:
+                ready.append(next_chunk)
+                next_chunk += 1
+            for index in ready:
+                chunk, outcomes = finished.pop(index)
+                for item, (ok, value) in zip(chunk, outcomes):
+                    if ok:
+                        yield value
+                    else:
+                        errors.append((index, item, value))
+    except BaseException:
+        # KeyboardInterrupt or the caller stopped iterating: drop chunks not yet started
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
+        raise
+    executor.shutdown(wait=True)
+    if errors:
+        # errors of an unordered map are found out of order
+        errors.sort(key=lambda error: error[0])
+        raise ParallelMapError([(item, error) for _, item, error in errors], completed)
+
+def parallel_map(fn, items, **kwargs) -> list:
+    """Applies a function to items in parallel.
+
+    Args:
+        fn (callable): function applied to each item
+        items (iterable): items to apply fn to
+        **kwargs: backend, num_workers, chunk_size, ordered and progress, see parallel_imap
+
+    Returns:
+        list: results of fn for each item
+
+    Raises:
+        ParallelMapError: if any item failed, once all items have been attempted
+    """
+    return list(parallel_imap(fn, items, **kwargs))
+
+
+### HELPERS ###
+def _chunks(items, chunk_size: int):
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _run_chunk(fn, chunk: list) -> list:
+    # runs in the worker, exceptions are returned so one failure does not lose the chunk
+    outcomes = []
+    for item in chunk:
+        try:
+            outcomes.append((True, fn(item)))
+        except Exception as e:
+            outcomes.append((False, e))
+    return outcomes
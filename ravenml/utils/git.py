@@ -9,6 +9,7 @@ import subprocess
 import json
 from os import chdir, listdir
 from pathlib import Path
+from ravenml.utils.profile import timed
 
 def is_repo(path: Path):
     """ Checks if the given path is in a github repository by detecting a .git directory.
@@ -30,6 +31,7 @@ def is_repo(path: Path):
         parent_path = path.parent
     return None
 
+@timed()
 def git_sha(path: Path) -> str:
     """ Find SHA hash of the current HEAD in the repository. 
 
@@ -55,6 +57,7 @@ def git_sha(path: Path) -> str:
     chdir(cwd)
     return out
 
+@timed()
 def git_patch_tracked(path: Path) -> str:
     """ Generate a patchfile of the diff for all tracked files in the repo
 
@@ -81,6 +84,7 @@ def git_patch_tracked(path: Path) -> str:
     chdir(cwd)
     return out
     
+@timed()
 def git_patch_untracked(path: Path) -> str:
     """ Generate a patchfile of the diff for all untracked files in the repo
     
@@ -121,6 +125,7 @@ def git_patch_untracked(path: Path) -> str:
     chdir(cwd)
     return untracked_patch.decode('utf-8') if len(err) == 0 else err.decode('utf-8')
 
+@timed()
 def retrieve_from_pkg(path: Path):
     """ Retrieves git information from the installed package location if possible.
 
@@ -6,12 +6,13 @@ Utility module for managing Jigsaw created datasets.
 """
 
 import json
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from botocore.exceptions import ClientError
 from ravenml.utils.local_cache import RMLCache
-from ravenml.utils.config import get_config
-from ravenml.utils.aws import list_top_level_bucket_prefixes
+from ravenml.utils.config import get_config, get_optional_field
+from ravenml.utils.aws import list_top_level_bucket_prefixes, download_object_if_modified, read_validator, verify_prefix
+from ravenml.utils.storage import storage_driver
 
 imageset_cache = RMLCache('imagesets')
 # name of config field
@@ -49,6 +50,48 @@ def get_imageset_metadata(name: str, no_check=False) -> dict:
             raise KeyError(name) from e
     return json.load(open(imageset_cache.path / Path(name) / 'metadata.json'))
 
+def refresh_imageset_metadata(names: list, num_threads=10) -> dict:
+    """Concurrently ensures cached metadata is present and current for several imagesets.
+
+    After this call, get_imageset_metadata(name, no_check=True) can be used for every
+    imageset that did not fail.
+
+    Args:
+        names (list): imageset names
+        num_threads (int, optional): Defaults to 10. Number of concurrent revalidations.
+
+    Returns:
+        dict: maps each imageset name to the error raised while ensuring its metadata
+            (ValueError for invalid names, KeyError for imagesets without metadata files),
+            or None if its metadata is ready
+    """
+    def ensure(name):
+        try:
+            get_imageset_metadata(name)
+        except (ValueError, KeyError) as e:
+            return e
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        return dict(zip(names, executor.map(ensure, names)))
+
+def verify_imageset_cache(name: str) -> dict:
+    """Verifies the locally cached copy of an imageset against its checksum manifest,
+    downloading again only missing or corrupted files.
+
+    Args:
+        name (str): string name of imageset
+
+    Returns:
+        dict: verification summary, see ravenml.utils.aws.verify_prefix
+
+    Raises:
+        ValueError: if the imageset is not cached locally or has no manifest
+    """
+    local_path = imageset_cache.path / Path(name)
+    if not local_path.is_dir():
+        raise ValueError(name)
+    config = get_config()
+    return verify_prefix(config[BUCKET_FIELD], name, local_path)
+
 # NOTE: this function is left here as a template for the eventual "get_imageset" function
 # not implemented yet because we may find a better way to get image sets than actually downloading them locally
 # def get_dataset(name: str) -> Dataset:
@@ -72,11 +115,14 @@ def get_imageset_metadata(name: str, no_check=False) -> dict:
 
 ### PRIVATE HELPERS ###
 def _ensure_metadata(name: str):
-    """Ensure imageset metadata exists.
+    """Ensure imageset metadata exists and is current.
     NOTE: This function works around the fact that we don't have
     imageset wide metadata files for all imagesets. In that case, it
     picks a random metadata file and reports the fields contained within.
 
+    Cached metadata is trusted for the "metadata_ttl" configured in the ravenml config,
+    after which the object it was downloaded from is revalidated with a conditional request.
+
     Args:
         name (str): name of imageset
         
@@ -84,32 +130,30 @@ def _ensure_metadata(name: str):
         ClientError: If the given imageset name does not exist in the S3 bucket.
         StopIteration: If the given imageset does not have any metadata files named according to the standard scheme.
     """
-    S3 = boto3.resource('s3')
     config = get_config()
-    image_bucket = S3.Bucket(config[BUCKET_FIELD])
-    cache_metadata_path = Path(name) / 'metadata.json'      # relative path inside the cache where metadata will go
-    if not imageset_cache.subpath_exists(cache_metadata_path):
-        imageset_cache.ensure_subpath_exists(name)
-        # attempt to download set-wide metadata.json
-        imageset_bucket_metadata_key = f'{name}/metadata.json'
-        metadata_download_absolute_path = imageset_cache.path / cache_metadata_path
+    ttl = get_optional_field(config, 'metadata_ttl')
+    imageset_cache.ensure_subpath_exists(name)
+    metadata_download_absolute_path = imageset_cache.path / Path(name) / 'metadata.json'
+    # revalidate against whichever object the cached copy came from, preferring set-wide metadata.json
+    imageset_bucket_metadata_key = read_validator(metadata_download_absolute_path).get('key', f'{name}/metadata.json')
+    try:
+        # attempt to grab imageset-wide metadata
+        download_object_if_modified(config[BUCKET_FIELD], imageset_bucket_metadata_key, 
+                                    metadata_download_absolute_path, ttl=ttl)
+    except ClientError as e:
+        # fallback to grabbing a single image metadata file (better than nothing)
+        prefix = f'{name}/meta_'
+        # get all items in bucket with this prefix, but limit results to 1
+        image_metadata_objects = storage_driver(config[BUCKET_FIELD]).list(config[BUCKET_FIELD], prefix, limit=1)
         try:
-            # attempt to grab imageset-wide metadata
-            image_bucket.download_file(imageset_bucket_metadata_key, str(metadata_download_absolute_path))
+            image_metadata_key = next(iter(image_metadata_objects))['Key']
+            download_object_if_modified(config[BUCKET_FIELD], image_metadata_key, 
+                                        metadata_download_absolute_path, ttl=ttl)
+        # explicitly reraise these errors for verbosity
         except ClientError as e:
-            # fallback to grabbing a single image metadata file (better than nothing)
-            prefix = f'{name}/meta_'
-            # get all items in bucket with this prefix, but limit results to 1
-            image_metadata_key_collection = image_bucket.objects.filter(Delimiter='/', Prefix=prefix).limit(1)
-            # filter() returns a collection iterable, which we must convert to an iterator (generator) and call next on
-            try:
-                image_metadata_key = next(iter(image_metadata_key_collection)).key
-                image_bucket.download_file(image_metadata_key, str(metadata_download_absolute_path))
-            # explicitly reraise these errors for verbosity
-            except ClientError as e:
-                raise
-            except StopIteration as e:
-                raise
+            raise
+        except StopIteration as e:
+            raise
 
 # NOTE: this function is left here as a template for the eventual "ensure_imageset" function
 # not implemented yet because we may find a better way to get image sets than actually downloading them locally
@@ -6,12 +6,26 @@ Handles local file caching for ravenml.
 """
 
 import os
+import errno
 import shutil
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+try:
+    import fcntl
+except ImportError:
+    # no inter-process locks on Windows, entries are only locked between threads
+    fcntl = None
 
 
 # local cache root path for ravenml application
 RAVENML_LOCAL_STORAGE_PATH = Path(os.environ.get("RAVENML_STORAGE_PATH", os.path.expanduser('~/.ravenML')))
+# directory inside a cache holding the lock files of its entries
+LOCKS_DIRNAME = '.locks'
+
+# in-process locks of cache entries by lock file path, see RMLCache.lock
+_entry_locks = {}
+_entry_locks_guard = threading.Lock()
 
 
 class RMLCache(object):
@@ -57,6 +71,48 @@ class RMLCache(object):
         if self.subpath_exists(subpath):
             shutil.rmtree(self.path / Path(subpath))
 
+    @contextmanager
+    def lock(self, subpath: str):
+        """Context manager holding an exclusive lock on an entry of the cache, across the
+        threads of this process and every process using the same cache on the machine.
+
+        Args:
+            subpath (str): entry to lock (i.e 'imagesets/my_imageset')
+        """
+        lock_path = self.path / LOCKS_DIRNAME / f'{subpath}.lock'
+        with _entry_locks_guard:
+            thread_lock = _entry_locks.setdefault(str(lock_path), threading.Lock())
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(lock_path.parent, exist_ok=True)
+            with open(lock_path, 'a') as f:
+                # released when the file is closed, including if the process dies
+                fcntl.flock(f, fcntl.LOCK_EX)
+                yield
+
+    def single_flight(self, subpath: str, is_current, fill) -> bool:
+        """Fills an entry of the cache once among concurrent threads and processes.
+
+        The entry is checked and filled under its lock, so callers which waited while
+        another filled the entry find it current and reuse it rather than filling it again.
+
+        Args:
+            subpath (str): entry to fill (i.e 'datasets/my_dataset')
+            is_current (callable): called without arguments, returns whether the entry
+                is present and current
+            fill (callable): called without arguments to fill the entry
+
+        Returns:
+            bool: T if this caller filled the entry, F if it was already current
+        """
+        with self.lock(subpath):
+            if is_current():
+                return False
+            fill()
+            return True
+
     def clean(self) -> bool:
         """Cleans local storage cache.
         
@@ -68,4 +124,34 @@ class RMLCache(object):
             return True
         except FileNotFoundError:
             return False
+
+def partial_path(destination: Path) -> Path:
+    """Names the temporary file a file is written to before being atomically renamed
+    into place, unique to the calling process and thread so concurrent writers of the
+    same file never write into each other's partial copy.
+
+    Args:
+        destination (Path): path the file is published at
+
+    Returns:
+        Path: temporary path next to destination
+    """
+    destination = Path(destination)
+    return destination.with_name(f'{destination.name}.{os.getpid()}.{threading.get_ident()}.part')
+
+def link_or_copy(source: Path, destination: Path):
+    """Hardlinks a file into place, copying it instead if the destination is on
+    another filesystem. Linked files share storage, so they must not be modified in place.
+
+    Args:
+        source (Path): existing file
+        destination (Path): path to create, its directory is created if needed
+    """
+    os.makedirs(Path(destination).parent, exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        shutil.copy2(source, destination)
     
\ No newline at end of file
@@ -0,0 +1,383 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Memory accounting and memory-budgeted containers for dataset creation.
+
+MemoryBudget represents the "memory_budget" dataset config option. SpillList and
+SpillDict behave like a list and dict until the process exceeds its budget, after
+which they move their contents to disk and keep only bookkeeping in memory.
+"""
+
+import os
+import re
+import sys
+import pickle
+import random
+import shutil
+import sqlite3
+import tempfile
+import tracemalloc
+import weakref
+from collections.abc import MutableMapping
+from pathlib import Path, PurePath
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+# multipliers for the units accepted by parse_size
+SIZE_UNITS = {'': 1, 'B': 1, 'K': 2**10, 'KB': 2**10, 'M': 2**20, 'MB': 2**20,
+                'G': 2**30, 'GB': 2**30, 'T': 2**40, 'TB': 2**40}
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+### MEMORY ACCOUNTING ###
+def parse_size(size) -> int:
+    """Parses a human readable size such as "512MB" or "4G" into bytes.
+
+    Args:
+        size (str or int): size to parse, ints are taken as bytes
+
+    Returns:
+        int: number of bytes, None if size is None
+
+    Raises:
+        ValueError: if size is not a valid size
+    """
+    if size is None or isinstance(size, int):
+        return size
+    match = re.fullmatch(r'\s*([\d.]+)\s*([A-Za-z]*)\s*', str(size))
+    if not match or match.group(2).upper() not in SIZE_UNITS:
+        raise ValueError(f'Invalid size "{size}"')
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+def current_rss() -> int:
+    """Retrieves the resident set size of this process.
+
+    Returns:
+        int: current RSS in bytes. Falls back to the peak RSS on platforms
+            without /proc.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+def peak_rss() -> int:
+    """Retrieves the peak resident set size of this process. On Linux the peak
+    can be reset with reset_peaks.
+
+    Returns:
+        int: peak RSS in bytes, 0 if it cannot be determined
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+def reset_peaks():
+    """Resets the peak RSS (Linux only) and the tracemalloc peak (Python >= 3.9),
+    so the next read_peaks only reflects what happened after this call.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+    if tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+def read_peaks() -> tuple:
+    """Reads the memory high water marks since the last reset_peaks.
+
+    Returns:
+        tuple: (peak RSS in bytes, peak Python allocations traced by tracemalloc
+            in bytes or None if tracemalloc is not tracing)
+    """
+    traced = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+    return peak_rss(), traced
+
+
+class MemoryBudget(object):
+    """Represents a limit on the resident memory of the process.
+
+    Args:
+        limit (int or str): limit in bytes, or a size string accepted by parse_size
+        spill_dir (Path, optional): directory containers spill to, defaults to
+            the system temporary directory
+
+    Attributes:
+        limit (int): limit in bytes
+        spill_dir (Path): directory containers spill to
+    """
+    def __init__(self, limit, spill_dir: Path = None):
+        self.limit = parse_size(limit)
+        self.spill_dir = Path(spill_dir) if spill_dir else Path(tempfile.gettempdir())
+
+    def exceeded(self) -> bool:
+        """Checks if the process currently uses more memory than the budget allows.
+
+        Returns:
+            bool: T if current RSS is over the limit
+        """
+        return current_rss() > self.limit
+
+    def allows(self, nbytes: int) -> bool:
+        """Checks if allocating nbytes more keeps the process within the budget.
+
+        Args:
+            nbytes (int): size of the intended allocation
+
+        Returns:
+            bool: T if the allocation fits
+        """
+        return current_rss() + nbytes <= self.limit
+
+    def make_spill_dir(self, prefix: str) -> Path:
+        """Creates a temporary directory to spill into.
+
+        Args:
+            prefix (str): prefix of the directory name
+
+        Returns:
+            Path: path to the new directory
+        """
+        os.makedirs(self.spill_dir, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix=prefix, dir=self.spill_dir))
+
+
+### SPILLING CONTAINERS ###
+class SpillList(object):
+    """Append-only list which moves completed chunks to disk once the process
+    exceeds its memory budget. Supports len, iteration, indexing and slicing,
+    so it can be used wherever image_ids lists are read.
+
+    Args:
+        budget (MemoryBudget): budget checked every chunk_size appends
+        items (iterable, optional): initial contents
+        chunk_size (int, optional): number of items per spilled chunk, default 50000
+    """
+    def __init__(self, budget: MemoryBudget, items=(), chunk_size: int = 50000):
+        self._budget = budget
+        self._chunk_size = chunk_size
+        self._chunks = []           # paths of spilled chunk files
+        self._offsets = [0]         # index of the first item of each chunk, plus the total spilled
+        self._buffer = []
+        self._dir = None
+        self._cached = (None, None)     # (chunk index, chunk contents) of the last chunk read
+        self.extend(items)
+
+    @property
+    def spilled(self) -> bool:
+        """bool: T if some contents live on disk"""
+        return bool(self._chunks)
+
+    def append(self, item):
+        self._buffer.append(item)
+        if len(self._buffer) >= self._chunk_size and (self._chunks or self._budget.exceeded()):
+            self._spill()
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return self._offsets[-1] + len(self._buffer)
+
+    def __iter__(self):
+        for i in range(len(self._chunks)):
+            yield from self._load(i)
+        yield from list(self._buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SpillList index out of range')
+        if index >= self._offsets[-1]:
+            return self._buffer[index - self._offsets[-1]]
+        # binary search for the chunk holding index
+        lo, hi = 0, len(self._chunks) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._offsets[mid] <= index:
+                lo = mid
+            else:
+                hi = mid - 1
+        return self._load(lo)[index - self._offsets[lo]]
+
+    def _spill(self):
+        if self._dir is None:
+            self._dir = self._budget.make_spill_dir('ravenml_list_')
+            weakref.finalize(self, shutil.rmtree, str(self._dir), True)
+        path = self._dir / f'{len(self._chunks)}.pkl'
+        with open(path, 'wb') as f:
+            pickle.dump(self._buffer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._chunks.append(path)
+        self._offsets.append(self._offsets[-1] + len(self._buffer))
+        self._buffer = []
+
+    def _load(self, chunk: int) -> list:
+        if self._cached[0] != chunk:
+            with open(self._chunks[chunk], 'rb') as f:
+                self._cached = (chunk, pickle.load(f))
+        return self._cached[1]
+
+
+class SpillDict(MutableMapping):
+    """Insertion ordered dict which moves its contents into an on-disk SQLite
+    store once the process exceeds its memory budget. Keys and values must
+    be picklable. Spilled keys are looked up by a canonical encoding (see
+    _key_bytes), so keys must be built from paths, strings, numbers, None and
+    tuples of these, as image_ids are.
+
+    Args:
+        budget (MemoryBudget): budget checked every check_every insertions
+        check_every (int, optional): insertions between budget checks, default 1000
+    """
+    def __init__(self, budget: MemoryBudget, check_every: int = 1000):
+        self._budget = budget
+        self._check_every = check_every
+        self._memory = {}
+        self._db = None
+        self._inserts = 0
+
+    @property
+    def spilled(self) -> bool:
+        """bool: T if contents live on disk"""
+        return self._db is not None
+
+    def __setitem__(self, key, value):
+        if self._db is None:
+            self._memory[key] = value
+            self._inserts += 1
+            if self._inserts % self._check_every == 0 and self._budget.exceeded():
+                self._spill()
+            return
+        k, v = _key_bytes(key), _dumps(value)
+        if self._db.execute('UPDATE objects SET value = ? WHERE key = ?', (v, k)).rowcount == 0:
+            self._db.execute('INSERT INTO objects (key, pickled_key, value) VALUES (?, ?, ?)', (k, _dumps(key), v))
+
+    def __getitem__(self, key):
+        if self._db is None:
+            return self._memory[key]
+        row = self._db.execute('SELECT value FROM objects WHERE key = ?', (_key_bytes(key),)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
+
+    def __delitem__(self, key):
+        if self._db is None:
+            del self._memory[key]
+        elif self._db.execute('DELETE FROM objects WHERE key = ?', (_key_bytes(key),)).rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self):
+        if self._db is None:
+            yield from list(self._memory)
+        else:
+            for row in self._db.execute('SELECT pickled_key FROM objects ORDER BY rowid'):
+                yield pickle.loads(row[0])
+
+    def __len__(self):
+        if self._db is None:
+            return len(self._memory)
+        return self._db.execute('SELECT COUNT(*) FROM objects').fetchone()[0]
+
+    def items_view(self, keys: list = None) -> 'SpillView':
+        """Creates a lazily loaded sequence of (key, value) pairs.
+
+        Args:
+            keys (list, optional): keys to include, defaults to all keys in insertion order
+
+        Returns:
+            SpillView: sequence of pairs, values are only loaded when accessed
+        """
+        return SpillView(self, list(self) if keys is None else keys)
+
+    def _spill(self):
+        directory = self._budget.make_spill_dir('ravenml_dict_')
+        self._db = sqlite3.connect(str(directory / 'objects.db'), isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode = OFF')
+        self._db.execute('PRAGMA synchronous = OFF')
+        # keys are stored pickled to be iterated, and canonically encoded to be looked up
+        self._db.execute('CREATE TABLE objects (key BLOB PRIMARY KEY, pickled_key BLOB, value BLOB)')
+        self._db.executemany('INSERT INTO objects (key, pickled_key, value) VALUES (?, ?, ?)',
+                                ((_key_bytes(k), _dumps(k), _dumps(v)) for k, v in self._memory.items()))
+        self._memory = {}
+        weakref.finalize(self, _close_and_remove, self._db, str(directory))
+
+
+class SpillView(object):
+    """Sequence over a subset of a SpillDict's keys which loads values on access.
+
+    Slicing returns another view and shuffle() shuffles the keys in place, so
+    split_data can split views without loading any values.
+
+    Args:
+        store (SpillDict): dict to read values from
+        keys (list): keys in the view
+        values_only (bool, optional): yield values instead of (key, value) pairs, default False
+    """
+    def __init__(self, store: SpillDict, keys: list, values_only: bool = False):
+        self._store = store
+        self.keys = keys
+        self._values_only = values_only
+
+    def values(self) -> 'SpillView':
+        """Creates a view over the same keys yielding values only.
+
+        Returns:
+            SpillView: values view
+        """
+        return SpillView(self._store, self.keys, values_only=True)
+
+    def shuffle(self, rng: random.Random = None):
+        (rng or random).shuffle(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SpillView(self._store, self.keys[index], self._values_only)
+        key = self.keys[index]
+        return self._store[key] if self._values_only else (key, self._store[key])
+
+    def __iter__(self):
+        for i in range(len(self.keys)):
+            yield self[i]
+
+
+### HELPERS ###
+def _dumps(obj) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _key_bytes(key) -> bytes:
+    # pickles of equal keys differ with the identity of the objects they hold, so
+    # spilled keys are looked up by the repr of their canonical form instead
+    return repr(_canonical(key)).encode()
+
+def _canonical(obj):
+    if isinstance(obj, PurePath):
+        return ('path', obj.as_posix())
+    if isinstance(obj, tuple):
+        return tuple(_canonical(item) for item in obj)
+    return obj
+
+def _close_and_remove(db, directory: str):
+    db.close()
+    shutil.rmtree(directory, ignore_errors=True)
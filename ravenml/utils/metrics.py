@@ -0,0 +1,201 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Opt-in export of run metrics for monitoring.
+
+When a metrics directory is configured (the "metrics_dir" field of the ravenml config,
+or the RAVENML_METRICS_DIR environment variable), each run of a ravenml command:
+    - appends one JSON line per finished stage, and one summarizing the run, to
+      metrics.jsonl in the directory
+    - writes its final metrics in the Prometheus text format to ravenml_<command>.prom
+      in the directory, for the node_exporter textfile collector
+
+Stage durations, items and bytes come from progress tasks (see ravenml.utils.progress),
+S3 request and retry counts from every client made by ravenml.utils.storage.s3_client, and
+cache hits and misses from the caches reporting them through record_cache.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+import shortuuid
+from pathlib import Path
+from ravenml.utils.progress import progress
+from ravenml.utils.config import get_config, get_optional_field
+
+# environment variable enabling metrics, overriding the ravenml config
+METRICS_DIR_VARIABLE = 'RAVENML_METRICS_DIR'
+JSONL_FILENAME = 'metrics.jsonl'
+METRIC_PREFIX = 'ravenml'
+
+
+class MetricsSink(object):
+    """Collects the metrics of a run and writes them out.
+
+    Attributes:
+        enabled (bool): whether metrics are being collected
+        path (Path): directory metrics are written to, None when disabled
+        labels (dict): labels of every metric of the run ("command" and "run_id")
+        counters (dict): maps (metric name, sorted label tuples) to values
+    """
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.labels = {}
+        self.counters = {}
+        self._started = None
+        self._lock = threading.Lock()
+
+    def start(self, path: Path, command: str):
+        """Starts collecting metrics, written out when the process exits.
+
+        Args:
+            path (Path): directory to write metrics to
+            command (str): name of the command being run, i.e "train"
+        """
+        self.path = Path(os.path.expanduser(str(path)))
+        os.makedirs(self.path, exist_ok=True)
+        self.labels = {'command': command, 'run_id': shortuuid.uuid()[:12]}
+        self.counters = {}
+        self._started = time.time()
+        if not self.enabled:
+            self.enabled = True
+            progress.listeners.append(self._record_task)
+            atexit.register(self.flush)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Adds to a counter.
+
+        Args:
+            name (str): metric name, without the ravenml prefix (i.e, "s3_requests_total")
+            value (float, optional): Defaults to 1. Amount added.
+            **labels: labels of the counter besides those of the run
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def event(self, name: str, **fields):
+        """Appends an event to the JSON lines file.
+
+        Args:
+            name (str): name of the event
+            **fields: fields of the event
+        """
+        if not self.enabled:
+            return
+        line = json.dumps(dict(self.labels, event=name, time=time.time(), **fields), default=str)
+        with self._lock, open(self.path / JSONL_FILENAME, 'a') as f:
+            f.write(line + '\n')
+
+    def summary(self) -> dict:
+        """Summarizes the metrics collected so far.
+
+        Returns:
+            dict: counters of the run keyed by metric name and labels (i.e,
+                'cache_hits_total{cache="s3_files"}'), and cache hit ratios
+        """
+        with self._lock:
+            counters = dict(self.counters)
+        summary = {_series(name, dict(labels)): value for (name, labels), value in counters.items()}
+        summary.update({_series('cache_hit_ratio', {'cache': cache}): ratio for cache, ratio in self._hit_ratios(counters).items()})
+        return summary
+
+    def flush(self):
+        """Writes the summary of the run to the JSON lines file and the Prometheus textfile.
+        """
+        if not self.enabled:
+            return
+        self.event('run', seconds=round(time.time() - self._started, 3), metrics=self.summary())
+        with self._lock:
+            counters = dict(self.counters)
+        lines = []
+        samples = sorted(counters.items()) + [(('cache_hit_ratio', (('cache', cache),)), ratio)
+                                                for cache, ratio in sorted(self._hit_ratios(counters).items())]
+        samples.append((('run_seconds', ()), round(time.time() - self._started, 3)))
+        typed = set()
+        for (name, labels), value in samples:
+            if name not in typed:
+                typed.add(name)
+                kind = 'counter' if name.endswith('_total') else 'gauge'
+                lines.append(f'# TYPE {METRIC_PREFIX}_{name} {kind}')
+            lines.append(f'{METRIC_PREFIX}_{_series(name, dict(self.labels, **dict(labels)))} {value}')
+        # written to a temporary file first so the collector never reads a partial file
+        textfile = self.path / f'{METRIC_PREFIX}_{self.labels["command"]}.prom'
+        partial_path = textfile.with_name(f'{textfile.name}.{os.getpid()}.part')
+        with open(partial_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(partial_path, textfile)
+
+    def _record_task(self, path: str, record: dict):
+        # progress listener, every finished task is a stage
+        self.increment('stage_seconds_total', record['seconds'], stage=path)
+        self.increment('stage_items_total', record['items'], stage=path)
+        self.increment('stage_bytes_total', record['bytes'], stage=path)
+        self.event('stage', stage=path, **record)
+
+    def _hit_ratios(self, counters: dict) -> dict:
+        hits, totals = {}, {}
+        for (name, labels), value in counters.items():
+            if name in ('cache_hits_total', 'cache_misses_total'):
+                cache = dict(labels).get('cache')
+                totals[cache] = totals.get(cache, 0) + value
+                if name == 'cache_hits_total':
+                    hits[cache] = hits.get(cache, 0) + value
+        return {cache: round(hits.get(cache, 0) / total, 4) for cache, total in totals.items() if total}
+
+
+### PUBLIC METHODS ###
+# metrics sink shared by all of ravenml
+metrics = MetricsSink()
+
+def start_metrics(command: str):
+    """Starts collecting metrics if a metrics directory is configured.
+
+    Args:
+        command (str): name of the command being run
+    """
+    path = os.environ.get(METRICS_DIR_VARIABLE)
+    if path is None:
+        try:
+            path = get_optional_field(get_config(), 'metrics_dir')
+        except (ValueError, FileNotFoundError):
+            return
+    if path:
+        metrics.start(path, command)
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    """Records hits or misses of a cache.
+
+    Args:
+        cache (str): name of the cache (i.e, "s3_files")
+        hit (bool): whether the lookups were hits
+        count (int, optional): Defaults to 1. Number of lookups.
+    """
+    if count:
+        metrics.increment('cache_hits_total' if hit else 'cache_misses_total', count, cache=cache)
+
+def record_s3_call(http_response=None, parsed=None, model=None, **kwargs):
+    """botocore "after-call" event handler counting S3 requests and their retries.
+    """
+    if not metrics.enabled or model is None:
+        return
+    attempts = (parsed or {}).get('ResponseMetadata', {}).get('RetryAttempts', 0)
+    metrics.increment('s3_requests_total', operation=model.name)
+    if attempts:
+        metrics.increment('s3_retries_total', attempts, operation=model.name)
+
+
+### HELPERS ###
+def _series(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + '}'
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,268 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Utility module for finding and retrieving trained models.
+
+Trained models are uploaded to the model bucket as models/<architecture>_<uuid><ext>,
+with their metadata at models/metadata_<uuid>.json and extra files under extras/<uuid>/.
+Model metadata is indexed in a local SQLite database which is synced incrementally:
+only metadata whose ETag changed since the last sync is downloaded. Pulled files are
+stored once per ETag in a content addressed object store and hardlinked into the
+directory of each model, so files shared between models or pulled twice are only
+downloaded once.
+"""
+
+import os
+import json
+import sqlite3
+from contextlib import contextmanager, closing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from botocore.exceptions import ClientError
+from ravenml.utils.local_cache import RMLCache, link_or_copy, partial_path
+from ravenml.utils.config import get_config
+from ravenml.utils.aws import list_objects, scheduler
+from ravenml.utils.storage import storage_driver
+from ravenml.utils.metrics import record_cache
+
+model_cache = RMLCache('models')
+# name of bucket field inside config dict
+BUCKET_FIELD = 'model_bucket_name'
+INDEX_FILENAME = 'index.sqlite'
+OBJECTS_DIRNAME = 'objects'
+METADATA_PREFIX = 'metadata_'
+# columns of the index which can be queried, besides the full metadata
+INDEX_COLUMNS = ['uuid', 'architecture', 'model_key', 'dataset', 'created_by', 'comments',
+                    'date_started_at', 'ravenml_git_sha', 'plugin_git_sha']
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS models (
+    {', '.join(f'{column} TEXT' for column in INDEX_COLUMNS)},
+    metadata_etag TEXT,
+    metadata TEXT,
+    PRIMARY KEY (uuid)
+);
+CREATE INDEX IF NOT EXISTS models_architecture ON models (architecture);
+CREATE INDEX IF NOT EXISTS models_dataset ON models (dataset);
+CREATE INDEX IF NOT EXISTS models_date ON models (date_started_at);
+"""
+
+
+### PUBLIC METHODS ###
+def sync_model_index(num_threads: int = 10) -> dict:
+    """Brings the local model index up to date with the model bucket.
+
+    Args:
+        num_threads (int, optional): Defaults to 10. Number of concurrent metadata downloads.
+
+    Returns:
+        dict: numbers of models "added", "updated" and "removed" from the index
+    """
+    bucket_name = get_config()[BUCKET_FIELD]
+    metadata_etags, model_keys = {}, {}
+    for obj in list_objects(bucket_name, 'models'):
+        name = obj['Key'][len('models/'):]
+        if name.startswith(METADATA_PREFIX) and name.endswith('.json'):
+            metadata_etags[name[len(METADATA_PREFIX):-len('.json')]] = obj['ETag']
+        elif name:
+            model_keys[_uuid_of(name)] = obj['Key']
+
+    with _connect() as db:
+        indexed = dict(db.execute('SELECT uuid, metadata_etag FROM models'))
+        changed = [uuid for uuid, etag in metadata_etags.items() if indexed.get(uuid) != etag]
+        removed = [uuid for uuid in indexed if uuid not in metadata_etags]
+
+        def fetch(uuid):
+            with scheduler.transfer('metadata'):
+                body = storage_driver(bucket_name).get(bucket_name, f'models/{METADATA_PREFIX}{uuid}.json')['Body']
+                with closing(body):
+                    return uuid, json.loads(body.read())
+
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            fetched = list(executor.map(fetch, changed))
+        db.executemany(f'INSERT OR REPLACE INTO models VALUES ({", ".join("?" * (len(INDEX_COLUMNS) + 2))})',
+                        [_row(uuid, metadata, model_keys.get(uuid), metadata_etags[uuid]) for uuid, metadata in fetched])
+        db.executemany('DELETE FROM models WHERE uuid = ?', [(uuid,) for uuid in removed])
+    return {'added': sum(1 for uuid in changed if uuid not in indexed),
+            'updated': sum(1 for uuid in changed if uuid in indexed), 'removed': len(removed)}
+
+def query_models(architecture: str = None, dataset: str = None, git_sha: str = None, since: str = None,
+                    until: str = None, text: str = None, limit: int = None) -> list:
+    """Queries the local model index, newest models first.
+
+    Args:
+        architecture (str, optional): architecture of the models
+        dataset (str, optional): name of the dataset the models were trained on
+        git_sha (str, optional): prefix of the ravenml or plugin git sha the models were trained with
+        since (str, optional): earliest start date (ISO format, i.e "2026-01-31")
+        until (str, optional): latest start date (ISO format)
+        text (str, optional): text anywhere in the models' metadata
+        limit (int, optional): largest number of models returned
+
+    Returns:
+        list: dicts of the INDEX_COLUMNS of each matching model
+    """
+    clauses, params = [], []
+    for column, value in (('architecture', architecture), ('dataset', dataset)):
+        if value is not None:
+            clauses.append(f'{column} = ?')
+            params.append(value)
+    if git_sha is not None:
+        clauses.append('(ravenml_git_sha LIKE ? OR plugin_git_sha LIKE ?)')
+        params += [f'{git_sha}%'] * 2
+    if since is not None:
+        clauses.append('date_started_at >= ?')
+        params.append(since)
+    if until is not None:
+        # dates without a time include the whole day
+        clauses.append('date_started_at <= ?')
+        params.append(until if 'T' in until else f'{until}T99')
+    if text is not None:
+        clauses.append('instr(metadata, ?) > 0')
+        params.append(text)
+    query = f'SELECT {", ".join(INDEX_COLUMNS)} FROM models'
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += ' ORDER BY date_started_at DESC'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    with _connect() as db:
+        return [dict(zip(INDEX_COLUMNS, row)) for row in db.execute(query, params)]
+
+def get_model_metadata(uuid: str) -> dict:
+    """Retrieves the metadata of a model from the local index.
+
+    Args:
+        uuid (str): UUID of the model
+
+    Returns:
+        dict: model metadata
+
+    Raises:
+        ValueError: if the model is not in the index
+    """
+    with _connect() as db:
+        row = db.execute('SELECT metadata FROM models WHERE uuid = ?', (uuid,)).fetchone()
+    if row is None:
+        raise ValueError(uuid)
+    return json.loads(row[0])
+
+def pull_model(uuid: str, num_threads: int = 10) -> Path:
+    """Downloads a model, its metadata and its extra files into the local cache.
+    Files already in the object store with the same ETag are not downloaded again.
+
+    Args:
+        uuid (str): UUID of the model
+        num_threads (int, optional): Defaults to 10. Number of concurrent downloads.
+
+    Returns:
+        Path: directory holding the model file, metadata.json and an extras directory
+
+    Raises:
+        ValueError: if no model with the UUID exists in the model bucket
+    """
+    bucket_name = get_config()[BUCKET_FIELD]
+    objects = _model_objects(bucket_name, uuid)
+    if not objects:
+        raise ValueError(uuid)
+    objects += [obj for obj in list_objects(bucket_name, f'extras/{uuid}') if not obj['Key'].endswith('/')]
+    model_path = model_cache.path / uuid
+
+    def pull(obj):
+        key = obj['Key']
+        if key.startswith('extras/'):
+            destination = model_path / 'extras' / key[len(f'extras/{uuid}/'):]
+        elif key.endswith(f'{METADATA_PREFIX}{uuid}.json'):
+            destination = model_path / 'metadata.json'
+        else:
+            destination = model_path / key[len('models/'):]
+        stored = _fetch_object(bucket_name, key, obj['ETag'])
+        # linked under a temporary name and renamed, as concurrent pulls of the model
+        # replace the same destination
+        temp_path = partial_path(destination)
+        if temp_path.exists():
+            os.remove(temp_path)
+        link_or_copy(stored, temp_path)
+        os.replace(temp_path, destination)
+        if temp_path.exists():
+            # renaming onto a link to the same file does nothing, it was already in place
+            os.remove(temp_path)
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        list(executor.map(pull, objects))
+    return model_path
+
+
+### HELPERS ###
+@contextmanager
+def _connect():
+    # connection to the index committing on success, created on first use
+    model_cache.ensure_exists()
+    db = sqlite3.connect(str(model_cache.path / INDEX_FILENAME))
+    try:
+        db.executescript(_SCHEMA)
+        with db:
+            yield db
+    finally:
+        db.close()
+
+def _model_objects(bucket_name: str, uuid: str) -> list:
+    # summaries of the model file and metadata of a model, located through the index when possible
+    with _connect() as db:
+        row = db.execute('SELECT model_key FROM models WHERE uuid = ?', (uuid,)).fetchone()
+    if row is None or row[0] is None:
+        return [obj for obj in list_objects(bucket_name, 'models') if _uuid_of(obj['Key'][len('models/'):]) == uuid]
+    objects = []
+    for key in (row[0], f'models/{METADATA_PREFIX}{uuid}.json'):
+        try:
+            objects.append(dict(storage_driver(bucket_name).head(bucket_name, key), Key=key))
+        except ClientError:
+            # removed since the index was synced, find it by listing instead
+            return [obj for obj in list_objects(bucket_name, 'models') if _uuid_of(obj['Key'][len('models/'):]) == uuid]
+    return objects
+
+def _uuid_of(name: str) -> str:
+    # models are named <architecture>_<uuid><ext>, uuids contain no underscores or dots
+    return os.path.splitext(name)[0].rsplit('_', 1)[-1]
+
+def _row(uuid: str, metadata: dict, model_key: str, etag: str) -> tuple:
+    architecture = None
+    if model_key:
+        architecture = Path(model_key).name[:-len(f'_{uuid}{os.path.splitext(model_key)[1]}')] or None
+    if architecture is None:
+        # fall back to the plugin metadata, the only dict in metadata with an architecture
+        architecture = next((value['architecture'] for value in metadata.values()
+                                if isinstance(value, dict) and 'architecture' in value), None)
+    dataset = metadata.get('dataset_used') or {}
+    values = {
+        'uuid': uuid,
+        'architecture': architecture,
+        'model_key': model_key,
+        'dataset': dataset.get('name') if isinstance(dataset, dict) else str(dataset),
+        'created_by': metadata.get('created_by'),
+        'comments': metadata.get('comments'),
+        'date_started_at': metadata.get('date_started_at'),
+        'ravenml_git_sha': metadata.get('ravenml_git_sha'),
+        'plugin_git_sha': metadata.get('plugin_git_sha')
+    }
+    return tuple(values[column] for column in INDEX_COLUMNS) + (etag, json.dumps(metadata))
+
+def _fetch_object(bucket_name: str, key: str, etag: str) -> Path:
+    # downloads an object into the object store unless an object with its ETag is already there,
+    # once among concurrent pulls in this and other processes
+    digest = etag.strip('"')
+    stored = model_cache.path / OBJECTS_DIRNAME / digest[:2] / digest
+
+    def fetch():
+        os.makedirs(stored.parent, exist_ok=True)
+        temp_path = partial_path(stored)
+        with scheduler.transfer('artifacts'):
+            storage_driver(bucket_name).download(bucket_name, key, temp_path,
+                                                    callback=lambda nbytes: scheduler.throttle(nbytes, 'artifacts'))
+        os.replace(temp_path, stored)
+
+    fetched = model_cache.single_flight(f'{OBJECTS_DIRNAME}/{digest}', stored.exists, fetch)
+    record_cache('model_objects', hit=not fetched)
+    return stored
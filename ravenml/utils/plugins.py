@@ -27,6 +27,11 @@ class LazyPluginGroup(click.Group):
             self.commands[cmd_name] = command.load()
         return super().get_command(ctx, cmd_name)
 
+    def resolve_command(self, ctx, args):
+        # recorded so group callbacks can run the subcommand elsewhere (i.e, in sweep workers)
+        ctx.meta['subcommand_args'] = list(args)
+        return super().resolve_command(ctx, args)
+
     def format_commands(self, ctx, formatter):
         commands = self.list_commands(ctx)
         if commands:
@@ -0,0 +1,294 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Stage-level profiling for dataset creation and training runs.
+
+A single module level Profiler records nested timing spans for ravenml stages
+(anything run through cli_spinner), S3 transfers and git provenance calls,
+along with the peak memory use of each span.
+It is disabled by default, in which case spans cost a single attribute check.
+"""
+
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from functools import wraps
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from ravenml.utils.memory import current_rss, reset_peaks, read_peaks
+
+# profiling modes accepted by the --profile option
+PROFILE_MODES = ['timing', 'memory', 'cprofile', 'sampling']
+# filenames of the report files written into the dataset/artifact directory
+REPORT_FILENAME = 'profile.json'
+SPAN_STACKS_FILENAME = 'profile.folded'
+CPROFILE_FILENAME = 'profile.prof'
+SAMPLE_STACKS_FILENAME = 'profile_samples.folded'
+
+
+class Profiler(object):
+    """Records nested timing spans and optionally attaches a cProfile or
+    sampling profiler to the run.
+
+    Spans on the main thread also record the peak RSS reached while they were open
+    and, in "memory" mode, the peak of Python allocations traced by tracemalloc.
+
+    Attributes:
+        enabled (bool): whether spans are currently being recorded
+        mode (str): one of PROFILE_MODES, None when disabled
+        spans (list): finished spans as dicts with "stack", "duration", "self",
+            and (main thread only) "rss", "peak_rss" and "peak_traced" keys
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.mode = None
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root = None
+        self._cprofile = None
+        self._sampler = None
+        self._started_tracing = False
+        self._started = None
+
+    def start(self, mode: str = 'timing', name: str = 'run'):
+        """Starts profiling. Opens a root span which all other spans on the
+        calling thread are nested in.
+
+        Args:
+            mode (str, optional): one of PROFILE_MODES, default "timing"
+            name (str, optional): name of the root span, default "run"
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'Unknown profiling mode "{mode}"')
+        self.enabled = True
+        self.mode = mode
+        self.spans = []
+        # leave tracing started by the caller running when profiling stops
+        self._started_tracing = mode == 'memory' and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        if mode == 'cprofile':
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        elif mode == 'sampling':
+            self._sampler = _StackSampler(threading.get_ident())
+            self._sampler.start()
+        self._started = time.perf_counter()
+        self._root = self.span(name)
+        self._root.__enter__()
+
+    def stop(self):
+        """Stops profiling, closing the root span. Safe to call more than once.
+        """
+        if not self.enabled:
+            return
+        self._root.__exit__(None, None, None)
+        if self._cprofile:
+            self._cprofile.disable()
+        if self._sampler:
+            self._sampler.stop()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.enabled = False
+
+    @contextmanager
+    def span(self, name: str):
+        """Context manager timing the enclosed block as a span named name.
+        Spans opened inside it on the same thread are recorded as its children.
+
+        Args:
+            name (str): name of the span
+        """
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        # memory peaks are process wide, so they are only attributed to main thread spans
+        on_main = threading.current_thread() is threading.main_thread()
+        frame = {'name': name, 'children': 0.0, 'peak_rss': 0, 'peak_traced': None}
+        if on_main:
+            # fold peaks reached so far into the open spans before resetting them for this one
+            self._fold_peaks(stack)
+            reset_peaks()
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            if on_main:
+                self._fold_peaks(stack)
+            stack.pop()
+            if stack:
+                stack[-1]['children'] += duration
+                stack[-1]['peak_rss'] = max(stack[-1]['peak_rss'], frame['peak_rss'])
+                if frame['peak_traced'] is not None:
+                    stack[-1]['peak_traced'] = max(stack[-1]['peak_traced'] or 0, frame['peak_traced'])
+            names = [f['name'] for f in stack] + [name]
+            span = {
+                'stack': names,
+                'duration': duration,
+                'self': max(0.0, duration - frame['children'])
+            }
+            if on_main:
+                span.update(rss=current_rss(), peak_rss=frame['peak_rss'], peak_traced=frame['peak_traced'])
+            else:
+                # spans on worker threads are rooted at the thread name
+                names.insert(0, threading.current_thread().name)
+            with self._lock:
+                self.spans.append(span)
+
+    def _fold_peaks(self, stack: list):
+        peak_rss, peak_traced = read_peaks()
+        for frame in stack:
+            frame['peak_rss'] = max(frame['peak_rss'], peak_rss)
+            if peak_traced is not None:
+                frame['peak_traced'] = max(frame['peak_traced'] or 0, peak_traced)
+
+    def summary(self) -> dict:
+        """Aggregates recorded spans per stage.
+
+        Returns:
+            dict: report with the profiling mode, total run time (so far, if still
+                profiling) and one entry per distinct span stack, slowest first
+        """
+        stages = {}
+        for span in self.spans:
+            path = ';'.join(span['stack'])
+            stage = stages.setdefault(path, {
+                'name': span['stack'][-1],
+                'path': path,
+                'calls': 0,
+                'total_seconds': 0.0,
+                'self_seconds': 0.0,
+                'max_seconds': 0.0
+            })
+            stage['calls'] += 1
+            stage['total_seconds'] += span['duration']
+            stage['self_seconds'] += span['self']
+            stage['max_seconds'] = max(stage['max_seconds'], span['duration'])
+            if 'peak_rss' in span:
+                stage['peak_rss_bytes'] = max(stage.get('peak_rss_bytes', 0), span['peak_rss'])
+                stage['rss_after_bytes'] = span['rss']
+                if span['peak_traced'] is not None:
+                    stage['peak_traced_bytes'] = max(stage.get('peak_traced_bytes', 0), span['peak_traced'])
+        roots = [span['duration'] for span in self.spans if len(span['stack']) == 1]
+        # the root span is only recorded once profiling stops
+        running = time.perf_counter() - self._started if self.enabled else 0.0
+        return {
+            'mode': self.mode,
+            'total_seconds': sum(roots) + running,
+            'stages': sorted(stages.values(), key=lambda s: s['total_seconds'], reverse=True)
+        }
+
+    def write_report(self, directory: Path, stop: bool = True) -> list:
+        """Writes the profiling report into the given directory. Stops profiling
+        if it is still running, unless stop is False: the report then covers the spans
+        finished so far, and can be written again once later stages finish.
+
+        Always writes a JSON per-stage timing report and the span stacks in folded
+        format (one "a;b;c <microseconds>" line per stack, as consumed by flamegraph.pl
+        and speedscope). Depending on mode, also writes cProfile stats or folded
+        stacks from the sampling profiler.
+
+        Args:
+            directory (Path): directory to write the report files to
+            stop (bool, optional): Defaults to True. Whether to stop profiling.
+
+        Returns:
+            list: Paths of the files written
+        """
+        if stop:
+            self.stop()
+        directory = Path(directory)
+        written = [directory / REPORT_FILENAME, directory / SPAN_STACKS_FILENAME]
+        with open(written[0], 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        folded = defaultdict(float)
+        for span in self.spans:
+            folded[';'.join(span['stack'])] += span['self']
+        _write_folded(written[1], {stack: int(t * 1e6) for stack, t in folded.items()})
+        if self._cprofile:
+            written.append(directory / CPROFILE_FILENAME)
+            # collecting the stats disables the profiler
+            pstats.Stats(self._cprofile).dump_stats(str(written[-1]))
+            if self.enabled:
+                self._cprofile.enable()
+        if self._sampler:
+            written.append(directory / SAMPLE_STACKS_FILENAME)
+            # copied, the sampler may still be adding stacks
+            _write_folded(written[-1], dict(self._sampler.stacks))
+        return written
+
+
+class _StackSampler(threading.Thread):
+    """Daemon thread periodically sampling the stack of a target thread.
+
+    Args:
+        thread_id (int): identifier of the thread to sample
+        interval (float, optional): seconds between samples, default 0.005
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        super().__init__(name='ravenml-profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = defaultdict(int)
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+### PUBLIC METHODS ###
+# profiler shared by all of ravenml
+profiler = Profiler()
+
+def timed(name: str = None):
+    """Decorator recording each call of the decorated function as a profiling span.
+
+    Args:
+        name (str, optional): span name, defaults to "<module>.<function>"
+            (i.e, "aws.download_prefix")
+    """
+    def decorator(func):
+        span_name = name or f'{func.__module__.rsplit(".", 1)[-1]}.{func.__qualname__}'
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+### HELPERS ###
+def _write_folded(path: Path, stacks: dict):
+    with open(path, 'w') as f:
+        for stack, weight in sorted(stacks.items()):
+            if weight > 0:
+                f.write(f'{stack} {weight}\n')
@@ -0,0 +1,327 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Quantitative progress reporting for long running stages.
+
+Stages open tasks on the module level ProgressReporter and report completed items and
+bytes into them, from any thread:
+
+    with progress.task('Copying files', total=len(paths)) as task:
+        for path in paths:
+            ...
+            task.advance(nbytes=size)
+
+Tasks opened while another is open on the same thread are its sub-tasks. Active tasks
+are rendered periodically: as a progress bar in the text of the cli_spinner of the
+enclosing stage when attached to a terminal, and otherwise as structured "key=value"
+log lines on stderr. Finished tasks are aggregated by summary(), which is recorded as
+the throughput of dataset and training metadata.
+"""
+
+import sys
+import time
+import threading
+import click
+from contextlib import contextmanager
+
+# seconds between renders when attached to a terminal, and between log lines otherwise
+RENDER_INTERVAL = 0.5
+LOG_INTERVAL = 30
+BAR_WIDTH = 20
+
+
+class Task(object):
+    """Progress of a unit of work. Thread safe.
+
+    Attributes:
+        name (str): name of the task
+        total (int): number of items expected, None if unknown
+        total_bytes (int): number of bytes expected, None if unknown
+        completed (int): number of items completed
+        bytes (int): number of bytes processed
+        parent (Task): task this is a sub-task of, None for top level tasks
+        display (callable): called with a description of the task when rendering
+            to a terminal, None if not displayed
+    """
+    def __init__(self, name: str, total: int = None, total_bytes: int = None, parent=None, display=None):
+        self.name = name
+        self.total = total
+        self.total_bytes = total_bytes
+        self.completed = 0
+        self.bytes = 0
+        self.parent = parent
+        self.display = display
+        self.children = []
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def advance(self, items: int = 1, nbytes: int = 0):
+        """Reports completed work.
+
+        Args:
+            items (int, optional): Defaults to 1. Number of items completed.
+            nbytes (int, optional): Defaults to 0. Number of bytes processed.
+        """
+        with self._lock:
+            self.completed += items
+            self.bytes += nbytes
+
+    def set_total(self, total: int = None, total_bytes: int = None):
+        """Sets the amount of work expected, once known.
+
+        Args:
+            total (int, optional): number of items expected
+            total_bytes (int, optional): number of bytes expected
+        """
+        self.total = total if total is not None else self.total
+        self.total_bytes = total_bytes if total_bytes is not None else self.total_bytes
+
+    @property
+    def path(self) -> str:
+        """str: names of the enclosing tasks and this task, joined by "/"
+        """
+        return f'{self.parent.path}/{self.name}' if self.parent else self.name
+
+    @property
+    def seconds(self) -> float:
+        """float: seconds the task has been running (or ran)
+        """
+        return (self.finished or time.monotonic()) - self.started
+
+    def eta(self) -> float:
+        """Estimates the seconds until the task completes from its throughput so far.
+
+        Returns:
+            float: seconds remaining, None if there is no total or no progress yet
+        """
+        if self.total_bytes and self.bytes:
+            done = self.bytes / self.total_bytes
+        elif self.total and self.completed:
+            done = self.completed / self.total
+        else:
+            return None
+        return self.seconds * (1 - min(done, 1)) / done
+
+    def record(self) -> dict:
+        """Summarizes the task.
+
+        Returns:
+            dict: duration, items, bytes and throughput of the task
+        """
+        seconds = self.seconds
+        record = {'seconds': round(seconds, 3), 'items': self.completed, 'bytes': self.bytes}
+        if seconds > 0:
+            record['items_per_second'] = round(self.completed / seconds, 3)
+            record['bytes_per_second'] = round(self.bytes / seconds, 1)
+        return record
+
+    def describe(self) -> str:
+        """Describes the task's progress for a terminal.
+
+        Returns:
+            str: one line description of the task's progress for a terminal
+        """
+        parts = []
+        fraction = None
+        if self.total:
+            fraction = min(self.completed / self.total, 1)
+            parts.append(f'{self.completed:,}/{self.total:,}')
+        elif self.completed:
+            parts.append(f'{self.completed:,} items')
+        if self.total_bytes:
+            fraction = min(self.bytes / self.total_bytes, 1)
+        seconds = self.seconds
+        if self.completed and seconds > 0:
+            parts.append(f'{self.completed / seconds:,.1f}/s')
+        if self.bytes and seconds > 0:
+            parts.append(f'{_format_bytes(self.bytes / seconds)}/s')
+        eta = self.eta()
+        if eta is not None:
+            parts.append(f'ETA {_format_seconds(eta)}')
+        if fraction is not None:
+            filled = int(fraction * BAR_WIDTH)
+            parts.insert(0, f'[{"#" * filled}{"." * (BAR_WIDTH - filled)}] {fraction:.0%}')
+        return ' '.join(parts)
+
+    def log_line(self) -> str:
+        """Describes the task's progress for logs.
+
+        Returns:
+            str: structured "key=value" description of the task's progress for logs
+        """
+        record = self.record()
+        fields = {'task': f'"{self.path}"', 'items': self.completed, 'total': self.total, 'bytes': self.bytes,
+                    'total_bytes': self.total_bytes, 'seconds': record['seconds'],
+                    'items_per_second': record.get('items_per_second'),
+                    'bytes_per_second': record.get('bytes_per_second'), 'eta_seconds': self.eta()}
+        return 'progress ' + ' '.join(f'{key}={round(value, 1) if isinstance(value, float) else value}'
+                                        for key, value in fields.items() if value is not None)
+
+
+class ProgressReporter(object):
+    """Tracks the tasks of a run and renders the active ones.
+
+    Attributes:
+        enabled (bool): whether active tasks are rendered, i.e False in worker processes
+        records (list): (task path, record) tuples of finished tasks
+        listeners (list): callables called with the path and record of each finished task
+    """
+    def __init__(self):
+        self.enabled = True
+        self.records = []
+        self.listeners = []
+        self._active = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._renderer = None
+
+    @contextmanager
+    def task(self, name: str, total: int = None, total_bytes: int = None, display=None):
+        """Context manager opening a task for the enclosed block. Opened inside another
+        task on the same thread, the task is a sub-task of it.
+
+        Args:
+            name (str): name of the task
+            total (int, optional): number of items expected
+            total_bytes (int, optional): number of bytes expected
+            display (callable, optional): called with a description of the task and its
+                active sub-tasks when rendering to a terminal
+
+        Yields:
+            Task: the task
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        parent = stack[-1] if stack else None
+        task = Task(name, total, total_bytes, parent, display)
+        with self._lock:
+            if parent is None:
+                self._active.append(task)
+            else:
+                parent.children.append(task)
+        self._ensure_renderer()
+        stack.append(task)
+        try:
+            yield task
+        finally:
+            task.finished = time.monotonic()
+            stack.pop()
+            with self._lock:
+                if parent is None:
+                    self._active.remove(task)
+                else:
+                    parent.children.remove(task)
+                self.records.append((task.path, task.record()))
+            for listener in list(self.listeners):
+                listener(task.path, task.record())
+
+    def current(self) -> Task:
+        """Finds the task work on the calling thread is reported into.
+
+        Returns:
+            Task: innermost task open on the calling thread, None if there is none
+        """
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else None
+
+    def advance(self, items: int = 1, nbytes: int = 0):
+        """Reports completed work into the innermost task open on the calling thread, if any.
+
+        Args:
+            items (int, optional): Defaults to 1. Number of items completed.
+            nbytes (int, optional): Defaults to 0. Number of bytes processed.
+        """
+        task = self.current()
+        if task is not None:
+            task.advance(items, nbytes)
+
+    def summary(self) -> dict:
+        """Aggregates finished tasks, summing tasks of the same path.
+
+        Returns:
+            dict: maps task paths to their seconds, items, bytes and throughput
+        """
+        totals = {}
+        with self._lock:
+            records = list(self.records)
+        for path, record in records:
+            total = totals.setdefault(path, {'seconds': 0, 'items': 0, 'bytes': 0})
+            for key in total:
+                total[key] += record[key]
+        for total in totals.values():
+            total['seconds'] = round(total['seconds'], 3)
+            if total['seconds'] > 0 and (total['items'] or total['bytes']):
+                total['items_per_second'] = round(total['items'] / total['seconds'], 3)
+                total['bytes_per_second'] = round(total['bytes'] / total['seconds'], 1)
+        return totals
+
+    def reset(self):
+        """Forgets finished tasks, i.e between runs in the same process.
+        """
+        with self._lock:
+            self.records = []
+
+    def _ensure_renderer(self):
+        with self._lock:
+            if self._renderer is None:
+                self._renderer = threading.Thread(target=self._render_loop, name='progress-renderer', daemon=True)
+                self._renderer.start()
+
+    def _render_loop(self):
+        last_log = time.monotonic()
+        while True:
+            time.sleep(RENDER_INTERVAL)
+            if not self.enabled:
+                continue
+            with self._lock:
+                active = list(self._active)
+            if sys.stdout.isatty():
+                for task in active:
+                    if task.display is not None:
+                        task.display(_describe_tree(task))
+            elif time.monotonic() - last_log >= LOG_INTERVAL:
+                last_log = time.monotonic()
+                for task in active:
+                    for line in _log_tree(task):
+                        click.echo(line, err=True)
+
+
+### PUBLIC METHODS ###
+# progress reporter shared by all of ravenml
+progress = ProgressReporter()
+
+
+### HELPERS ###
+def _describe_tree(task: Task) -> str:
+    # the task followed by its innermost active sub-task, the part actually moving
+    description = task.describe()
+    child = task.children[-1] if task.children else None
+    while child is not None and child.children:
+        child = child.children[-1]
+    if child is not None:
+        description = f'{description} | {child.name} {child.describe()}'.strip()
+    return description
+
+def _log_tree(task: Task) -> list:
+    lines = [task.log_line()] if task.completed or task.total or task.bytes else []
+    for child in list(task.children):
+        lines += _log_tree(child)
+    return lines
+
+def _format_bytes(nbytes: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if nbytes < 1000:
+            return f'{nbytes:.1f} {unit}'
+        nbytes /= 1000
+    return f'{nbytes:.1f} TB'
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    if seconds >= 60:
+        return f'{seconds // 60}m{seconds % 60:02d}s'
+    return f'{seconds}s'
@@ -9,6 +9,11 @@ import sys
 from halo import Halo
 from questionary import prompt
 from typing import Union
+from ravenml.utils.profile import profiler
+from ravenml.utils.progress import progress
+
+# set to False to silence spinners, i.e. in worker processes
+spinners_enabled = True
 
 def in_test_mode() -> bool:
     """ Determines if we are running in an automated test or not. 
@@ -25,17 +30,23 @@ class Spinner:
 
     def __init__(self, text, text_color):
         self.text = text
-        if in_test_mode():
+        self._silent = in_test_mode() or not spinners_enabled
+        if self._silent:
             return
         self._spinner = Halo(text=text, text_color=text_color)
 
     def start(self):
-        if in_test_mode():
+        if self._silent:
             return
         self._spinner.start()
 
+    def update(self, text):
+        if self._silent:
+            return
+        self._spinner.text = text
+
     def succeed(self, text):
-        if in_test_mode():
+        if self._silent:
             return
         self._spinner.succeed(text=text)
 
@@ -126,6 +137,9 @@ def user_confirms(message: str, default=False) -> bool:
 def cli_spinner(text, func, *args, **kwargs):
     """ Halo spinner wrapper.
 
+    The call is a progress task (see ravenml.utils.progress): progress reported into
+    it is shown next to the spinner text.
+
     Args:
         text (str): text to display while spinner is running
         func (function): function to execute while spinner runs
@@ -138,7 +152,10 @@ def cli_spinner(text, func, *args, **kwargs):
     spinner = Spinner(text=text, text_color="magenta")
     spinner.start()
     try:
-        result = func(*args,**kwargs)
+        # each spinner-wrapped stage is a profiling span (no-op unless profiling)
+        with profiler.span(getattr(func, '__qualname__', text)), \
+                progress.task(text.rstrip('. '), display=lambda line: spinner.update(f'{text} {line}')):
+            result = func(*args,**kwargs)
     except Exception:
         spinner.succeed(text=text + 'Failed.')
         raise
@@ -0,0 +1,350 @@
+"""
+Author(s):      Carson Schubert (carson.schubert14@gmail.com)
+Date Created:   10/19/2026
+
+Storage drivers serving the buckets ravenml reads from and writes to.
+
+Every bucket name, in the ravenml config or given to ravenml.utils.aws, is served by
+the driver registered for its scheme:
+    my-bucket, s3://my-bucket       the S3 bucket "my-bucket"
+    file:///mnt/nfs/datasets        a directory on a local or network filesystem
+Drivers implement a small object store interface (list_prefixes, list, head, get, put,
+delete and download), on which ravenml.utils.aws builds syncing prefixes with checksums,
+caching and transfer scheduling, the same for every driver. Drivers report missing
+and unchanged objects with the botocore ClientErrors S3 raises ("404" and "304"), so
+callers handle every driver alike.
+
+Further drivers are registered with register_driver or, from other packages, under
+the STORAGE_ENTRY_POINT entry point group, keyed by the entry point's name as scheme.
+"""
+
+import os
+import shutil
+import threading
+import boto3
+from datetime import datetime, timezone
+from pathlib import Path
+from botocore.exceptions import ClientError
+from pkg_resources import iter_entry_points
+from ravenml.utils.checksum import BLOCK_SIZE
+from ravenml.utils.metrics import record_s3_call
+
+STORAGE_ENTRY_POINT = 'ravenml.storage'
+DEFAULT_SCHEME = 's3'
+# directory at the root of filesystem buckets objects are written to before being
+# renamed into place, so listings never include partially written objects
+PARTIAL_DIRNAME = '.ravenml-partial'
+
+# driver classes by scheme, see register_driver
+_driver_classes = {}
+# driver instances by scheme, see storage_driver
+_drivers = {}
+_drivers_lock = threading.Lock()
+# per-thread boto3 clients, see s3_client
+_thread_local = threading.local()
+
+
+class StorageDriver(object):
+    """Base class of storage drivers. One instance serves every bucket of its scheme
+    and is used from many threads at once.
+
+    Objects are described by dicts with the keys of S3 object summaries: "Key", "Size",
+    "ETag" (quoted, changes whenever the object changes) and "LastModified" (datetime).
+    """
+    def list_prefixes(self, bucket_name: str) -> list:
+        """Lists the top level prefixes of a bucket (i.e, for a key a/b.json, "a").
+
+        Args:
+            bucket_name (str): name of bucket
+
+        Returns:
+            list: prefix strings
+        """
+        raise NotImplementedError
+
+    def list(self, bucket_name: str, prefix: str, limit: int = None) -> list:
+        """Lists the objects whose key starts with a prefix, in key order.
+
+        Args:
+            bucket_name (str): name of bucket
+            prefix (str): start of the keys to list (i.e, "dataset/")
+            limit (int, optional): maximum number of objects listed
+
+        Returns:
+            list: object summaries
+        """
+        raise NotImplementedError
+
+    def head(self, bucket_name: str, key: str) -> dict:
+        """Describes an object.
+
+        Args:
+            bucket_name (str): name of bucket
+            key (str): key of object
+
+        Returns:
+            dict: "ETag", "ContentLength" and "LastModified" of the object
+
+        Raises:
+            ClientError: if the object does not exist
+        """
+        raise NotImplementedError
+
+    def get(self, bucket_name: str, key: str, if_none_match: str = None) -> dict:
+        """Opens an object for reading.
+
+        Args:
+            bucket_name (str): name of bucket
+            key (str): key of object
+            if_none_match (str, optional): ETag of a copy of the object already held
+
+        Returns:
+            dict: "Body" (binary file object, to be closed by the caller) and "ETag"
+
+        Raises:
+            ClientError: if the object does not exist, or with code "304" if its ETag is
+                if_none_match
+        """
+        raise NotImplementedError
+
+    def put(self, bucket_name: str, key: str, fileobj):
+        """Writes an object, replacing any object with the same key.
+
+        Args:
+            bucket_name (str): name of bucket
+            key (str): key of object
+            fileobj (file): binary file object read to the end for the object's content
+        """
+        raise NotImplementedError
+
+    def delete(self, bucket_name: str, key: str):
+        """Deletes an object, doing nothing if it does not exist.
+
+        Args:
+            bucket_name (str): name of bucket
+            key (str): key of object
+        """
+        raise NotImplementedError
+
+    def download(self, bucket_name: str, key: str, path: Path, callback=None):
+        """Downloads an object to a file.
+
+        Args:
+            bucket_name (str): name of bucket
+            key (str): key of object
+            path (Path): file to write
+            callback (callable, optional): called with the number of bytes of each block written
+
+        Raises:
+            ClientError: if the object does not exist
+        """
+        body = self.get(bucket_name, key)['Body']
+        try:
+            with open(path, 'wb') as f:
+                for block in iter(lambda: body.read(BLOCK_SIZE), b''):
+                    f.write(block)
+                    if callback is not None:
+                        callback(len(block))
+        finally:
+            body.close()
+
+
+class S3Driver(StorageDriver):
+    """Driver for S3 buckets, named with or without the "s3://" scheme.
+    """
+    def list_prefixes(self, bucket_name: str) -> list:
+        paginator = s3_client().get_paginator('list_objects_v2')
+        prefixes = []
+        for page in paginator.paginate(Bucket=_bucket(bucket_name), Delimiter='/'):
+            prefixes += [common['Prefix'][:-1] for common in page.get('CommonPrefixes', [])]
+        return prefixes
+
+    def list(self, bucket_name: str, prefix: str, limit: int = None) -> list:
+        paginator = s3_client().get_paginator('list_objects_v2')
+        objects = []
+        pagination = {'MaxItems': limit} if limit else {}
+        for page in paginator.paginate(Bucket=_bucket(bucket_name), Prefix=prefix, PaginationConfig=pagination):
+            objects += page.get('Contents', [])
+        return objects[:limit] if limit else objects
+
+    def head(self, bucket_name: str, key: str) -> dict:
+        return s3_client().head_object(Bucket=_bucket(bucket_name), Key=key)
+
+    def get(self, bucket_name: str, key: str, if_none_match: str = None) -> dict:
+        request = {'Bucket': _bucket(bucket_name), 'Key': key}
+        if if_none_match:
+            request['IfNoneMatch'] = if_none_match
+        return s3_client().get_object(**request)
+
+    def put(self, bucket_name: str, key: str, fileobj):
+        s3_client().upload_fileobj(fileobj, _bucket(bucket_name), key)
+
+    def delete(self, bucket_name: str, key: str):
+        s3_client().delete_object(Bucket=_bucket(bucket_name), Key=key)
+
+    def download(self, bucket_name: str, key: str, path: Path, callback=None):
+        # managed download, large objects are fetched in parallel ranges
+        s3_client().download_file(_bucket(bucket_name), key, str(path), Callback=callback)
+
+
+class FileSystemDriver(StorageDriver):
+    """Driver for directories on a local or network filesystem, named "file://<absolute path>".
+    Keys are paths relative to the directory, and ETags derive from file sizes and
+    modification times.
+    """
+    def list_prefixes(self, bucket_name: str) -> list:
+        root = _root(bucket_name)
+        if not root.is_dir():
+            return []
+        return sorted(entry.name for entry in os.scandir(root) if entry.is_dir() and entry.name != PARTIAL_DIRNAME)
+
+    def list(self, bucket_name: str, prefix: str, limit: int = None) -> list:
+        root = _root(bucket_name)
+        # only the directory the prefix ends in can hold matching keys
+        directory = root / prefix.rsplit('/', 1)[0] if '/' in prefix else root
+        objects = []
+        for current, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [name for name in dirnames if name != PARTIAL_DIRNAME]
+            for name in filenames:
+                path = Path(current) / name
+                key = path.relative_to(root).as_posix()
+                if key.startswith(prefix):
+                    objects.append(dict(self._describe(path), Key=key))
+        objects.sort(key=lambda obj: obj['Key'])
+        return objects[:limit] if limit else objects
+
+    def head(self, bucket_name: str, key: str) -> dict:
+        described = self._describe(_path(bucket_name, key), 'HeadObject')
+        return {'ETag': described['ETag'], 'ContentLength': described['Size'],
+                'LastModified': described['LastModified']}
+
+    def get(self, bucket_name: str, key: str, if_none_match: str = None) -> dict:
+        path = _path(bucket_name, key)
+        try:
+            body = open(path, 'rb')
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            raise _client_error('404', 'GetObject')
+        etag = _etag(os.fstat(body.fileno()))
+        if if_none_match == etag:
+            body.close()
+            raise _client_error('304', 'GetObject')
+        return {'Body': body, 'ETag': etag}
+
+    def put(self, bucket_name: str, key: str, fileobj):
+        path = _path(bucket_name, key)
+        partial_directory = _root(bucket_name) / PARTIAL_DIRNAME
+        os.makedirs(partial_directory, exist_ok=True)
+        os.makedirs(path.parent, exist_ok=True)
+        temp_path = partial_directory / f'{os.getpid()}.{threading.get_ident()}.part'
+        try:
+            with open(temp_path, 'wb') as f:
+                shutil.copyfileobj(fileobj, f, BLOCK_SIZE)
+            os.replace(temp_path, path)
+        except BaseException:
+            if temp_path.exists():
+                os.remove(temp_path)
+            raise
+
+    def delete(self, bucket_name: str, key: str):
+        try:
+            os.remove(_path(bucket_name, key))
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+
+    def download(self, bucket_name: str, key: str, path: Path, callback=None):
+        source = _path(bucket_name, key)
+        try:
+            shutil.copyfile(source, path)
+        except (FileNotFoundError, IsADirectoryError):
+            raise _client_error('404', 'GetObject')
+        if callback is not None:
+            callback(os.path.getsize(path))
+
+    def _describe(self, path: Path, operation: str = 'ListObjects') -> dict:
+        try:
+            stat = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise _client_error('404', operation)
+        if not os.path.isfile(path):
+            raise _client_error('404', operation)
+        return {'Size': stat.st_size, 'ETag': _etag(stat),
+                'LastModified': datetime.fromtimestamp(stat.st_mtime, timezone.utc)}
+
+
+### PUBLIC METHODS ###
+def register_driver(scheme: str, driver_class):
+    """Registers a driver for the buckets named with a scheme, replacing any driver
+    registered for it.
+
+    Args:
+        scheme (str): scheme of the bucket names served, i.e "gs" for "gs://bucket"
+        driver_class (type): StorageDriver subclass, instantiated without arguments
+    """
+    with _drivers_lock:
+        _driver_classes[scheme] = driver_class
+        _drivers.pop(scheme, None)
+
+def storage_driver(bucket_name: str) -> StorageDriver:
+    """Finds the driver serving a bucket.
+
+    Args:
+        bucket_name (str): name of bucket, S3 if it has no scheme
+
+    Returns:
+        StorageDriver: driver of the bucket's scheme
+
+    Raises:
+        ValueError: if no driver is registered for the scheme
+    """
+    scheme = bucket_name.split('://', 1)[0] if '://' in bucket_name else DEFAULT_SCHEME
+    with _drivers_lock:
+        driver = _drivers.get(scheme)
+        if driver is None:
+            driver_class = _driver_classes.get(scheme)
+            if driver_class is None:
+                driver_class = next((entry_point.load() for entry_point in iter_entry_points(STORAGE_ENTRY_POINT)
+                                        if entry_point.name == scheme), None)
+            if driver_class is None:
+                raise ValueError(f'No storage driver for "{scheme}://" buckets')
+            driver = _drivers[scheme] = driver_class()
+    return driver
+
+def s3_client():
+    """Retrieves an S3 client for the calling thread.
+
+    boto3 sessions are not thread safe and are expensive to create, so each
+    thread lazily creates one session and client and reuses it.
+
+    Returns:
+        S3.Client: boto3 S3 client
+    """
+    client = getattr(_thread_local, 's3_client', None)
+    if client is None:
+        client = _thread_local.s3_client = boto3.session.Session().client('s3')
+        client.meta.events.register('after-call.s3', record_s3_call)
+    return client
+
+register_driver('s3', S3Driver)
+register_driver('file', FileSystemDriver)
+
+
+### HELPERS ###
+def _bucket(bucket_name: str) -> str:
+    return bucket_name[len('s3://'):] if bucket_name.startswith('s3://') else bucket_name
+
+def _root(bucket_name: str) -> Path:
+    return Path(bucket_name[len('file://'):])
+
+def _path(bucket_name: str, key: str) -> Path:
+    # path of a key, which must stay inside the bucket's directory
+    if '..' in Path(key).parts or Path(key).is_absolute():
+        raise ValueError(f'Invalid key "{key}"')
+    return _root(bucket_name) / key
+
+def _etag(stat) -> str:
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+def _client_error(code: str, operation: str) -> ClientError:
+    # the error S3 raises, so callers handle every driver alike
+    message = 'Not Modified' if code == '304' else 'Not Found'
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
@@ -50,9 +50,14 @@ setup(
         'colorama>=0.3.9',
         'pyaml>=19.4.1',
     ],
+    extras_require={
+        'transforms': ['Pillow>=6.0'],
+    },
     tests_require=[
         'pytest',
-        'moto'
+        'pytest-benchmark',
+        'moto[server]',
+        'Pillow>=6.0'
     ],
     entry_points={
         'console_scripts': [f'{pkg_name}={pkg_name}.cli:cli'],